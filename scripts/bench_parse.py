@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - Parser Benchmark
+Times the results-page parser in scrape_ucsc.py against saved HTML fixtures,
+with no network access, and compares revisions.
+"""
+
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(SCRIPTS_DIR, 'fixtures')
+QUARTER = "2026 Winter"
+
+
+def load_scraper(rev=None):
+    """Import scrape_ucsc.py from the working tree, or as of a git revision."""
+    if rev is None:
+        path = os.path.join(SCRIPTS_DIR, 'scrape_ucsc.py')
+        name = 'scrape_ucsc_worktree'
+    else:
+        source = subprocess.check_output(['git', 'show', f'{rev}:scripts/scrape_ucsc.py'], cwd=SCRIPTS_DIR)
+        handle, path = tempfile.mkstemp(suffix='.py', prefix='scrape_ucsc_')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(source)
+        name = f"scrape_ucsc_{re.sub(r'[^A-Za-z0-9]', '_', rev)}"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if rev is not None:
+            os.remove(path)
+    return module
+
+
+def _best_time(fn, repeat):
+    """Best seconds per call over `repeat` rounds, each long enough to time reliably."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _peak_memory(fn):
+    """Peak bytes allocated during one call."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_fixture(scraper, reference, html, repeat):
+    """
+    Run every benchmark that `scraper` supports over one fixture page.
+
+    `reference` (the working-tree module) extracts the inputs, so every
+    revision is timed on exactly the same headings.
+    """
+    results = {}
+    panel_count = len(re.findall(r'id="rowpanel_', html))
+
+    # Whole page: HTML in, course records out
+    parse_page = getattr(scraper, 'parse_results_page', None) or getattr(scraper, '_parse_results_html', None)
+    if parse_page is not None:
+        records = len(parse_page(html, QUARTER))
+        seconds = _best_time(lambda: parse_page(html, QUARTER), repeat)
+        results['page_parse'] = {
+            'panels_per_sec': panel_count / seconds,
+            'records_per_sec': records / seconds,
+            'peak_kib': _peak_memory(lambda: parse_page(html, QUARTER)) / 1024,
+        }
+
+    # Course-name regex cascade over every panel heading
+    parse_name = getattr(scraper, '_parse_course_name', None)
+    if parse_name is not None:
+        panels = reference.parse_html(html).find_all('div', reference._is_course_panel)
+        headings = [reference._extract_heading(panel)[0] for panel in panels]
+
+        def parse_names():
+            for heading in headings:
+                parse_name(heading)
+
+        parsed = sum(1 for heading in headings if parse_name(heading) is not None)
+        seconds = _best_time(parse_names, repeat)
+        results['course_names'] = {
+            'panels_per_sec': len(headings) / seconds,
+            'records_per_sec': parsed / seconds,
+            'peak_kib': _peak_memory(parse_names) / 1024,
+        }
+
+    # Instructor lookup, including the any-div-with-fa-user fallback
+    extract_professor = getattr(scraper, '_extract_professor', None)
+    if extract_professor is not None:
+        panels = scraper.parse_html(html).find_all('div', scraper._is_course_panel)
+
+        def extract_professors():
+            for panel in panels:
+                extract_professor(panel)
+
+        found = sum(1 for panel in panels if extract_professor(panel) != "TBA")
+        seconds = _best_time(extract_professors, repeat)
+        results['instructors'] = {
+            'panels_per_sec': len(panels) / seconds,
+            'records_per_sec': found / seconds,
+            'peak_kib': _peak_memory(extract_professors) / 1024,
+        }
+
+    return results
+
+
+def run_suite(scraper, reference, fixtures, repeat):
+    suite = {}
+    for path in fixtures:
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        suite[os.path.basename(path)] = bench_fixture(scraper, reference, html, repeat)
+    return suite
+
+
+def print_results(label, suite, baseline=None, baseline_label=None):
+    print(f"\n📊 {label}" + (f" vs {baseline_label}" if baseline else ""))
+    print(f"   {'fixture / benchmark':<58} {'panels/s':>10} {'records/s':>10} {'peak KiB':>9}"
+          + (f" {'Δ panels/s':>11}" if baseline else ""))
+    for fixture, benches in suite.items():
+        for bench, stats in benches.items():
+            line = (f"   {fixture + ' / ' + bench:<58} {stats['panels_per_sec']:>10,.0f} "
+                    f"{stats['records_per_sec']:>10,.0f} {stats['peak_kib']:>9,.1f}")
+            if baseline:
+                base = baseline.get(fixture, {}).get(bench)
+                if base:
+                    change = (stats['panels_per_sec'] / base['panels_per_sec'] - 1) * 100
+                    line += f" {change:>+10.1f}%"
+                else:
+                    line += f" {'n/a':>11}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the scrape_ucsc.py parser against saved pages')
+    parser.add_argument('fixtures', nargs='*',
+                        help='Results page HTML files (default: scripts/fixtures/*.html)')
+    parser.add_argument('--rev',
+                        help='Also benchmark scrape_ucsc.py at this git revision and compare')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timing rounds per benchmark; the best round is reported (default: 5)')
+    parser.add_argument('--save', metavar='FILE',
+                        help='Write the working-tree results to a JSON file')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare against results saved earlier with --save')
+
+    args = parser.parse_args()
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html')))
+    if not fixtures:
+        print("❌ No fixtures found")
+        sys.exit(1)
+
+    print(f"🏁 Benchmarking {len(fixtures)} fixture(s), best of {args.repeat} rounds...")
+    reference = load_scraper()
+    current = run_suite(reference, reference, fixtures, args.repeat)
+
+    if args.rev:
+        other = run_suite(load_scraper(args.rev), reference, fixtures, args.repeat)
+        print_results(args.rev, other)
+        print_results('working tree', current, other, args.rev)
+    elif args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            saved = json.load(f)
+        print_results('working tree', current, saved['results'], saved.get('label', args.compare))
+    else:
+        print_results('working tree', current)
+
+    if args.save:
+        label = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                               capture_output=True, text=True).stdout.strip() or 'working tree'
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'label': label, 'results': current}, f, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
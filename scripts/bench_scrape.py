@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - End-to-End Benchmark
+Runs scrape_ucsc_courses against a local mock pisa server (mock_pisa.py)
+for synthetic catalogs of several sizes, and reports courses/sec and total
+runtime without touching the registrar's site.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+import mock_pisa
+import scrape_ucsc
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EXTENSIONS = {'json': 'json', 'ndjson': 'ndjson', 'sqlite': 'sqlite'}
+
+
+@contextlib.contextmanager
+def mock_server(sections, seed=0, latency=0.0, jitter=0.0, error_rate=0.0, capacity=None):
+    """
+    Run mock_pisa.py in its own process and yield its search URL.
+
+    A separate process keeps the server's work off the scraper's GIL, so
+    the benchmark times the scraper rather than the two competing.
+    """
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, 'mock_pisa.py'), '--port', '0',
+               '--sections', str(sections), '--seed', str(seed), '--latency', str(latency),
+               '--jitter', str(jitter), '--error-rate', str(error_rate)]
+    if capacity:
+        command += ['--capacity', str(capacity)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        match = re.search(r'http://\S+', process.stdout.readline())
+        if match is None:
+            raise RuntimeError("mock_pisa.py did not start")
+        yield match.group()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def server_stats(url):
+    """Requests the mock server has answered, by kind."""
+    base = url.split(mock_pisa.SEARCH_PATH)[0]
+    with urlopen(base + mock_pisa.STATS_PATH) as response:
+        return json.load(response)
+
+
+def expected_counts(sections, seed=0):
+    """(sections, offerings) a complete scrape of the synthetic catalog finds."""
+    catalog = mock_pisa.synthetic_catalog(sections, seed)
+    return len(catalog), len({(s.subject, s.number, s.instructor) for s in catalog})
+
+
+def output_counts(output_file, output_format):
+    """(sections, offerings) read back from a finished scrape's output file."""
+    if output_format == 'sqlite':
+        with contextlib.closing(sqlite3.connect(output_file)) as db:
+            sections = [row[0] for row in db.execute('SELECT sections FROM courses')]
+        return sum(len(json.loads(value or '[]')) for value in sections), len(sections)
+    with open(output_file, encoding='utf-8') as f:
+        if output_format == 'ndjson':
+            courses = [json.loads(line) for line in f if line.strip()]
+        else:
+            courses = json.load(f)
+    return sum(len(course.get('sections') or []) for course in courses), len(courses)
+
+
+def check_formats(sections, engine='http', workers=1, seed=0, verbose=False):
+    """
+    Scrape the same synthetic catalog once per output format and read each file back.
+
+    Returns:
+        Dict mapping each format to the (sections, offerings) in its file
+    """
+    counts = {}
+    with mock_server(sections, seed) as url, tempfile.TemporaryDirectory(prefix='bench_scrape_') as workdir:
+        scrape_ucsc.SEARCH_URL = url
+        for output_format in scrape_ucsc.OUTPUT_FORMATS:
+            output_file = os.path.join(workdir, f"catalog.{EXTENSIONS[output_format]}")
+            with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO()):
+                scrape_ucsc.scrape_ucsc_courses(output_file, engine=engine, workers=workers,
+                                                output_format=output_format, checkpoint=False)
+            counts[output_format] = output_counts(output_file, output_format)
+    return counts
+
+
+def bench_scrape(sections, engine='http', workers=1, enrich=False, enrich_concurrency=8, output_format='json',
+                 latency=0.0, jitter=0.0, error_rate=0.0, capacity=None, seed=0, verbose=False):
+    """
+    Scrape one synthetic catalog end to end and time it.
+
+    Args:
+        sections: Sections in the mock catalog
+        engine: Fetch engine passed to scrape_ucsc_courses
+        workers: Parallel workers (shards by subject when > 1)
+        enrich: Also fetch every offering's detail page
+        enrich_concurrency: Detail pages fetched at once when enriching
+        output_format: 'json', 'ndjson' or 'sqlite'
+        latency, jitter, error_rate, capacity: Injected into the mock server
+            (see mock_pisa.MockPisaServer)
+        seed: Catalog random seed
+        verbose: Show the scraper's own output
+
+    Returns:
+        dict with the run's timings, throughput, counters and whether the
+        output file it wrote holds every section and offering
+    """
+    expected_sections, expected_offerings = expected_counts(sections, seed)
+    with mock_server(sections, seed, latency, jitter, error_rate, capacity) as url, \
+            tempfile.TemporaryDirectory(prefix='bench_scrape_') as workdir:
+        # scrape_ucsc reads SEARCH_URL when a scrape starts
+        scrape_ucsc.SEARCH_URL = url
+        output_file = os.path.join(workdir, f"catalog.{EXTENSIONS[output_format]}")
+        metrics_file = os.path.join(workdir, 'metrics.json')
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+        with output:
+            scrape_ucsc.scrape_ucsc_courses(output_file, engine=engine, workers=workers, enrich=enrich,
+                                            enrich_concurrency=enrich_concurrency, enrich_rate=0,
+                                            output_format=output_format, checkpoint=False,
+                                            metrics_file=metrics_file)
+        seconds = time.perf_counter() - started
+        with open(metrics_file, encoding='utf-8') as f:
+            report = json.load(f)
+        served = server_stats(url)
+        written_sections, written_offerings = output_counts(output_file, output_format)
+
+    counters = report['counters']
+    return {
+        'sections': sections,
+        'seconds': seconds,
+        'courses_per_sec': counters.get('offerings', 0) / seconds,
+        'sections_per_sec': counters.get('sections', 0) / seconds,
+        # Counted in the output file, not by the scraper, so sections lost
+        # between parsing and writing show up as an incomplete run
+        'offerings': written_offerings,
+        'sections_found': written_sections,
+        'complete': written_sections == expected_sections and written_offerings == expected_offerings,
+        'expected': {'sections': expected_sections, 'offerings': expected_offerings},
+        'pages': len(report['pages']),
+        'counters': counters,
+        'phases': report['phases'],
+        'server': served,
+    }
+
+
+def print_results(results, baseline=None, baseline_label=None):
+    print("\n📊 End-to-end scrape" + (f" vs {baseline_label}" if baseline else ""))
+    print(f"   {'sections':>9} {'seconds':>9} {'courses/s':>10} {'sections/s':>11} {'pages':>6} "
+          f"{'retries':>8} {'503s':>6}  complete" + (f" {'Δ courses/s':>12}" if baseline else ""))
+    for result in results:
+        server = result['server']
+        line = (f"   {result['sections']:>9,} {result['seconds']:>9.2f} {result['courses_per_sec']:>10,.0f} "
+                f"{result['sections_per_sec']:>11,.0f} {result['pages']:>6} "
+                f"{result['counters'].get('retries', 0):>8} "
+                f"{server.get('errors', 0) + server.get('overloaded', 0):>6}  "
+                f"{'yes' if result['complete'] else 'NO':<8}")
+        if baseline:
+            base = next((b for b in baseline if b['sections'] == result['sections']), None)
+            if base:
+                line += f" {(result['courses_per_sec'] / base['courses_per_sec'] - 1) * 100:>+11.1f}%"
+            else:
+                line += f" {'n/a':>12}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark full scrapes against a local mock pisa server')
+    parser.add_argument('--scales', default='1,10',
+                        help='Catalog sizes to scrape, as multiples of --sections (default: 1,10)')
+    parser.add_argument('--sections', type=int, default=mock_pisa.CATALOG_SIZE,
+                        help=f'Sections at scale 1 (default: {mock_pisa.CATALOG_SIZE}, about one real term)')
+    parser.add_argument('--engine', choices=scrape_ucsc.ENGINES, default='http',
+                        help='Fetch engine to benchmark (default: http)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Parallel workers, sharded by subject when > 1 (default: 1)')
+    parser.add_argument('--enrich', action='store_true', help='Also fetch every detail page')
+    parser.add_argument('--enrich-concurrency', type=int, default=8,
+                        help='Detail pages fetched at once with --enrich (default: 8)')
+    parser.add_argument('--format', choices=scrape_ucsc.OUTPUT_FORMATS, default='json', dest='output_format',
+                        help='Output format written (default: json)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds the mock adds to every response (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Up to this many more seconds per response (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests the mock answers with a 503 (default: 0)')
+    parser.add_argument('--capacity', type=int,
+                        help='Requests the mock serves at once before answering 503 (default: no limit)')
+    parser.add_argument('--seed', type=int, default=0, help='Catalog random seed (default: 0)')
+    parser.add_argument('--check-formats', action='store_true',
+                        help='Instead of timing, scrape each catalog to every output format and check '
+                             'that the files hold the same sections and offerings')
+    parser.add_argument('--save', metavar='FILE', help='Write the results to a JSON file')
+    parser.add_argument('--compare', metavar='FILE', help='Compare against results saved earlier with --save')
+    parser.add_argument('--verbose', '-v', action='store_true', help="Show the scraper's own output")
+
+    args = parser.parse_args()
+    try:
+        scales = [float(scale) for scale in args.scales.split(',') if scale.strip()]
+    except ValueError:
+        print(f"❌ Invalid --scales {args.scales!r} (expected e.g. 1,10)")
+        sys.exit(1)
+
+    if args.check_formats:
+        consistent = True
+        for scale in scales:
+            sections = max(1, int(args.sections * scale))
+            expected = expected_counts(sections, args.seed)
+            print(f"🔁 Scraping {sections:,} sections ({scale:g}x) to each output format...")
+            counts = check_formats(sections, engine=args.engine, workers=max(1, args.workers), seed=args.seed,
+                                   verbose=args.verbose)
+            for output_format, found in counts.items():
+                match = found == expected
+                consistent = consistent and match
+                print(f"   {output_format:<7} {found[0]:>7,} sections {found[1]:>7,} offerings  "
+                      f"{'ok' if match else f'expected {expected[0]:,} / {expected[1]:,}'}")
+        sys.exit(0 if consistent else 1)
+
+    results = []
+    for scale in scales:
+        sections = max(1, int(args.sections * scale))
+        print(f"🏁 Scraping {sections:,} sections ({scale:g}x) with the {args.engine} engine, "
+              f"{args.workers} worker(s){', enriched' if args.enrich else ''}...")
+        result = bench_scrape(sections, engine=args.engine, workers=max(1, args.workers), enrich=args.enrich,
+                              enrich_concurrency=max(1, args.enrich_concurrency), output_format=args.output_format,
+                              latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              capacity=args.capacity, seed=args.seed, verbose=args.verbose)
+        result['scale'] = scale
+        results.append(result)
+        if not result['complete']:
+            print(f"⚠️  Found {result['sections_found']} sections / {result['offerings']} courses, expected "
+                  f"{result['expected']['sections']} / {result['expected']['offerings']}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            saved = json.load(f)
+        print_results(results, saved['results'], saved.get('label', args.compare))
+    else:
+        print_results(results)
+
+    if args.save:
+        label = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                               capture_output=True, text=True).stdout.strip() or 'working tree'
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'label': label, 'options': vars(args), 'results': results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
+
+    if not all(result['complete'] for result in results):
+        sys.exit(1)
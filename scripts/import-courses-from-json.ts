@@ -1,7 +1,8 @@
 import { createClient } from '@supabase/supabase-js';
 import * as dotenv from 'dotenv';
-import { readFileSync } from 'fs';
+import { createReadStream, readFileSync } from 'fs';
 import { join } from 'path';
+import { createInterface } from 'readline';
 
 // Load environment variables
 dotenv.config({ path: join(process.cwd(), '.env.local') });
@@ -29,6 +30,77 @@ interface CourseData {
   course_link?: string;
 }
 
+type ImportResult = 'inserted' | 'skipped' | 'error';
+
+async function importCourse(course: CourseData): Promise<ImportResult> {
+  try {
+    // Validate required fields
+    if (!course.name || !course.subject || !course.professor || !course.quarter) {
+      console.error(`⚠️  Skipping course with missing fields: ${JSON.stringify(course)}`);
+      return 'skipped';
+    }
+
+    // Check if course already exists (by name, professor, and quarter)
+    const { data: existing } = await supabase
+      .from('course')
+      .select('id')
+      .eq('name', course.name)
+      .eq('professor', course.professor)
+      .eq('quarter', course.quarter)
+      .single();
+
+    if (existing) {
+      return 'skipped';
+    }
+
+    // Insert new course
+    const { error } = await supabase
+      .from('course')
+      .insert({
+        name: course.name,
+        subject: course.subject,
+        professor: course.professor,
+        quarter: course.quarter,
+        course_link: course.course_link || null,
+      });
+
+    if (error) {
+      console.error(`❌ Error inserting "${course.name}":`, error.message);
+      return 'error';
+    }
+    return 'inserted';
+  } catch (error) {
+    console.error(`❌ Error processing "${course.name}":`, error);
+    return 'error';
+  }
+}
+
+async function importCourses(courses: AsyncIterable<CourseData> | Iterable<CourseData>) {
+  let inserted = 0;
+  let skipped = 0;
+  let errors = 0;
+
+  for await (const course of courses) {
+    const result = await importCourse(course);
+    if (result === 'inserted') {
+      inserted++;
+      if (inserted % 10 === 0) {
+        process.stdout.write(`   Inserted ${inserted} courses...\r`);
+      }
+    } else if (result === 'skipped') {
+      skipped++;
+    } else {
+      errors++;
+    }
+  }
+
+  console.log('\n');
+  console.log('✨ Course import complete!');
+  console.log(`   ✅ Inserted: ${inserted}`);
+  console.log(`   ⏭️  Skipped (already exist): ${skipped}`);
+  console.log(`   ❌ Errors: ${errors}`);
+}
+
 async function importCoursesFromJson(jsonFilePath: string) {
   console.log(`📂 Reading courses from ${jsonFilePath}...\n`);
 
@@ -53,70 +125,37 @@ async function importCoursesFromJson(jsonFilePath: string) {
 
   console.log(`💾 Importing ${courses.length} courses into database...\n`);
 
-  let inserted = 0;
-  let skipped = 0;
-  let errors = 0;
+  await importCourses(courses);
+}
 
-  for (const course of courses) {
+// Yields courses from newline-delimited JSON as lines arrive, so an import
+// can run while the scraper is still writing (e.g. piped from stdout)
+async function* readNdjson(filePath: string): AsyncGenerator<CourseData> {
+  const input = filePath === '-' ? process.stdin : createReadStream(filePath, 'utf-8');
+  const lines = createInterface({ input, crlfDelay: Infinity });
+  for await (const line of lines) {
+    if (!line.trim()) {
+      continue;
+    }
     try {
-      // Validate required fields
-      if (!course.name || !course.subject || !course.professor || !course.quarter) {
-        console.error(`⚠️  Skipping course with missing fields: ${JSON.stringify(course)}`);
-        skipped++;
-        continue;
-      }
-
-      // Check if course already exists (by name, professor, and quarter)
-      const { data: existing } = await supabase
-        .from('course')
-        .select('id')
-        .eq('name', course.name)
-        .eq('professor', course.professor)
-        .eq('quarter', course.quarter)
-        .single();
-
-      if (existing) {
-        skipped++;
-        continue;
-      }
-
-      // Insert new course
-      const { error } = await supabase
-        .from('course')
-        .insert({
-          name: course.name,
-          subject: course.subject,
-          professor: course.professor,
-          quarter: course.quarter,
-          course_link: course.course_link || null,
-        });
-
-      if (error) {
-        console.error(`❌ Error inserting "${course.name}":`, error.message);
-        errors++;
-      } else {
-        inserted++;
-        if (inserted % 10 === 0) {
-          process.stdout.write(`   Inserted ${inserted} courses...\r`);
-        }
-      }
+      yield JSON.parse(line);
     } catch (error) {
-      console.error(`❌ Error processing "${course.name}":`, error);
-      errors++;
+      console.error(`⚠️  Skipping invalid line: ${line}`);
     }
   }
+}
 
-  console.log('\n');
-  console.log('✨ Course import complete!');
-  console.log(`   ✅ Inserted: ${inserted}`);
-  console.log(`   ⏭️  Skipped (already exist): ${skipped}`);
-  console.log(`   ❌ Errors: ${errors}`);
+async function importCoursesFromNdjson(filePath: string) {
+  console.log(`📂 Streaming courses from ${filePath === '-' ? 'stdin' : filePath}...\n`);
+  await importCourses(readNdjson(filePath));
 }
 
 // Get JSON file path from command line argument or use default
 const jsonFilePath = process.argv[2] || 'ucsc_courses.json';
 
-importCoursesFromJson(jsonFilePath).catch((error) => {
+const isNdjson = jsonFilePath === '-' || /\.(ndjson|jsonl)$/.test(jsonFilePath);
+
+(isNdjson ? importCoursesFromNdjson(jsonFilePath) : importCoursesFromJson(jsonFilePath)).catch((error) => {
   console.error('❌ Fatal error:', error);
   process.exit(1);
 });
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - Bulk Loader
+Diffs a scrape against the previously loaded one and writes the new and
+changed courses as a SQL script for psql: batched INSERT ... ON CONFLICT
+statements, or a COPY into a staging table that is merged in one statement.
+"""
+
+import argparse
+import json
+import sys
+
+# Columns loaded into the course table, and the unique key among them
+COLUMNS = ('name', 'subject', 'professor', 'quarter', 'course_link')
+KEY = ('name', 'professor', 'quarter')
+LOAD_FORMATS = ('sql', 'copy')
+
+# Matches idx_course_unique_name_professor_quarter (sql/09_add_professor_quarter.sql)
+CONFLICT_TARGET = "(name, professor, quarter) WHERE professor IS NOT NULL AND quarter IS NOT NULL"
+UPSERT_ACTION = """DO UPDATE SET subject = EXCLUDED.subject, course_link = EXCLUDED.course_link, updated_at = now()
+WHERE (course.subject, course.course_link) IS DISTINCT FROM (EXCLUDED.subject, EXCLUDED.course_link)"""
+
+
+def read_courses(path):
+    """Read a scrape's courses from a JSON array or NDJSON file ('-' reads NDJSON from stdin)."""
+    if path == '-':
+        return [json.loads(line) for line in sys.stdin if line.strip()]
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            return [json.loads(line) for line in f if line.strip()]
+        courses = json.load(f)
+    if not isinstance(courses, list):
+        raise ValueError(f"{path} must contain an array of courses")
+    return courses
+
+
+def course_rows(courses):
+    """
+    Map each course's (name, professor, quarter) to its row of COLUMNS.
+
+    Courses missing a required field are left out, as the TypeScript
+    importer does; a later duplicate of a key replaces an earlier one.
+
+    Returns:
+        (rows, skipped) where rows is a dict keyed by KEY
+    """
+    rows = {}
+    skipped = 0
+    for course in courses:
+        if not all(course.get(field) for field in ('name', 'subject', 'professor', 'quarter')):
+            skipped += 1
+            continue
+        row = tuple(course.get(column) or None for column in COLUMNS)
+        rows[tuple(course[field] for field in KEY)] = row
+    return rows, skipped
+
+
+def diff_rows(current, previous):
+    """
+    Compare this scrape's rows with the previously loaded ones.
+
+    Returns:
+        (new, changed, unchanged, missing): lists of rows for the first two,
+        counts for the last two. Rows missing from this scrape are only
+        counted, never deleted, since quizzes and subscriptions reference them.
+    """
+    new = []
+    changed = []
+    unchanged = 0
+    for key, row in current.items():
+        before = previous.get(key)
+        if before is None:
+            new.append(row)
+        elif before != row:
+            changed.append(row)
+        else:
+            unchanged += 1
+    missing = sum(1 for key in previous if key not in current)
+    return new, changed, unchanged, missing
+
+
+def _sql_literal(value):
+    if value is None:
+        return 'NULL'
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _copy_field(value):
+    if value is None:
+        return r'\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def write_sql(rows, out, batch_size=500):
+    """Write rows as INSERT ... ON CONFLICT statements of up to batch_size rows each."""
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        out.write(f"INSERT INTO course ({', '.join(COLUMNS)}) VALUES\n")
+        out.write(',\n'.join('  (' + ', '.join(_sql_literal(value) for value in row) + ')' for row in batch))
+        out.write(f"\nON CONFLICT {CONFLICT_TARGET}\n{UPSERT_ACTION};\n\n")
+
+
+def write_copy(rows, out):
+    """Write rows as a COPY into a temporary staging table, merged into course in one statement."""
+    columns = ', '.join(COLUMNS)
+    out.write("CREATE TEMP TABLE course_load (LIKE course INCLUDING DEFAULTS) ON COMMIT DROP;\n")
+    out.write(f"COPY course_load ({columns}) FROM STDIN;\n")
+    for row in rows:
+        out.write('\t'.join(_copy_field(value) for value in row) + '\n')
+    out.write("\\.\n\n")
+    out.write(f"INSERT INTO course ({columns})\nSELECT {columns} FROM course_load\n"
+              f"ON CONFLICT {CONFLICT_TARGET}\n{UPSERT_ACTION};\n\n")
+
+
+def build_load(input_file, output_file, previous_file=None, load_format='sql', batch_size=500):
+    """
+    Write a psql script that loads the new and changed courses from a scrape.
+
+    Args:
+        input_file: Scrape output (JSON array or NDJSON; '-' for NDJSON on stdin)
+        output_file: Path for the SQL script, or '-' for stdout
+        previous_file: Scrape output that was last loaded into the database;
+            without one every course is written
+        load_format: 'sql' for batched INSERT ... ON CONFLICT statements, or
+            'copy' for a COPY into a staging table followed by one merge
+        batch_size: Rows per INSERT statement (sql format)
+
+    Returns:
+        dict of counts: new, changed, unchanged, missing, skipped
+    """
+    if load_format not in LOAD_FORMATS:
+        raise ValueError(f"Unknown load format {load_format!r} (expected one of {', '.join(LOAD_FORMATS)})")
+    # With the SQL going to stdout, progress goes to stderr
+    log = sys.stderr if output_file == '-' else sys.stdout
+
+    current, skipped = course_rows(read_courses(input_file))
+    previous = {}
+    if previous_file:
+        previous, _ = course_rows(read_courses(previous_file))
+        print(f"📂 Diffing {len(current)} courses against {len(previous)} in {previous_file}", file=log)
+    else:
+        print(f"📂 No previous snapshot, loading all {len(current)} courses", file=log)
+    new, changed, unchanged, missing = diff_rows(current, previous)
+    rows = new + changed
+
+    out = sys.stdout if output_file == '-' else open(output_file, 'w', encoding='utf-8')
+    try:
+        out.write(f"-- Course load from {input_file}"
+                  + (f" (diff against {previous_file})" if previous_file else "") + "\n")
+        out.write(f"-- {len(new)} new, {len(changed)} changed, {unchanged} unchanged, "
+                  f"{missing} missing from this scrape (not deleted)\n")
+        out.write("BEGIN;\n\n")
+        if rows:
+            if load_format == 'copy':
+                write_copy(rows, out)
+            else:
+                write_sql(rows, out, batch_size)
+        out.write("COMMIT;\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ Wrote {len(rows)} rows to {'stdout' if output_file == '-' else output_file} "
+          f"({len(new)} new, {len(changed)} changed, {unchanged} unchanged)", file=log)
+    if missing:
+        print(f"ℹ️  {missing} previously loaded courses are missing from this scrape (left in place)", file=log)
+    if skipped:
+        print(f"⚠️  Skipped {skipped} courses with missing fields", file=log)
+    return {'new': len(new), 'changed': len(changed), 'unchanged': unchanged, 'missing': missing,
+            'skipped': skipped}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write a bulk SQL load of new and changed courses')
+    parser.add_argument('input_file', nargs='?', default='ucsc_courses.json',
+                        help='Scrape output, JSON or NDJSON (default: ucsc_courses.json; "-" reads NDJSON from stdin)')
+    parser.add_argument('--previous', '-p', metavar='FILE',
+                        help='Scrape output that was last loaded; only new and changed courses are written')
+    parser.add_argument('--output', '-o', default='-',
+                        help='Where to write the SQL script (default: stdout)')
+    parser.add_argument('--format', choices=LOAD_FORMATS, default='sql', dest='load_format',
+                        help='Batched INSERT ... ON CONFLICT statements (sql) or COPY into a staging table (copy) '
+                             '(default: sql)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Rows per INSERT statement with --format sql (default: 500)')
+
+    args = parser.parse_args()
+    try:
+        build_load(args.input_file, args.output, previous_file=args.previous, load_format=args.load_format,
+                   batch_size=max(1, args.batch_size))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
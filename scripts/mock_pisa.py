@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - Mock PISA Server
+Serves a synthetic class search shaped like pisa.ucsc.edu (search form,
+paginated results driven by resultsForm, and detail pages), with injectable
+latency, errors and a concurrency limit, so the scraper can be load tested
+without touching the registrar's site.
+"""
+
+import argparse
+import base64
+import html
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+SEARCH_PATH = '/class_search/index.php'
+STATS_PATH = '/_mock/stats'
+
+# (binds[:term] value, option text), newest first like the real dropdown
+TERMS = [
+    ('2262', '2026 Spring Quarter'),
+    ('2260', '2026 Winter Quarter'),
+    ('2258', '2025 Fall Quarter'),
+    ('2254', '2025 Summer Quarter'),
+]
+DEFAULT_TERM = '2260'
+
+# Sections in a real all-classes search for one term (2026 Winter), and
+# results per page
+CATALOG_SIZE = 2841
+PAGE_SIZE = 50
+
+SUBJECTS = ('AM', 'ANTH', 'ART', 'ASTR', 'BIOE', 'BIOL', 'BME', 'CHEM', 'CMPM', 'CSE', 'ECE', 'ECON', 'EDUC',
+            'ENVS', 'FILM', 'HIS', 'LING', 'LIT', 'MATH', 'MUSC', 'PHIL', 'PHYS', 'POLI', 'PSYC', 'SOCY', 'STAT',
+            'THEA', 'WRIT')
+_TITLE_WORDS = ('Intro', 'Adv', 'Topics', 'Methods', 'Theory', 'Systems', 'Analysis', 'Design', 'Data',
+                'Lin Algebra', 'Calculus', 'Writing', 'Ecology', 'Ethics', 'Networks', 'Seminar', 'Lab',
+                'Modern', 'History', 'Research', 'Statistics', 'Structures', 'Culture', 'Practicum')
+_SURNAMES = ('Ioannidis', 'Dimitrov', 'Nguyen', 'Garcia', 'Smith', 'Chen', 'Patel', 'Kim', 'Martinez', 'Lopez',
+             'Brown', 'Wilson', 'Singh', 'Cohen', 'Rossi', 'Tanaka', 'Okafor', 'Haddad', 'Novak', 'Silva')
+_DAYS = ('MWF', 'TuTh', 'MW', 'TTh', 'F')
+_TIMES = ('08:00AM-09:05AM', '09:20AM-10:25AM', '11:40AM-01:15PM', '01:30PM-03:05PM', '05:20PM-06:55PM')
+_ROOMS = ('Thimann Lab 003', 'Kresge Clrm 321', 'Earth&Marine B206', 'J Baskin Engr 152', 'Media Theater M110')
+_STATUSES = ('Open', 'Open', 'Closed', 'Wait List')
+
+Section = namedtuple('Section', ['class_number', 'subject', 'number', 'section', 'title', 'instructor', 'status',
+                                 'enrolled', 'capacity', 'days_times', 'room'])
+
+
+def _course_number(number):
+    """Numeric part of a course number, e.g. 10 for "10A"."""
+    return int(''.join(c for c in number if c.isdigit()))
+
+
+def synthetic_catalog(sections=CATALOG_SIZE, seed=0):
+    """
+    Generate a term's worth of sections, sorted by subject and course number like pisa lists them.
+
+    Offerings get one to three sections; most share one instructor, and a
+    few are taught by "Staff". The same seed always gives the same catalog.
+    """
+    rng = random.Random(seed)
+    numbers = {subject: 1 for subject in SUBJECTS}
+    catalog = []
+    while len(catalog) < sections:
+        subject = rng.choice(SUBJECTS)
+        number = f"{numbers[subject]}{rng.choice(['', '', '', 'A', 'B', 'L'])}"
+        numbers[subject] += rng.randint(1, 3)
+        title = ' '.join(rng.sample(_TITLE_WORDS, 2))
+        instructor = f"{rng.choice(_SURNAMES)},{rng.choice('ABCDEFGHJKLMNPRSTVW')}." if rng.random() > 0.05 else 'Staff'
+        for section in range(1, min(rng.randint(1, 3), sections - len(catalog)) + 1):
+            capacity = rng.choice([20, 35, 60, 150, 250])
+            catalog.append(Section(0, subject, number, f"{section:02d}", title, instructor, rng.choice(_STATUSES),
+                                   rng.randint(0, capacity), capacity,
+                                   f"{rng.choice(_DAYS)} {rng.choice(_TIMES)}", rng.choice(_ROOMS)))
+    catalog.sort(key=lambda s: (s.subject, _course_number(s.number), s.number, s.section))
+    return [section._replace(class_number=30000 + i) for i, section in enumerate(catalog)]
+
+
+def class_data(term, class_number):
+    """The class_data query value of a detail link: base64 of pisa's PHP-serialized (term, class number)."""
+    term, number = str(term), str(class_number)
+    serialized = (f'a:2:{{s:5:":STRM";s:{len(term)}:"{term}";'
+                  f's:10:":CLASS_NBR";s:{len(number)}:"{number}";}}')
+    return quote(base64.b64encode(serialized.encode()).decode(), safe='')
+
+
+def _parse_class_data(data):
+    """(term, class number) from a class_data value, or (None, None)."""
+    try:
+        values = re.findall(r's:\d+:"([^"]*)"', base64.b64decode(unquote(data)).decode())
+        return values[1], int(values[3])
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None, None
+
+
+def _page(title, body):
+    return (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+            f'</head>\n<body>\n<div class="container">\n{body}\n</div>\n</body>\n</html>\n')
+
+
+def render_search_form(term=DEFAULT_TERM):
+    """The class search page with its term, status and subject selects."""
+    terms = ''.join(f'<option value="{value}"{" selected" if value == term else ""}>{text}</option>'
+                    for value, text in TERMS)
+    subjects = ''.join(f'<option value="{subject}">{subject}</option>' for subject in SUBJECTS)
+    return _page('Class Search', f'''<h1>Class Search</h1>
+<form name="searchForm" id="searchForm" action="index.php" method="post">
+<input type="hidden" name="action" value="results">
+<label for="term_dropdown">Term</label>
+<select name="binds[:term]" id="term_dropdown" class="form-control">{terms}</select>
+<label for="reg_status">Status</label>
+<select name="binds[:reg_status]" id="reg_status" class="form-control">
+<option value="O" selected>Open Classes</option><option value="all">All Classes</option></select>
+<label for="subject">Subject</label>
+<select name="binds[:subject]" id="subject" class="form-control"><option value="">All Subjects</option>{subjects}</select>
+<input type="hidden" name="binds[:catalog_nbr_op]" value="=">
+<input type="hidden" name="binds[:catalog_nbr]" value="">
+<input type="submit" value="Search" class="btn btn-lg btn-primary">
+</form>''')
+
+
+def _panel(index, section, term):
+    link = f"index.php?action=detail&amp;class_data={class_data(term, section.class_number)}"
+    status = html.escape(section.status)
+    return f'''<div class="panel panel-default row" id="rowpanel_{index}">
+  <div class="panel-heading panel-heading-custom">
+    <h2 style="margin:0px;">
+      <span class="sr-only">{status}</span><img src="images/{status.lower().replace(' ', '')}.png" alt="{status}" class="hide-print">
+      <a id="class_id_{section.class_number}" href="{link}" target="_blank">{section.subject} {section.number} - {section.section}&nbsp;&nbsp;&nbsp;{html.escape(section.title)}</a>
+    </h2>
+  </div>
+  <div class="panel-body">
+    <div class="row">
+      <div class="col-xs-6 col-sm-3"><i class="fa fa-hashtag" aria-hidden="true"></i><span class="sr-only">Class Number:</span><a id="class_nbr_{section.class_number}" href="{link}">{section.class_number}</a></div>
+      <div class="col-xs-6 col-sm-3"><i class="fa fa-user" aria-hidden="true"></i><span class="sr-only">Instructor:</span> {html.escape(section.instructor)}</div>
+      <div class="col-xs-6 col-sm-6"><i class="fa fa-location-arrow" aria-hidden="true"></i><span class="sr-only">Location:</span> LEC: {html.escape(section.room)}</div>
+      <div class="col-xs-6 col-sm-3"><i class="fa fa-clock-o" aria-hidden="true"></i><span class="sr-only">Day and Time:</span> {section.days_times}</div>
+      <div class="col-xs-6 col-sm-3">{section.enrolled} of {section.capacity} Enrolled</div>
+      <div class="col-xs-6 col-sm-3">Instruction Mode: In Person</div>
+    </div>
+  </div>
+</div>
+'''
+
+
+def render_results(sections, term, status, subject, start, page_size=PAGE_SIZE):
+    """One page of search results, with the resultsForm that asks for the next one."""
+    page = sections[start:start + page_size]
+    fields = [('action', 'results'), ('binds[:term]', term), ('binds[:reg_status]', status),
+              ('binds[:subject]', subject), ('binds[:catalog_nbr_op]', '='), ('binds[:catalog_nbr]', ''),
+              ('rec_start', str(start)), ('rec_dur', str(page_size))]
+    hidden = ''.join(f'<input type="hidden" name="{name}" value="{html.escape(value)}">\n' for name, value in fields)
+    if page:
+        shown = f"Showing {start + 1} to {start + len(page)} of {len(sections)} results"
+    else:
+        shown = "No classes found matching your search"
+    if start + page_size < len(sections):
+        shown += ('\n<a href="#" onclick="document.resultsForm.action.value=\'next\';'
+                  'document.resultsForm.submit();return false;">next</a>')
+    panels = ''.join(_panel(i, section, term) for i, section in enumerate(page))
+    return _page('Class Search', f'''<h1>Class Search Results</h1>
+<form name="resultsForm" id="resultsForm" action="index.php" method="post">
+{hidden}<div class="row hide-print">
+<div class="col-xs-12">{shown}
+</div>
+</div>
+<div class="center-block">
+{panels}</div>
+</form>''')
+
+
+def render_detail(section, term):
+    """A section's detail page: class details, description, requirements and meetings."""
+    term_text = dict(TERMS).get(term, term)
+    seats = max(0, section.capacity - section.enrolled)
+    requirements = ''
+    if _course_number(section.number) >= 100:
+        requirements = f'''
+<div class="panel panel-default row"><div class="panel-heading panel-heading-custom"><h2>Enrollment Requirements</h2></div>
+<div class="panel-body">Prerequisite(s): {section.subject} 1 or equivalent.</div></div>'''
+    return _page(f'{section.subject} {section.number} - {section.section}', f'''<div class="panel panel-default">
+<div class="panel-heading panel-heading-custom"><h2>{section.subject} {section.number} - {section.section}&nbsp;&nbsp;&nbsp;{html.escape(section.title)}</h2>
+<p>{term_text}</p></div>
+<div class="panel-body"><div class="panel-group">
+<div class="panel panel-default row"><div class="panel-heading panel-heading-custom"><h2>Class Details</h2></div>
+<div class="panel-body"><div class="col-xs-12 col-sm-6"><dl class="dl-horizontal">
+<dt>Career</dt><dd>Undergraduate</dd><dt>Grading</dt><dd>Letter Grade</dd>
+<dt>Class Number</dt><dd>{section.class_number}</dd><dt>Type</dt><dd>Lecture</dd><dt>Credits</dt><dd>5 units</dd>
+<dt>General Education</dt><dd></dd></dl></div>
+<div class="col-xs-12 col-sm-6"><dl class="dl-horizontal">
+<dt>Status</dt><dd>{section.status}</dd><dt>Available Seats</dt><dd>{seats}</dd>
+<dt>Enrollment Capacity</dt><dd>{section.capacity}</dd><dt>Enrolled</dt><dd>{section.enrolled}</dd>
+<dt>Wait List Capacity</dt><dd>{section.capacity // 5}</dd><dt>Wait List Total</dt><dd>0</dd></dl></div></div></div>
+<div class="panel panel-default row"><div class="panel-heading panel-heading-custom"><h2>Description</h2></div>
+<div class="panel-body">{html.escape(section.title)}: a synthetic course generated by mock_pisa.py.</div></div>{requirements}
+<div class="panel panel-default row"><div class="panel-heading panel-heading-custom"><h2>Meeting Information</h2></div>
+<div class="panel-body"><table class="table table-hover table-striped">
+<tr><th>Days &amp; Times</th><th>Room</th><th>Instructor</th><th>Meeting Dates</th></tr>
+<tr><td>{section.days_times}</td><td>{html.escape(section.room)}</td><td>{html.escape(section.instructor)}</td><td>01/05/26 - 03/13/26</td></tr>
+</table></div></div>
+</div></div></div>''')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockPisa/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.mock.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body='', content_type='text/html; charset=utf-8', headers=()):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == STATS_PATH:
+            self._send(200, json.dumps(self.server.mock.stats()), 'application/json')
+            return
+        self.server.mock.handle(self, url, parse_qs(url.query, keep_blank_values=True))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'), keep_blank_values=True)
+        self.server.mock.handle(self, urlsplit(self.path), form)
+
+
+class MockPisaServer:
+    """
+    A local stand-in for pisa's class search, served from a thread.
+
+    Every request first waits out the injected latency, then fails with a
+    503 when it loses the error_rate draw or when more than `capacity`
+    requests are already being served, the way an overloaded registrar
+    site does.
+
+    Args:
+        catalog: Sections to serve (default: synthetic_catalog())
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+        latency: Seconds every response is delayed by
+        jitter: Up to this many extra seconds, drawn per request
+        error_rate: Fraction of requests answered with a 503
+        capacity: Requests served at once before the rest get a 503
+            (None: no limit)
+        retry_after: Retry-After seconds sent with every 503 (None: no header)
+        churn: Chance that a detail request finds the section's enrollment
+            changed since the last one, for trying out watch mode
+        page_size: Results per page
+        verbose: Log every request
+    """
+
+    def __init__(self, catalog=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 capacity=None, retry_after=None, churn=0.0, page_size=PAGE_SIZE, verbose=False):
+        self.catalog = catalog if catalog is not None else synthetic_catalog()
+        self.by_number = {section.class_number: section for section in self.catalog}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.churn = churn
+        self.page_size = page_size
+        self.verbose = verbose
+        self._results = {}
+        self._counts = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """The search page URL, to use in place of scrape_ucsc.SEARCH_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def _count(self, name):
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def stats(self):
+        """Requests served by kind, plus the 503s injected."""
+        with self._lock:
+            return dict(sorted(self._counts.items()))
+
+    def results_for(self, status, subject):
+        """Sections matching a search, built once per (status, subject)."""
+        key = (status, subject)
+        with self._lock:
+            sections = self._results.get(key)
+            if sections is None:
+                sections = [section for section in self.catalog
+                            if (status == 'all' or section.status == 'Open')
+                            and (not subject or section.subject == subject)]
+                self._results[key] = sections
+        return sections
+
+    def _churn(self, section):
+        """Add or drop a few students, updating the section's status to match."""
+        enrolled = min(section.capacity, max(0, section.enrolled + random.choice([-3, -2, -1, 1, 2, 3])))
+        status = 'Open' if enrolled < section.capacity else random.choice(['Closed', 'Wait List'])
+        section = section._replace(enrolled=enrolled, status=status)
+        self.by_number[section.class_number] = section
+        return section
+
+    def handle(self, request, url, form):
+        """Answer one request to the search page."""
+        if url.path != SEARCH_PATH:
+            request._send(404, 'Not Found', 'text/plain')
+            return
+        with self._lock:
+            self._count('requests')
+            overloaded = self.capacity is not None and self._active >= self.capacity
+            self._active += 1
+        try:
+            delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay > 0:
+                time.sleep(delay)
+            if overloaded or (self.error_rate and random.random() < self.error_rate):
+                with self._lock:
+                    self._count('overloaded' if overloaded else 'errors')
+                headers = [('Retry-After', str(self.retry_after))] if self.retry_after is not None else []
+                request._send(503, 'Service Unavailable', 'text/plain', headers)
+                return
+            self._respond(request, form)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _respond(self, request, form):
+        def field(name, default=''):
+            return form.get(name, [default])[0]
+
+        action = field('action')
+        term = field('binds[:term]', DEFAULT_TERM) or DEFAULT_TERM
+        if action == 'detail':
+            detail_term, number = _parse_class_data(field('class_data'))
+            section = self.by_number.get(number)
+            if section is None:
+                request._send(404, 'No such class', 'text/plain')
+                return
+            with self._lock:
+                self._count('detail')
+                if self.churn and random.random() < self.churn:
+                    section = self._churn(section)
+            request._send(200, render_detail(section, detail_term))
+        elif action in ('results', 'next') and request.command == 'POST':
+            sections = self.results_for(field('binds[:reg_status]', 'O'), field('binds[:subject]'))
+            start = 0
+            if action == 'next':
+                start = int(field('rec_start', '0') or 0) + self.page_size
+            with self._lock:
+                self._count('results')
+            request._send(200, render_results(sections, term, field('binds[:reg_status]', 'O'),
+                                              field('binds[:subject]'), start, self.page_size))
+        else:
+            with self._lock:
+                self._count('search_form')
+            request._send(200, render_search_form())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve a synthetic pisa class search for load testing the scraper')
+    parser.add_argument('--sections', type=int, default=CATALOG_SIZE,
+                        help=f'Sections in the catalog (default: {CATALOG_SIZE}, about one real term)')
+    parser.add_argument('--seed', type=int, default=0, help='Catalog random seed (default: 0)')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on, 0 for any free one (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Up to this many more seconds, random per request (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with a 503 (default: 0)')
+    parser.add_argument('--capacity', type=int,
+                        help='Requests served at once before the rest get a 503 (default: no limit)')
+    parser.add_argument('--retry-after', type=int, help='Send this Retry-After with every 503')
+    parser.add_argument('--churn', type=float, default=0.0,
+                        help='Chance a detail request finds the enrollment changed, for watch mode (default: 0)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help=f'Results per page (default: {PAGE_SIZE})')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+    try:
+        server = MockPisaServer(synthetic_catalog(args.sections, args.seed), host=args.host, port=args.port,
+                                latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                capacity=args.capacity, retry_after=args.retry_after, churn=args.churn,
+                                page_size=max(1, args.page_size), verbose=args.verbose)
+    except OSError as e:
+        print(f"❌ Could not listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"🧪 Mock pisa serving {len(server.catalog)} sections at {server.url}", flush=True)
+    print(f"   Scrape it with: PISA_SEARCH_URL={server.url} python3 scripts/scrape_ucsc.py --engine http",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 Served {server.stats()}")
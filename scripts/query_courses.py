@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - Catalog Query
+Looks courses up in a SQLite catalog written by scrape_ucsc.py
+(--format sqlite), matching as-you-type prefixes of course names and titles.
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+
+from scrape_ucsc import SQLITE_COLUMNS, course_from_row
+
+
+def match_query(text):
+    """Turn free text into an FTS5 query that prefix-matches every word, e.g. "cse 10" -> "cse"* "10"*."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_courses(db, text=None, subject=None, professor=None, quarter=None, limit=20):
+    """
+    Find courses in a catalog.
+
+    Args:
+        db: Open sqlite3 connection to the catalog
+        text: Words to prefix-match against course names and titles; results
+            are ranked by relevance when given
+        subject: Exact subject code, e.g. "CSE"
+        professor: Professor name prefix, e.g. "Ioannidis"
+        quarter: Exact quarter, e.g. "2026 Winter"
+        limit: Maximum number of courses returned
+
+    Returns:
+        List of course records
+    """
+    columns = ', '.join(f'c.{column}' for column in SQLITE_COLUMNS)
+    conditions = []
+    params = []
+    if text and match_query(text):
+        sql = f"SELECT {columns} FROM courses_fts JOIN courses c ON c.id = courses_fts.rowid"
+        conditions.append("courses_fts MATCH ?")
+        params.append(match_query(text))
+        order = "bm25(courses_fts), c.name"
+    else:
+        sql = f"SELECT {columns} FROM courses c"
+        order = "c.name"
+    if subject:
+        conditions.append("c.subject = ?")
+        params.append(subject)
+    if professor:
+        # professor is COLLATE NOCASE, so this prefix LIKE can use its index
+        conditions.append("c.professor LIKE ? ESCAPE '\\'")
+        params.append(re.sub(r'([\\%_])', r'\\\1', professor) + '%')
+    if quarter:
+        conditions.append("c.quarter = ?")
+        params.append(quarter)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+    return [course_from_row(row) for row in db.execute(sql, params)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Search a SQLite course catalog written by scrape_ucsc.py')
+    parser.add_argument('catalog', help='Catalog file, e.g. ucsc_courses.sqlite')
+    parser.add_argument('query', nargs='*', help='Words to match in course names and titles, e.g. cse 10')
+    parser.add_argument('--subject', help='Only this subject code, e.g. CSE')
+    parser.add_argument('--professor', help='Only professors whose name starts with this')
+    parser.add_argument('--quarter', help='Only this quarter, e.g. "2026 Winter"')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results (default: 20)')
+    parser.add_argument('--json', action='store_true', help='Print matches as NDJSON')
+
+    args = parser.parse_args()
+    try:
+        db = sqlite3.connect(f"file:{args.catalog}?mode=ro", uri=True)
+        started = time.perf_counter()
+        courses = search_courses(db, ' '.join(args.query), subject=args.subject, professor=args.professor,
+                                 quarter=args.quarter, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+    except sqlite3.Error as e:
+        print(f"❌ {args.catalog}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        for course in courses:
+            print(json.dumps(course, ensure_ascii=False))
+    else:
+        print(f"🔎 {len(courses)} match(es) in {elapsed:.1f} ms")
+        for course in courses:
+            sections = ', '.join(course['sections'])
+            print(f"   {course['name']} ({course['subject']}) - {course['professor']} - {course['quarter']}"
+                  + (f" [sections {sections}]" if sections else ""))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - Archive Re-extraction
+Re-runs course extraction over the raw results pages saved by
+scrape_ucsc.py --archive, across every CPU core, and writes the corrected
+records to the usual JSON, NDJSON or SQLite outputs without touching pisa.
+"""
+
+import argparse
+import contextlib
+import gzip
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import scrape_ucsc
+from scrape_ucsc import OUTPUT_FORMATS, OfferingIndex, PageArchive, parse_results_page
+
+
+def extract_page(entry):
+    """(courses, error) for one archived page; runs in a worker process."""
+    path, quarter, url = entry
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return parse_results_page(f.read(), quarter, url), None
+    except Exception as e:
+        return [], f"{path}: {e}"
+
+
+def _sink(output_file, output_format):
+    if output_file == '-':
+        if output_format != 'ndjson':
+            raise ValueError("Only ndjson output can be streamed to stdout")
+        return scrape_ucsc._NdjsonSink(output_file, stream=sys.stdout)
+    if output_format == 'ndjson':
+        return scrape_ucsc._NdjsonSink(output_file)
+    if output_format == 'sqlite':
+        return scrape_ucsc._SqliteSink(output_file)
+    return scrape_ucsc._JsonSink(output_file)
+
+
+def reextract_archive(archive_dir, output_file, terms='all', processes=None, output_format=None):
+    """
+    Extract courses again from every archived results page and write them to output_file.
+
+    Pages are parsed in a process pool, a chunk at a time, and their results
+    are taken in archive order, so sections fold into offerings exactly as
+    they did in the original scrapes. Each page's offerings are written as
+    soon as it and every page before it are done, except those of its last
+    course, which wait for the next page.
+
+    Args:
+        archive_dir: Directory a scrape archived pages into (--archive)
+        output_file: Output path, or '-' to stream NDJSON to stdout
+        terms: "all", a comma-separated list of terms, or a "2024 Fall..2026 Winter" range
+        processes: Worker processes (default: one per CPU)
+        output_format: 'json', 'ndjson' or 'sqlite' (default: from the file extension)
+
+    Returns:
+        Dict with the pages, sections and offerings re-extracted, and the
+        pages that failed. Sections are counted in the consolidated
+        offerings, so a term archived both whole and by subject isn't
+        counted twice.
+    """
+    archive = PageArchive(archive_dir)
+    quarters = scrape_ucsc._select_terms(archive.quarters(), terms, source=f'archived in {archive_dir}')
+    pages = list(archive.pages(quarters))
+    if not pages:
+        raise ValueError(f"No archived results pages in {archive_dir}" + (f" for {terms}" if terms != 'all' else ''))
+    processes = processes or os.cpu_count() or 1
+    sink = _sink(output_file, scrape_ucsc._output_format(output_file, output_format))
+    # Progress goes to stderr when the records themselves go to stdout
+    with contextlib.redirect_stdout(sys.stderr) if output_file == '-' else contextlib.nullcontext():
+        return _reextract(pages, len(quarters), processes, sink)
+
+
+def _reextract(pages, term_count, processes, sink):
+    print(f"🗃️  Re-extracting {len(pages)} pages from {term_count} term(s) with {processes} processes...")
+    index = OfferingIndex()
+    sections = 0
+    offerings = 0
+    failed = []
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunksize = max(1, min(32, len(pages) // (processes * 4)))
+            for courses, error in executor.map(extract_page, pages, chunksize=chunksize):
+                if error:
+                    failed.append(error)
+                    print(f"⚠️  Could not re-extract {error}")
+                    continue
+                page_offerings = index.consolidate(courses)
+                offerings += len(page_offerings)
+                sections += sum(len(offering.sections) for offering in page_offerings)
+                sink.write_page(page_offerings)
+        page_offerings = index.flush()
+        offerings += len(page_offerings)
+        sections += sum(len(offering.sections) for offering in page_offerings)
+        sink.write_page(page_offerings)
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+    return {'pages': len(pages), 'sections': sections, 'offerings': offerings, 'failed': failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Re-extract courses from results pages archived with --archive')
+    parser.add_argument('archive', help='Archive directory passed to scrape_ucsc.py --archive')
+    parser.add_argument('output_file', nargs='?', default='ucsc_courses.json',
+                        help='Output file (default: ucsc_courses.json); "-" streams NDJSON to stdout')
+    parser.add_argument('--terms', default='all',
+                        help='Terms to re-extract: "all", "2025 Fall,2025 Spring" or "2024 Fall..2026 Winter" '
+                             '(default: all)')
+    parser.add_argument('--processes', '-p', type=int,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, dest='output_format',
+                        help='Output format (default: from the file extension)')
+
+    args = parser.parse_args()
+    started = time.perf_counter()
+    try:
+        result = reextract_archive(args.archive, args.output_file, terms=args.terms,
+                                   processes=args.processes and max(1, args.processes),
+                                   output_format=args.output_format)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    seconds = time.perf_counter() - started
+    with contextlib.redirect_stdout(sys.stderr) if args.output_file == '-' else contextlib.nullcontext():
+        print(f"✅ Re-extracted {result['offerings']} courses ({result['sections']} sections) from "
+              f"{result['pages']} pages in {seconds:.1f}s ({result['pages'] / seconds:,.0f} pages/s)")
+        if args.output_file != '-':
+            print(f"💾 Saved to {args.output_file}")
+        if result['failed']:
+            print(f"⚠️  {len(result['failed'])} page(s) could not be re-extracted")
+            sys.exit(1)
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+UCSC Course Scraper - Daemon
+Keeps a pool of warm scraping sessions (headless Chrome with images and
+stylesheets blocked, or HTTP sessions) parked on the class search form, and
+runs scrape, refresh and watch jobs sent to a local HTTP endpoint or Unix
+socket, so a job starts on a ready session instead of a browser cold start.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import scrape_ucsc
+from scrape_ucsc import (DEFAULT_TERM, ENGINES, EnrollmentWatcher, FetchController, OfferingIndex, PisaHttpClient,
+                         ScrapeMetrics, SelectorCache)
+
+DEFAULT_PORT = 8766
+
+# Seconds between attempts to start a replacement session, doubling up to
+# the maximum while they keep failing
+REFILL_BACKOFF = 1.0
+MAX_REFILL_BACKOFF = 60.0
+
+
+class PoolUnavailable(RuntimeError):
+    """No warm session came free in time; the job is answered with a 503."""
+
+
+class SessionPool:
+    """
+    A fixed set of warm scraping sessions, each parked on the search form.
+
+    Every session is started and navigated to the form up front. A job
+    borrows one with session(); afterwards the session is sent back to the
+    form in the background before it rejoins the pool, so the next job finds
+    it ready. A session that can't get back to the form is replaced, and a
+    replacement that fails to start is retried with backoff until it works,
+    so the pool doesn't shrink.
+
+    Args:
+        engine: 'selenium' (headless Chrome) or 'http'
+        size: Sessions kept warm
+        verbose: Print detailed debugging information
+        metrics: ScrapeMetrics shared by every session
+        controller: FetchController every session's requests go through
+        wait_timeout: Seconds session() waits for a free session before
+            raising PoolUnavailable
+    """
+
+    def __init__(self, engine='selenium', size=2, verbose=False, metrics=None, controller=None, wait_timeout=60.0):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r} (expected one of {', '.join(ENGINES)})")
+        self.engine = engine
+        self.size = size
+        self.verbose = verbose
+        self.wait_timeout = wait_timeout
+        self.metrics = metrics or ScrapeMetrics()
+        self.controller = controller or FetchController(verbose=verbose, metrics=self.metrics)
+        self.selector_cache = SelectorCache() if engine == 'selenium' else None
+        self._idle = queue.Queue()
+        self._live = []
+        self._refilling = 0
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._parker = ThreadPoolExecutor(max_workers=size, thread_name_prefix='park')
+
+    def start(self):
+        """Start every session and park it on the search form, all at once."""
+        started = time.perf_counter()
+        for session in self._parker.map(lambda _: self._new_session(), range(self.size)):
+            self._idle.put(session)
+        print(f"🔥 {self.size} warm {self.engine} session(s) ready in {time.perf_counter() - started:.1f}s")
+        return self
+
+    def _new_session(self):
+        if self.engine == 'http':
+            session = PisaHttpClient(verbose=self.verbose, metrics=self.metrics, controller=self.controller)
+        else:
+            session = scrape_ucsc._start_driver(self.metrics, block_assets=True)
+        with self._lock:
+            self._live.append(session)
+        try:
+            self._park(session)
+        except BaseException:
+            self._discard(session)
+            raise
+        return session
+
+    def _park(self, session):
+        """Send a session back to the search form."""
+        with self.metrics.phase('park'):
+            if self.engine == 'http':
+                session.open_search_form()
+                return
+            with self.controller.request():
+                session.get(scrape_ucsc.SEARCH_URL)
+            scrape_ucsc.WebDriverWait(session, 20).until(
+                scrape_ucsc.EC.presence_of_element_located((scrape_ucsc.By.NAME, "binds[:term]")))
+
+    def _discard(self, session):
+        with self._lock:
+            if session in self._live:
+                self._live.remove(session)
+        try:
+            if self.engine == 'http':
+                session.session.close()
+            else:
+                session.quit()
+        except Exception:
+            pass
+
+    def _return(self, session):
+        try:
+            self._park(session)
+        except Exception as e:
+            print(f"⚠️  Replacing a {self.engine} session that couldn't get back to the search form: {e}")
+            self._discard(session)
+            session = self._refill()
+            if session is None:
+                return
+        if self._closed.is_set():
+            self._discard(session)
+            return
+        self._idle.put(session)
+
+    def _refill(self):
+        """Start a replacement session, retrying with backoff until one starts or the pool is closed."""
+        delay = REFILL_BACKOFF
+        with self._lock:
+            self._refilling += 1
+        try:
+            while not self._closed.is_set():
+                try:
+                    return self._new_session()
+                except Exception as e:
+                    print(f"❌ Could not start a replacement session, retrying in {delay:g}s: {e}")
+                    self.metrics.count('refill_failures')
+                    self._closed.wait(delay)
+                    delay = min(delay * 2, MAX_REFILL_BACKOFF)
+            return None
+        finally:
+            with self._lock:
+                self._refilling -= 1
+
+    @contextlib.contextmanager
+    def session(self):
+        """Borrow a parked session, waiting up to wait_timeout for one if they're all busy."""
+        try:
+            session = self._idle.get(timeout=self.wait_timeout)
+        except queue.Empty:
+            raise PoolUnavailable(f"No warm session came free within {self.wait_timeout:g}s") from None
+        try:
+            yield session
+        finally:
+            if self._closed.is_set():
+                self._discard(session)
+            else:
+                try:
+                    self._parker.submit(self._return, session)
+                except RuntimeError:
+                    # close() shut the parker down while the job ran
+                    self._discard(session)
+
+    def pages(self, session, term, subject=None):
+        """Results pages for one search, configured on a parked session's form."""
+        if self.engine == 'http':
+            return scrape_ucsc._iter_http_pages(verbose=self.verbose, term=term, subject=subject, client=session,
+                                                navigate=False)
+        return scrape_ucsc._iter_selenium_pages(verbose=self.verbose, term=term, subject=subject, driver=session,
+                                                metrics=self.metrics, controller=self.controller,
+                                                selector_cache=self.selector_cache, navigate=False)
+
+    def stats(self):
+        with self._lock:
+            live = len(self._live)
+            refilling = self._refilling
+        return {'engine': self.engine, 'sessions': live, 'idle': self._idle.qsize(), 'refilling': refilling}
+
+    def close(self):
+        self._closed.set()
+        self._parker.shutdown(wait=True)
+        with self._lock:
+            sessions = list(self._live)
+        for session in sessions:
+            self._discard(session)
+
+
+class ScrapeDaemon:
+    """
+    Runs scrape, refresh and watch jobs on a SessionPool.
+
+    Scraped courses are kept in memory by term and subject, so refresh()
+    can re-scrape just the subjects a user asks about and courses() can
+    answer from what's already known. Watch jobs keep one EnrollmentWatcher
+    per watchlist, so each job reports the changes since the last one. Each
+    watcher holds its own session and thread pool, so watchlists not polled
+    for watch_ttl seconds, and the least recently polled ones beyond
+    max_watchlists, are closed and forgotten.
+
+    Args:
+        pool: SessionPool the searches run on
+        term: Term used when a job doesn't name one
+        verbose: Print detailed debugging information
+        max_watchlists: Most watchers kept at once
+        watch_ttl: Seconds a watchlist is kept after its last poll
+    """
+
+    def __init__(self, pool, term=DEFAULT_TERM, verbose=False, max_watchlists=32, watch_ttl=3600.0):
+        self.pool = pool
+        self.term = term
+        self.verbose = verbose
+        self.max_watchlists = max_watchlists
+        self.watch_ttl = watch_ttl
+        self.catalog = {}
+        # (term, classes, seat_changes) -> (watcher, lock, last polled), least recently polled first
+        self.watchers = OrderedDict()
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def _count(self, job):
+        with self._lock:
+            self.jobs[job] = self.jobs.get(job, 0) + 1
+
+    def _search(self, term, subject=None):
+        """Section records from one search (a subject, or the whole term) on a warm session."""
+        sections = []
+        with self.pool.session() as session:
+            for page in self.pool.pages(session, term, subject):
+                sections.extend(page.courses)
+        return sections
+
+    def _scrape(self, term, subjects):
+        """
+        Offerings for a term, or for some of its subjects searched in parallel
+        on separate sessions; they replace what's known for those subjects.
+        """
+        if subjects:
+            with ThreadPoolExecutor(max_workers=min(len(subjects), self.pool.size)) as executor:
+                found = list(executor.map(lambda subject: self._search(term, subject), subjects))
+        else:
+            found = [self._search(term)]
+        index = OfferingIndex()
+        courses = []
+        for sections in found:
+            courses.extend(offering.to_dict() for offering in index.consolidate(sections))
+        courses.extend(offering.to_dict() for offering in index.flush())
+
+        by_subject = {subject: [] for subject in subjects}
+        for course in courses:
+            by_subject.setdefault(course['subject'], []).append(course)
+        with self._lock:
+            known = self.catalog.setdefault(term, {})
+            if not subjects:
+                known.clear()
+            known.update(by_subject)
+        return courses
+
+    def scrape(self, term=None, subjects=None):
+        """
+        Scrape a term, or only some of its subjects.
+
+        Args:
+            term: Term to scrape (default: the daemon's term)
+            subjects: Subject codes to scrape, one search each (default:
+                the whole term in one search)
+
+        Returns:
+            The offerings found, as JSON-ready dicts
+        """
+        courses = self._scrape(term or self.term, [subject.upper() for subject in subjects or ()])
+        self._count('scrape')
+        return courses
+
+    def refresh(self, subjects, term=None):
+        """
+        Re-scrape some subjects and report what changed since they were last scraped.
+
+        Returns:
+            (courses, added, removed): the subjects' offerings now, and the
+            names of offerings that appeared or disappeared
+        """
+        if not subjects:
+            raise ValueError("refresh needs at least one subject")
+        term = term or self.term
+        subjects = [subject.upper() for subject in subjects]
+        with self._lock:
+            known = self.catalog.get(term, {})
+            before = {course['name'] for subject in subjects for course in known.get(subject, ())}
+        courses = self._scrape(term, subjects)
+        self._count('refresh')
+        after = {course['name'] for course in courses}
+        return courses, sorted(after - before), sorted(before - after)
+
+    def courses(self, term=None, subject=None):
+        """Offerings already scraped for a term, optionally one subject's."""
+        with self._lock:
+            known = self.catalog.get(term or self.term, {})
+            if subject:
+                return list(known.get(subject.upper(), ()))
+            return [course for subject_courses in known.values() for course in subject_courses]
+
+    def watch(self, classes, term=None, seat_changes=False):
+        """
+        Poll a watchlist once.
+
+        The first job for a watchlist resolves it and reports each class's
+        current state as 'watching' events; later ones report only changes.
+
+        Args:
+            classes: Class numbers and/or sections, e.g. ["30700", "CSE 101-01"]
+            term: Term the classes are in (default: the daemon's term)
+            seat_changes: Also report seat count changes
+
+        Returns:
+            The change events since the last poll
+        """
+        term = term or self.term
+        key = (term, tuple(classes), bool(seat_changes))
+        with self._lock:
+            if key in self.watchers:
+                watcher, lock, _ = self.watchers.pop(key)
+            else:
+                watcher = EnrollmentWatcher(classes, term, seat_changes=seat_changes, verbose=self.verbose,
+                                            metrics=self.pool.metrics, controller=self.pool.controller)
+                lock = threading.Lock()
+            self.watchers[key] = (watcher, lock, time.monotonic())
+            evicted = self._evict_watchers()
+        self._close_watchers(evicted)
+        with lock:
+            if not watcher.urls:
+                try:
+                    watcher.resolve()
+                except Exception:
+                    with self._lock:
+                        if self.watchers.get(key, (None,))[0] is watcher:
+                            del self.watchers[key]
+                    watcher.close()
+                    raise
+            events = watcher.poll()
+        self._count('watch')
+        return events
+
+    def _evict_watchers(self):
+        """Drop idle and least recently polled watchers over the limit; call with _lock held."""
+        evicted = []
+        idle_since = time.monotonic() - self.watch_ttl
+        while self.watchers:
+            key, (watcher, lock, polled) = next(iter(self.watchers.items()))
+            if polled >= idle_since and len(self.watchers) <= self.max_watchlists:
+                break
+            del self.watchers[key]
+            evicted.append((watcher, lock))
+        return evicted
+
+    @staticmethod
+    def _close_watchers(watchers):
+        for watcher, lock in watchers:
+            # Waits out a poll still running on the watcher
+            with lock:
+                watcher.close()
+
+    def status(self):
+        with self._lock:
+            return {
+                'term': self.term,
+                'pool': self.pool.stats(),
+                'jobs': dict(self.jobs),
+                'catalog': {term: sum(map(len, subjects.values())) for term, subjects in self.catalog.items()},
+                'watchlists': len(self.watchers),
+                'counters': dict(sorted(self.pool.metrics.counters.items())),
+            }
+
+    def close(self):
+        with self._lock:
+            watchers = [(watcher, lock) for watcher, lock, _ in self.watchers.values()]
+            self.watchers.clear()
+        self._close_watchers(watchers)
+        self.pool.close()
+
+
+def _entries(value):
+    """A job's list field, from a JSON list or a comma-separated string."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(entry).strip() for entry in value if str(entry).strip()]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'StudiaScrapeDaemon/1.0'
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.daemon.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, data, headers=()):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        daemon = self.server.daemon
+        if url.path == '/status':
+            self._send(200, daemon.status())
+        elif url.path == '/courses':
+            courses = daemon.courses(query.get('term'), query.get('subject'))
+            self._send(200, {'term': query.get('term') or daemon.term, 'courses': courses})
+        else:
+            self._send(404, {'error': f"No such endpoint {url.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            job = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(job, dict):
+                raise ValueError("a job is a JSON object")
+        except ValueError as e:
+            self._send(400, {'error': f"Invalid job: {e}"})
+            return
+        daemon = self.server.daemon
+        kind = urlsplit(self.path).path.strip('/')
+        term = job.get('term') or daemon.term
+        started = time.perf_counter()
+        try:
+            if kind == 'scrape':
+                result = {'courses': daemon.scrape(term, _entries(job.get('subjects')))}
+            elif kind == 'refresh':
+                courses, added, removed = daemon.refresh(_entries(job.get('subjects') or job.get('subject')), term)
+                result = {'courses': courses, 'added': added, 'removed': removed}
+            elif kind == 'watch':
+                result = {'events': daemon.watch(_entries(job.get('classes')), term, job.get('seat_changes', False))}
+            else:
+                self._send(404, {'error': f"No such job {kind!r} (expected scrape, refresh or watch)"})
+                return
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        except PoolUnavailable as e:
+            print(f"⚠️  {kind} job turned away: {e}")
+            self._send(503, {'error': str(e)}, headers=[('Retry-After', '5')])
+            return
+        except Exception as e:
+            print(f"❌ {kind} job failed: {e}")
+            self._send(500, {'error': str(e)})
+            return
+        seconds = time.perf_counter() - started
+        print(f"✅ {kind} job for {term} done in {seconds:.2f}s")
+        self._send(200, {'job': kind, 'term': term, 'seconds': round(seconds, 3), **result})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(daemon, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None):
+    """
+    Answer jobs for daemon until interrupted.
+
+    Args:
+        daemon: ScrapeDaemon to run the jobs on
+        host, port: Local HTTP endpoint to listen on
+        socket_path: Listen on this Unix socket instead
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+        where = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+        where = f"http://{host}:{server.server_address[1]}"
+    server.daemon = daemon
+    print(f"🛰️  Scrape daemon listening on {where}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Keep warm scraping sessions and run scrape jobs sent to them')
+    parser.add_argument('--engine', choices=ENGINES, default='selenium',
+                        help='selenium keeps headless Chrome sessions, http keeps HTTP sessions (default: selenium)')
+    parser.add_argument('--sessions', type=int, default=2, help='Warm sessions kept in the pool (default: 2)')
+    parser.add_argument('--wait-timeout', type=float, default=60.0,
+                        help='Seconds a job waits for a free session before it gets a 503 (default: 60)')
+    parser.add_argument('--term', default=DEFAULT_TERM, help=f'Term used when a job names none (default: {DEFAULT_TERM})')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on, 0 for any free one (default: {DEFAULT_PORT})')
+    parser.add_argument('--socket', metavar='PATH', help='Listen on a Unix socket instead of a port')
+    parser.add_argument('--max-concurrency', type=int, metavar='N',
+                        help='Most requests in flight to pisa at once (default: found adaptively)')
+    parser.add_argument('--retries', type=int, default=3, help='Times a failed request is retried (default: 3)')
+    parser.add_argument('--max-watchlists', type=int, default=32,
+                        help='Watchlists kept between watch jobs; the least recently polled go first (default: 32)')
+    parser.add_argument('--watch-ttl', type=float, default=3600.0,
+                        help='Seconds a watchlist is kept after its last watch job (default: 3600)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Print detailed debugging information')
+
+    args = parser.parse_args()
+    metrics = ScrapeMetrics()
+    controller = FetchController(max_concurrency=args.max_concurrency, retries=max(0, args.retries),
+                                 verbose=args.verbose, metrics=metrics)
+    pool = SessionPool(args.engine, max(1, args.sessions), verbose=args.verbose, metrics=metrics,
+                       controller=controller, wait_timeout=max(0.0, args.wait_timeout))
+    daemon = ScrapeDaemon(pool, term=args.term, verbose=args.verbose, max_watchlists=max(1, args.max_watchlists),
+                          watch_ttl=max(0.0, args.watch_ttl))
+    try:
+        pool.start()
+        serve(daemon, host=args.host, port=args.port, socket_path=args.socket)
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        daemon.close()
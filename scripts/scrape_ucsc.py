@@ -5,27 +5,2580 @@ Scrapes courses from https://pisa.ucsc.edu/class_search/index.php
 and saves them to a JSON file.
 """
 
+import base64
+import contextlib
+import gzip
+import hashlib
 import json
 import time
 import sys
 import re
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from html import unescape
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin, urlsplit
 
-def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screenshot_on_error=False):
+# Selenium is only needed for the browser engine and requests only for the
+# HTTP engine, so either one can be missing as long as it isn't used.
+try:
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait, Select
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+except ImportError:
+    webdriver = None
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+# PISA_SEARCH_URL points the scraper at another server, e.g. mock_pisa.py
+SEARCH_URL = os.environ.get('PISA_SEARCH_URL', 'https://pisa.ucsc.edu/class_search/index.php')
+DEFAULT_TERM = "2026 Winter"
+ENGINES = ('selenium', 'http')
+
+# Safety limit on results pages per search. A real term is about 60 pages
+# of 50, so this leaves room for catalogs many times that size.
+MAX_PAGES = 2000
+
+# Values tried, in order, when switching the status filter to "All Classes"
+STATUS_VALUES = ['all', 'All Classes', 'ALL', '1', '0']
+
+# Tags that start a new line in rendered text (approximates WebElement.text)
+_BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'option',
+    'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'ul',
+])
+_VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+])
+_SKIP_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+
+
+class _Node:
+    """A minimal HTML element: tag, attributes and children (nodes or strings)."""
+
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+
+    def get(self, name, default=None):
+        value = self.attrs.get(name)
+        return default if value is None else value
+
+    def has_class(self, *names):
+        classes = self.get('class', '').split()
+        return all(name in classes for name in names)
+
+    def iter(self, tag=None):
+        """Yield descendant elements in document order."""
+        stack = [child for child in reversed(self.children) if isinstance(child, _Node)]
+        while stack:
+            node = stack.pop()
+            if tag is None or node.tag == tag:
+                yield node
+            stack.extend(child for child in reversed(node.children) if isinstance(child, _Node))
+
+    def find(self, tag=None, predicate=None):
+        for node in self.iter(tag):
+            if predicate is None or predicate(node):
+                return node
+        return None
+
+    def find_all(self, tag=None, predicate=None):
+        return [node for node in self.iter(tag) if predicate is None or predicate(node)]
+
+    def own_text(self):
+        return ''.join(child for child in self.children if isinstance(child, str))
+
+    @property
+    def text(self):
+        """Rendered text, roughly the way Selenium's WebElement.text reports it."""
+        parts = []
+        self._collect_text(parts)
+        lines = (line.strip() for line in ''.join(parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+    def _collect_text(self, parts):
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(re.sub(r'[ \t\r\n\f]+', ' ', child).replace('\xa0', ' '))
+            elif child.tag in _SKIP_TEXT_TAGS:
+                continue
+            elif child.tag == 'br':
+                parts.append('\n')
+            elif child.tag in _BLOCK_TAGS:
+                parts.append('\n')
+                child._collect_text(parts)
+                parts.append('\n')
+            else:
+                child._collect_text(parts)
+
+
+class _TreeBuilder(HTMLParser):
+    """Builds a _Node tree, tolerating the unclosed tags real pages contain."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node('#document')
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, {name: value for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(node)
+        if tag not in _VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        node = _Node(tag, {name: value for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(node)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+def parse_html(html):
+    """Parse an HTML document into a _Node tree."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _extract_quarter(text):
+    """Pull "YYYY Season" out of a term label like "2026 Winter Quarter"."""
+    match = re.search(r'(\d{4})\s+(Winter|Spring|Summer|Fall)', text)
+    if match:
+        return f"{match.group(1)} {match.group(2)}"
+    return None
+
+
+def _find_term_index(term_texts, term=DEFAULT_TERM):
+    """Return the index of the term option matching e.g. "2026 Winter", or None."""
+    words = term.split()
+    for idx, text in enumerate(term_texts):
+        if all(word in text for word in words):
+            return idx
+    return None
+
+
+def _term_options(document):
+    """Return [(value, text, selected)] for the binds[:term] select in a parsed page."""
+    select = document.find('select', lambda s: s.get('name') == 'binds[:term]')
+    if select is None:
+        return []
+    return [(o.get('value', o.text), o.text, 'selected' in o.attrs) for o in select.find_all('option')]
+
+
+def _subject_codes(document):
+    """Return the subject codes (e.g. "AM", "CSE") listed in the binds[:subject] select."""
+    select = document.find('select', lambda s: s.get('name') == 'binds[:subject]')
+    if select is None:
+        return []
+    codes = []
+    for option in select.find_all('option'):
+        value = option.get('value', option.text).strip()
+        if re.match(r'^[A-Z]{2,4}$', value) and value not in codes:
+            codes.append(value)
+    return codes
+
+
+def _parse_course_name(course_name_full):
+    """
+    Split a panel heading into (subject, course_num, section, title).
+
+    Returns None if the heading doesn't look like a course name.
+    """
+    # Parse course name: format is "AM 10 - 01    Lin Algebra for Engrs"
+    # Or "AM 10 - 01&nbsp;&nbsp;&nbsp;Lin Algebra for Engrs"
+    # Pattern: SUBJECT NUMBER - SECTION    TITLE
+    course_name_clean = re.sub(r'\s+', ' ', course_name_full)  # Normalize whitespace
+    course_match = re.match(r'^([A-Z]{2,4})\s+(\d+[A-Z]?)\s*-\s*(\d+)\s+(.+)$', course_name_clean)
+    if not course_match:
+        # Try without section: "AM 10 Lin Algebra for Engrs"
+        course_match = re.match(r'^([A-Z]{2,4})\s+(\d+[A-Z]?)\s+(.+)$', course_name_clean)
+    
+    if course_match:
+        subject = course_match.group(1)
+        course_num = course_match.group(2)
+        if len(course_match.groups()) == 4:
+            section = course_match.group(3)
+            title = course_match.group(4)
+        else:
+            section = "01"
+            title = course_match.group(3)
+        return subject, course_num, section, title
+    
+    # Fallback: try to extract at least subject and number
+    fallback_match = re.match(r'^([A-Z]{2,4})\s+(\d+[A-Z]?)', course_name_clean)
+    if fallback_match:
+        subject = fallback_match.group(1)
+        course_num = fallback_match.group(2)
+        title = course_name_clean.replace(f"{subject} {course_num}", "").strip()
+        if title.startswith('-'):
+            title = title[1:].strip()
+        return subject, course_num, "01", title
+    return None
+
+
+def _instructor_from_text(full_text):
+    """
+    Extract an instructor name from the text of a `fa-user` div.
+
+    Returns None if the div is not the instructor div or holds no usable name.
+    """
+    full_text = full_text.strip()
+    
+    # Skip if this div contains "Class Number:" - we want the instructor div, not the class number div
+    if 'Class Number:' in full_text:
+        return None
+    
+    # The div structure is: <i class="fa fa-user"></i><i class="sr-only">Instructor:</i> Name
+    # Remove "Instructor:" label if present (from sr-only element)
+    instructor_text = re.sub(r'^Instructor:?\s*', '', full_text, flags=re.IGNORECASE)
+    instructor_text = instructor_text.strip()
+    
+    # If there are still newlines or unwanted text, extract just the name part
+    if '\n' in instructor_text:
+        # Split by newline and find the line that looks like a name
+        lines = instructor_text.split('\n')
+        for line in lines:
+            line = line.strip()
+            # Skip empty lines and lines with labels
+            if not line or 'Instructor:' in line.lower() or 'Class Number' in line:
+                continue
+            # Check if this looks like a name (starts with capital letter, reasonable length)
+            if re.match(r'^[A-Z][a-z]+', line) and len(line) > 2 and len(line) < 100:
+                instructor_text = line
+                break
+    
+    # Clean up: remove extra whitespace
+    instructor_text = re.sub(r'\s+', ' ', instructor_text).strip()
+    
+    # Validate it looks like a name
+    if instructor_text and instructor_text.lower() != 'tba':
+        # Should start with capital letter and be reasonable length
+        if re.match(r'^[A-Z]', instructor_text) and len(instructor_text) > 2 and len(instructor_text) < 100:
+            return instructor_text
+    return None
+
+
+def _is_course_panel(node):
+    return (node.has_class('panel', 'panel-default', 'row')
+            and node.get('id', '').startswith('rowpanel_'))
+
+
+def _has_fa_user_icon(node):
+    return node.find('i', lambda i: 'fa-user' in i.get('class', '')) is not None
+
+
+# One parsed page of results, plus the search state needed to resume after it:
+# the status filter value and the page's resultsForm fields as (name, value) pairs
+ResultsPage = namedtuple('ResultsPage', ['number', 'courses', 'quarter', 'status', 'form_state'])
+
+
+class IncompleteScrape(RuntimeError):
+    """
+    A scrape that lost part of its results: subject shards that failed, or
+    results pages that couldn't be loaded. failed lists what's missing.
+    """
+
+    def __init__(self, message, failed=()):
+        super().__init__(message)
+        self.failed = list(failed)
+
+
+def parse_results_page(html, selected_quarter, page_url=SEARCH_URL, verbose=False):
+    """
+    Extract course dicts from one page of class search results.
+
+    This is a pure function over the page HTML (driver.page_source or an
+    HTTP response body): every panel is found in a single parse, so any
+    fetch engine can reuse it.
+
+    Args:
+        html: Results page HTML
+        selected_quarter: Quarter string stored on each record, e.g. "2026 Winter"
+        page_url: URL the page was fetched from, used to resolve course links
+        verbose: Print detailed debugging information
+
+    Returns:
+        List of section dicts with name, subject, professor, quarter,
+        course_link and section, one per panel (see OfferingIndex for dedup)
+    """
+    return _courses_from_document(parse_html(html), selected_quarter, page_url, verbose)
+
+
+def _extract_heading(panel, page_url=SEARCH_URL):
+    """Return (course_name_full, course_link) from a panel's "div.panel-heading h2 a"."""
+    course_name_full = ""
+    course_link = None
+    h2_link = None
+    for heading in panel.iter('div'):
+        if not heading.has_class('panel-heading'):
+            continue
+        for h2 in heading.iter('h2'):
+            h2_link = h2.find('a')
+            if h2_link is not None:
+                break
+        if h2_link is not None:
+            break
+    if h2_link is not None:
+        course_name_full = h2_link.text.strip()
+        href = h2_link.get('href')
+        if href:
+            # WebDriver reports the resolved href, so resolve it the same way
+            course_link = urljoin(page_url, href)
+    else:
+        heading = panel.find('div', lambda d: d.has_class('panel-heading'))
+        h2 = heading.find('h2') if heading is not None else None
+        if h2 is not None:
+            course_name_full = h2.text.strip()
+            # Remove status icon text if present
+            course_name_full = re.sub(r'^(Open|Closed|Closed with Wait List)\s+', '', course_name_full)
+    return course_name_full, course_link
+
+
+def _extract_professor(panel):
+    """
+    Find the instructor in a panel, or "TBA".
+
+    The instructor div is "col-xs-6 col-sm-3" with a fa-user icon, falling
+    back to any div containing the icon.
+    """
+    instructor_divs = panel.find_all(
+        'div', lambda d: d.get('class') == 'col-xs-6 col-sm-3' and _has_fa_user_icon(d))
+    if not instructor_divs:
+        instructor_divs = panel.find_all('div', _has_fa_user_icon)
+    for div in instructor_divs:
+        name = _instructor_from_text(div.text)
+        if name:
+            return name
+    return "TBA"
+
+
+class Course:
+    """
+    One course record: a section straight off a results page, or an offering
+    once OfferingIndex has folded its sections together.
+
+    Records are slotted, and subject, professor and quarter are interned, so
+    the thousands of records in a multi-term run share one copy of each of
+    those strings instead of carrying a dict apiece. Extra fields such as
+    enrichment data live in details. to_dict() gives the JSON form.
+    """
+
+    __slots__ = ('name', 'subject', 'professor', 'quarter', 'course_link', 'section', 'sections', 'details')
+
+    def __init__(self, name, subject, professor, quarter, course_link=None, section=None, sections=None,
+                 details=None):
+        self.name = name
+        self.subject = sys.intern(subject) if subject else subject
+        self.professor = sys.intern(professor) if professor else professor
+        self.quarter = sys.intern(quarter) if quarter else quarter
+        self.course_link = course_link
+        self.section = section
+        self.sections = sections
+        self.details = details
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from its JSON form, keeping unknown fields in details."""
+        known = {field: data[field] for field in cls.__slots__ if field != 'details' and field in data}
+        details = {field: value for field, value in data.items() if field not in known}
+        return cls(**known, details=details or None)
+
+    def to_dict(self):
+        """The record's JSON form: the same keys the scraper has always written."""
+        data = {
+            'name': self.name,
+            'subject': self.subject,
+            'professor': self.professor,
+            'quarter': self.quarter,
+            'course_link': self.course_link,
+        }
+        if self.sections is None:
+            data['section'] = self.section
+        else:
+            data['sections'] = self.sections
+        if self.details:
+            data.update(self.details)
+        return data
+
+    def __repr__(self):
+        return f"Course({self.to_dict()!r})"
+
+
+def _courses_from_document(document, selected_quarter, page_url=SEARCH_URL, verbose=False):
+    """parse_results_page over an already parsed page."""
+    panels = document.find_all('div', _is_course_panel)
+    page_courses = []
+    
+    if verbose:
+        print(f"     Found {len(panels)} course panels")
+    
+    for panel in panels:
+        course_name_full, course_link = _extract_heading(panel, page_url)
+        if not course_name_full:
+            continue
+        
+        parsed = _parse_course_name(course_name_full)
+        if parsed is None:
+            if verbose:
+                print(f"     Could not parse course name: {course_name_full}")
+            continue
+        subject, course_num, section, title = parsed
+        
+        professor = _extract_professor(panel)
+        
+        # Build full course name
+        course_name = f"{subject} {course_num} - {title}"
+        
+        page_courses.append(Course(course_name, subject, professor, selected_quarter, course_link, section))
+    
+    return page_courses
+
+
+# "Class Details" labels on a detail page, and the course fields they fill
+DETAIL_FIELDS = {
+    'Career': 'career',
+    'Grading': 'grading',
+    'Class Number': 'class_number',
+    'Type': 'class_type',
+    'Credits': 'credits',
+    'General Education': 'ge',
+    'Status': 'enrollment_status',
+    'Available Seats': 'available_seats',
+    'Enrollment Capacity': 'enrollment_capacity',
+    'Enrolled': 'enrolled',
+    'Wait List Capacity': 'waitlist_capacity',
+    'Wait List Total': 'waitlist_total',
+}
+_DETAIL_COUNTS = frozenset(['available_seats', 'enrollment_capacity', 'enrolled', 'waitlist_capacity',
+                            'waitlist_total'])
+# Other detail panels whose text is kept as-is
+_DETAIL_TEXT_PANELS = {
+    'Description': 'description',
+    'Enrollment Requirements': 'requirements',
+    'Class Notes': 'notes',
+}
+# Detail fields that hold for every section of an offering. The rest (class
+# number, notes, meetings, seat counts, ...) describe the one section whose
+# page was fetched, so enrichment leaves them off multi-section records.
+OFFERING_DETAIL_FIELDS = ('description', 'requirements', 'career', 'grading', 'credits', 'ge')
+
+
+def _detail_panels(document):
+    """Map each detail panel's heading (e.g. "Description") to its panel-body node."""
+    panels = {}
+    for panel in document.iter('div'):
+        if not panel.has_class('panel'):
+            continue
+        heading = None
+        body = None
+        for child in panel.children:
+            if isinstance(child, _Node) and child.has_class('panel-heading'):
+                heading = child
+            elif isinstance(child, _Node) and child.has_class('panel-body'):
+                body = child
+        if heading is not None and body is not None:
+            panels.setdefault(heading.text.strip(), body)
+    return panels
+
+
+def _meetings(body):
+    """Rows of the "Meeting Information" table as dicts: days_times, room, instructor, dates."""
+    keys = {'Days & Times': 'days_times', 'Room': 'room', 'Instructor': 'instructor', 'Meeting Dates': 'dates'}
+    table = body.find('table')
+    if table is None:
+        return []
+    columns = [keys.get(th.text.strip(), th.text.strip().lower()) for th in table.iter('th')]
+    meetings = []
+    for row in table.iter('tr'):
+        cells = row.find_all('td')
+        if cells:
+            meetings.append({column: cell.text.strip() for column, cell in zip(columns, cells)})
+    return meetings
+
+
+def parse_detail_page(html):
+    """
+    Extract the fields of a course detail page (the page behind course_link).
+
+    Returns a dict with whichever of the DETAIL_FIELDS, description,
+    requirements, notes and meetings the page has. Seat and wait list
+    counts are ints.
+    """
+    panels = _detail_panels(parse_html(html))
+    details = {}
+    class_details = panels.get('Class Details')
+    if class_details is not None:
+        for dt in class_details.iter('dt'):
+            field = DETAIL_FIELDS.get(dt.text.strip())
+            if field is None:
+                continue
+            # The value is the next <dd> sibling
+            siblings = dt.parent.children
+            for sibling in siblings[siblings.index(dt) + 1:]:
+                if isinstance(sibling, _Node) and sibling.tag == 'dd':
+                    value = sibling.text.strip()
+                    if field in _DETAIL_COUNTS:
+                        match = re.search(r'\d+', value)
+                        value = int(match.group()) if match else None
+                    details[field] = value
+                    break
+    for heading, field in _DETAIL_TEXT_PANELS.items():
+        body = panels.get(heading)
+        if body is not None and body.text.strip():
+            details[field] = body.text.strip()
+    meeting_info = panels.get('Meeting Information')
+    if meeting_info is not None:
+        details['meetings'] = _meetings(meeting_info)
+    return details
+
+
+def detail_url(term_value, class_number, base_url=None):
+    """
+    The detail page URL for one class, as pisa links it from the results.
+
+    class_data is the base64 of a PHP-serialized array holding the term
+    (the binds[:term] value, e.g. "2260") and the class number.
+    """
+    term_value, class_number = str(term_value), str(class_number)
+    serialized = (f'a:2:{{s:5:":STRM";s:{len(term_value)}:"{term_value}";'
+                  f's:10:":CLASS_NBR";s:{len(class_number)}:"{class_number}";}}')
+    class_data = quote(base64.b64encode(serialized.encode()).decode(), safe='')
+    return urljoin(base_url or SEARCH_URL, f"index.php?action=detail&class_data={class_data}")
+
+
+# Detail page fields a watch needs; status changes are reported as these events
+ENROLLMENT_FIELDS = ('class_number', 'enrollment_status', 'available_seats', 'enrollment_capacity', 'enrolled',
+                     'waitlist_capacity', 'waitlist_total')
+STATUS_EVENTS = {'Open': 'opened', 'Closed': 'closed', 'Wait List': 'waitlisted'}
+_ENROLLMENT_LABELS = {label: field for label, field in DETAIL_FIELDS.items() if field in ENROLLMENT_FIELDS}
+_ENROLLMENT_RE = re.compile(r'<dt>\s*(' + '|'.join(map(re.escape, _ENROLLMENT_LABELS)) + r')\s*</dt>\s*<dd>(.*?)</dd>',
+                            re.S)
+_TITLE_RE = re.compile(r'<h2[^>]*>(.*?)</h2>', re.S)
+
+
+def parse_enrollment(html):
+    """
+    Just the status, seat and wait list fields of a detail page.
+
+    Reads the <dt>/<dd> pairs with one regex instead of building a DOM, and
+    falls back to parse_detail_page when the markup doesn't match. Returns a
+    dict of whichever ENROLLMENT_FIELDS were found, plus 'name' from the
+    page heading; counts are ints.
+    """
+    enrollment = {}
+    for label, value in _ENROLLMENT_RE.findall(html):
+        field = _ENROLLMENT_LABELS[label]
+        value = unescape(re.sub(r'<[^>]+>', '', value)).strip()
+        if field in _DETAIL_COUNTS:
+            match = re.search(r'\d+', value)
+            value = int(match.group()) if match else None
+        enrollment.setdefault(field, value)
+    if 'enrollment_status' not in enrollment:
+        details = parse_detail_page(html)
+        enrollment = {field: details[field] for field in ENROLLMENT_FIELDS if field in details}
+    title = _TITLE_RE.search(html)
+    if title:
+        enrollment['name'] = ' '.join(unescape(re.sub(r'<[^>]+>', '', title.group(1))).split())
+    return enrollment
+
+
+class OfferingIndex:
+    """
+    Deduplicates section records into one offering per (subject, number, professor, quarter).
+
+    The index is a dict keyed on that tuple, so each record costs O(1) no
+    matter how many pages the run has covered. The first section seen
+    becomes the offering; later sections of the same offering are folded
+    into its 'sections' list instead of being emitted again.
+
+    Results are listed in course order, so an offering of the last course
+    on a page may still gain sections from the next page. consolidate holds
+    those offerings back until a page moves past their course, and flush
+    releases whatever is left at the end of the run. Sections that turn up
+    for an offering that was already released are counted in late.
+    """
+
+    def __init__(self, offerings=(), pending=()):
+        self._offerings = {}
+        self._pending = []
+        self._released = set()
+        self.late = 0
+        for offering in offerings:
+            key = self.key(offering)
+            self._offerings[key] = offering
+            self._released.add(key)
+        for offering in pending:
+            self._offerings[self.key(offering)] = offering
+            self._pending.append(offering)
+
+    def __len__(self):
+        return len(self._offerings)
+
+    @staticmethod
+    def key(course):
+        # "AM 10 - Lin Algebra for Engrs" -> "AM 10" (subject and number)
+        return (course.name.split(' - ', 1)[0], course.professor, course.quarter)
+
+    def add(self, course):
+        """
+        Index a section record (a Course); returns it, now an offering, or
+        None if it was folded into an existing one.
+        """
+        key = self.key(course)
+        section = course.section
+        existing = self._offerings.get(key)
+        if existing is not None:
+            if section and section not in existing.sections:
+                existing.sections.append(section)
+                if key in self._released:
+                    self.late += 1
+            return None
+        # The first section seen becomes the offering itself
+        if course.sections is None:
+            course.sections = [section] if section else []
+            course.section = None
+        self._offerings[key] = course
+        return course
+
+    @property
+    def pending(self):
+        """Offerings seen but not yet released by consolidate."""
+        return list(self._pending)
+
+    def consolidate(self, courses):
+        """
+        Index a batch of section records (one results page) and return the
+        offerings that can't gain any more sections, in the order first seen.
+        """
+        for course in courses:
+            offering = self.add(course)
+            if offering is not None:
+                self._pending.append(offering)
+        if not courses:
+            return []
+        last = courses[-1].name.split(' - ', 1)[0]
+        ready = [offering for offering in self._pending if self.key(offering)[0] != last]
+        self._pending = [offering for offering in self._pending if self.key(offering)[0] == last]
+        self._released.update(self.key(offering) for offering in ready)
+        return ready
+
+    def flush(self):
+        """Release every offering still held back; call once no more pages are coming."""
+        ready, self._pending = self._pending, []
+        self._released.update(self.key(offering) for offering in ready)
+        return ready
+
+
+def _form_fields(form):
+    """
+    Collect the (name, value) pairs a browser would submit for a form.
+
+    Submit buttons are left out; the caller adds one if the server needs it.
+    """
+    fields = []
+    for node in form.iter():
+        name = node.get('name')
+        if not name or 'disabled' in node.attrs:
+            continue
+        if node.tag == 'input':
+            input_type = node.get('type', 'text').lower()
+            if input_type in ('submit', 'button', 'image', 'reset', 'file'):
+                continue
+            if input_type in ('checkbox', 'radio') and 'checked' not in node.attrs:
+                continue
+            fields.append((name, node.get('value', 'on' if input_type in ('checkbox', 'radio') else '')))
+        elif node.tag == 'select':
+            options = node.find_all('option')
+            chosen = next((o for o in options if 'selected' in o.attrs), options[0] if options else None)
+            if chosen is not None:
+                fields.append((name, chosen.get('value', chosen.text)))
+        elif node.tag == 'textarea':
+            fields.append((name, node.own_text()))
+    return fields
+
+
+def _results_form_state(document):
+    """The resultsForm fields of a results page, or None if it has no resultsForm."""
+    form = document.find('form', lambda f: f.get('name') == 'resultsForm')
+    return _form_fields(form) if form is not None else None
+
+
+def _set_field(fields, name, value):
+    """Replace (or add) a field in a list of (name, value) pairs."""
+    for i, (field_name, _) in enumerate(fields):
+        if field_name == name:
+            fields[i] = (name, value)
+            return
+    fields.append((name, value))
+
+
+class AdaptivePacer:
+    """
+    Paces a scrape by how fast pisa is actually answering.
+
+    Every page load is timed and folded into an exponentially weighted
+    moving average. The idle time between pages, the wait timeouts and the
+    readiness polling interval are all derived from that average, so a fast
+    server is crawled quickly and a struggling one gets proportionally more
+    breathing room.
+
+    Args:
+        idle_ratio: Idle time between pages as a fraction of the average
+            response time
+        initial: Response time assumed before anything has been observed
+        alpha: Weight of each new observation in the moving average
+        min_timeout: Floor for readiness wait timeouts, in seconds
+        max_timeout: Ceiling for readiness wait timeouts, in seconds
+    """
+
+    def __init__(self, idle_ratio=0.25, initial=1.0, alpha=0.3, min_timeout=10, max_timeout=60):
+        self.idle_ratio = idle_ratio
+        self.latency = initial
+        self.alpha = alpha
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.observations = 0
+        self.idle_total = 0.0
+
+    def observe(self, seconds):
+        """Fold one measured response time into the moving average."""
+        if self.observations == 0:
+            self.latency = seconds
+        else:
+            self.latency = self.alpha * seconds + (1 - self.alpha) * self.latency
+        self.observations += 1
+
+    @property
+    def timeout(self):
+        """How long to wait for a page before giving up on it."""
+        return min(self.max_timeout, max(self.min_timeout, self.latency * 10))
+
+    @property
+    def poll_interval(self):
+        """How often to re-check a readiness condition."""
+        return min(0.5, max(0.05, self.latency / 10))
+
+    @property
+    def probe_timeout(self):
+        """How long to look for an element on a page that has already loaded."""
+        return min(5.0, max(0.5, self.latency))
+
+    def idle(self):
+        """Sleep between pages in proportion to the server's response time."""
+        delay = self.latency * self.idle_ratio
+        if delay > 0:
+            time.sleep(delay)
+            self.idle_total += delay
+        return delay
+
+    def waiter(self, driver, timeout=None):
+        """A WebDriverWait using the pacer's timeout and polling interval."""
+        return WebDriverWait(driver, self.timeout if timeout is None else timeout,
+                             poll_frequency=self.poll_interval)
+
+    def wait_for(self, driver, condition, timeout=None):
+        """Wait for condition, recording how long it took as a response time."""
+        started = time.perf_counter()
+        result = self.waiter(driver, timeout).until(condition)
+        self.observe(time.perf_counter() - started)
+        return result
+
+
+def _is_transient(error):
+    """Whether error means pisa or the network is struggling, so the request is worth backing off and retrying."""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return response.status_code == 429 or response.status_code >= 500
+    if requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return webdriver is not None and isinstance(error, TimeoutException)
+
+
+def _retry_after(error):
+    """Seconds a 429/503 response's Retry-After header asks for, if it gives a number."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class FetchController:
+    """
+    Shared rate limit and backoff for every request a scrape sends to pisa.
+
+    Requests in flight are capped by a limit that grows by one after a
+    limit's worth of healthy responses while the cap was full, and halves
+    when a request fails or comes back much slower than usual (additive
+    increase, multiplicative decrease), so sharded workers and detail
+    enrichment sharing one controller settle at the most concurrency the
+    server handles well. Each cut also pauses new requests for an
+    exponential backoff with jitter, doubling with every cut in a row, or
+    for as long as a Retry-After header asks. Requests that were already in
+    flight when the limit was cut don't cut it again.
+
+    Args:
+        initial: Requests allowed in flight at the start
+        max_concurrency: Ceiling for the limit (None: only the number of
+            workers and enrichment threads bounds it)
+        slow_factor: A response slower than this multiple of the usual
+            response time counts as the server slowing down
+        min_slow: ... and than this many seconds, so jitter on fast responses
+            doesn't count
+        base_backoff: Pause after the first cut, in seconds
+        max_backoff: Longest pause, in seconds
+        retries: Times a request is retried after a transient failure
+            (timeout, dropped connection, 429 or 5xx)
+        alpha: Weight of each response in the usual response time average
+        verbose: Print every increase, not just backoffs
+        metrics: ScrapeMetrics to record decisions, retries and time spent
+            throttled in
+    """
+
+    def __init__(self, initial=2, max_concurrency=None, slow_factor=3.0, min_slow=1.0, base_backoff=1.0,
+                 max_backoff=60.0, retries=3, alpha=0.2, verbose=False, metrics=None):
+        self.max_concurrency = max_concurrency
+        self.limit = max(1, min(initial, max_concurrency or initial))
+        self.slow_factor = slow_factor
+        self.min_slow = min_slow
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retries = retries
+        self.alpha = alpha
+        self.verbose = verbose
+        self.metrics = metrics or ScrapeMetrics()
+        self.latency = None
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._healthy = 0
+        self._cuts_in_a_row = 0
+        self._last_cut = float('-inf')
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def request(self):
+        """Run the body as one request: wait for a free slot and any backoff, then record how it went."""
+        started = self._acquire()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # Released even when the body is interrupted (GeneratorExit,
+            # KeyboardInterrupt), so the slot can't leak
+            self._release(started, error)
+
+    def should_retry(self, error, attempt):
+        """Whether a request that failed with error after `attempt` retries should be sent again."""
+        if attempt >= self.retries or not _is_transient(error):
+            return False
+        self.metrics.count('retries')
+        print(f"   🔁 Retrying after {type(error).__name__} (retry {attempt + 1} of {self.retries})")
+        return True
+
+    def _acquire(self):
+        waited = 0.0
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    self._cond.wait(self.paused_until - now)
+                elif self.in_flight >= self.limit:
+                    self._cond.wait()
+                else:
+                    break
+                waited += time.monotonic() - now
+            self.in_flight += 1
+        if waited:
+            self.metrics.add_time('throttled', waited)
+        return time.monotonic()
+
+    def _release(self, started, error=None):
+        now = time.monotonic()
+        elapsed = now - started
+        with self._cond:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            if error is not None:
+                # Errors that aren't the server's doing (a replay cache miss, a
+                # missing element) say nothing about how it's coping
+                if _is_transient(error):
+                    self._cut(started, now, f"{type(error).__name__}", _retry_after(error))
+            elif self.latency is not None and elapsed > max(self.slow_factor * self.latency, self.min_slow):
+                self._cut(started, now, f"slow response, {elapsed:.2f}s vs ~{self.latency:.2f}s")
+            else:
+                self._cuts_in_a_row = 0
+                # Only requests sent under the current limit, while it was
+                # full, say whether the server could take more
+                if saturated and started >= self._last_cut:
+                    self._healthy += 1
+                    if self._healthy >= self.limit and self.limit < (self.max_concurrency or float('inf')):
+                        self._decide('increase', self.limit + 1,
+                                     f"{self._healthy} healthy response(s) at ~{self.latency or elapsed:.2f}s")
+            if error is None:
+                # Slow responses still move the average, so a server that has
+                # settled at a slower pace stops counting as slowing down
+                self.latency = elapsed if self.latency is None else (
+                    self.alpha * elapsed + (1 - self.alpha) * self.latency)
+            self._cond.notify_all()
+
+    def _cut(self, started, now, reason, retry_after=None):
+        self._healthy = 0
+        if started < self._last_cut:
+            return
+        self._last_cut = now
+        self._cuts_in_a_row += 1
+        pause = min(self.max_backoff, self.base_backoff * 2 ** (self._cuts_in_a_row - 1))
+        pause = pause / 2 + random.uniform(0, pause / 2)
+        if retry_after:
+            pause = max(pause, min(retry_after, self.max_backoff))
+        self.paused_until = max(self.paused_until, now + pause)
+        self._decide('backoff', max(1, self.limit // 2), reason, pause)
+
+    def _decide(self, action, limit, reason, pause=0.0):
+        before, self.limit = self.limit, limit
+        self._healthy = 0
+        self.metrics.count('rate_increases' if action == 'increase' else 'rate_backoffs')
+        self.metrics.record_decision(time.monotonic() - self._started, action, before, limit, pause, reason)
+        if action == 'backoff':
+            print(f"   🐢 Backing off {pause:.1f}s, {before} -> {limit} request(s) in flight ({reason})")
+        elif self.verbose:
+            print(f"   🚦 Allowing {limit} requests in flight ({reason})")
+
+
+def _request_slot(controller):
+    """controller.request(), or nothing when there's no controller."""
+    return controller.request() if controller is not None else contextlib.nullcontext()
+
+
+class ScrapeMetrics:
+    """
+    Wall time per phase, counters and per-page timings for one scrape.
+
+    Phase times accumulate over every call, and over every worker in a
+    sharded scrape, so their sum can exceed the run's wall time. Safe to
+    share between worker threads.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.phases = {}
+        self.counters = {}
+        self.commands = {}
+        self.pages = []
+        self.decisions = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body of a with block as one call of phase name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            phase = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            phase['seconds'] += seconds
+            phase['calls'] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def count_command(self, command):
+        """Count one WebDriver command, both in total and by name."""
+        with self._lock:
+            self.counters['driver_commands'] = self.counters.get('driver_commands', 0) + 1
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+    def record_page(self, number, fetch_seconds, parse_seconds, courses, subject=None):
+        """Record how long one results page took to fetch and to parse."""
+        with self._lock:
+            self.pages.append({
+                'page': number,
+                'subject': subject,
+                'fetch_seconds': round(fetch_seconds, 4),
+                'parse_seconds': round(parse_seconds, 4),
+                'courses': courses,
+            })
+
+    def record_decision(self, at, action, limit_before, limit_after, pause, reason):
+        """Record one FetchController change of concurrency limit, with the backoff pause it took."""
+        with self._lock:
+            self.decisions.append({
+                'at_seconds': round(at, 3),
+                'action': action,
+                'limit_before': limit_before,
+                'limit_after': limit_after,
+                'pause_seconds': round(pause, 3),
+                'reason': reason,
+            })
+
+    def report(self, **info):
+        """The metrics as a JSON-serializable dict, with info merged in at the top."""
+        with self._lock:
+            return {
+                **info,
+                'started_at': self.started_at,
+                'wall_seconds': round(time.perf_counter() - self.started, 3),
+                'phases': {name: {'seconds': round(phase['seconds'], 3), 'calls': phase['calls']}
+                           for name, phase in sorted(self.phases.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'driver_commands': dict(sorted(self.commands.items(), key=lambda item: -item[1])),
+                'pages': list(self.pages),
+                'rate_decisions': list(self.decisions),
+            }
+
+
+CACHE_MODES = ('use', 'refresh', 'replay')
+
+# What a fetch hands back, whether it came from the network or the cache
+Fetched = namedtuple('Fetched', ['url', 'text', 'elapsed', 'from_cache'])
+
+
+class CacheMiss(LookupError):
+    """A request that replay mode couldn't answer from the cache."""
+
+
+class ResponseCache:
+    """
+    On-disk cache of fetched pages, for the HTTP engine and detail enrichment.
+
+    Each request (method, URL and posted form) gets a small JSON entry
+    pointing at a gzipped body stored under the SHA-256 of its content, so
+    identical pages share one blob. Results pages are keyed on the posted
+    resultsForm, which carries the whole search state.
+
+    Modes:
+        use: Serve entries younger than max_age straight from disk; revalidate
+            older ones with If-None-Match / If-Modified-Since when the server
+            sent an ETag or Last-Modified, otherwise fetch them again
+        refresh: Always go to the network (still revalidating), and store
+            what comes back
+        replay: Never touch the network; a request that isn't cached raises
+            CacheMiss
+
+    Args:
+        directory: Where entries and blobs are kept
+        mode: One of CACHE_MODES
+        max_age: Seconds an entry is served without asking the server
+        max_bytes: Size budget that prune() trims the cache back to
+        evict_after: Seconds since last use after which prune() drops an entry
+        metrics: ScrapeMetrics to count hits, misses and revalidations in
+    """
+
+    def __init__(self, directory, mode='use', max_age=6 * 3600, max_bytes=500 * 1024 * 1024,
+                 evict_after=30 * 24 * 3600, metrics=None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r} (expected one of {', '.join(CACHE_MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.evict_after = evict_after
+        self.metrics = metrics or ScrapeMetrics()
+        self._entries_dir = os.path.join(directory, 'entries')
+        self._blobs_dir = os.path.join(directory, 'blobs')
+        os.makedirs(self._entries_dir, exist_ok=True)
+        os.makedirs(self._blobs_dir, exist_ok=True)
+
+    @staticmethod
+    def key(method, url, data=None):
+        if isinstance(data, dict):
+            data = list(data.items())
+        request = json.dumps([method.upper(), url, [list(pair) for pair in data or []]], ensure_ascii=False)
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self._entries_dir, key[:2], f"{key}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self._blobs_dir, digest[:2], f"{digest}.gz")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Worker threads can write the same file at once, so each gets its own temp file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load_entry(self, key):
+        try:
+            with open(self._entry_path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # An entry whose blob was evicted is as good as missing
+        return entry if os.path.exists(self._blob_path(entry['blob'])) else None
+
+    def _save_entry(self, key, entry):
+        self._write_atomic(self._entry_path(key), json.dumps(entry).encode('utf-8'))
+
+    def _read_blob(self, digest):
+        with gzip.open(self._blob_path(digest), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def _store(self, key, method, url, response):
+        body = response.text.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        if not os.path.exists(self._blob_path(digest)):
+            self._write_atomic(self._blob_path(digest), gzip.compress(body))
+        now = time.time()
+        self._save_entry(key, {
+            'method': method.upper(),
+            'url': url,
+            'final_url': response.url,
+            'blob': digest,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': now,
+            'used_at': now,
+        })
+
+    def _hit(self, key, entry, elapsed=0.0):
+        entry['used_at'] = time.time()
+        self._save_entry(key, entry)
+        return Fetched(entry['final_url'], self._read_blob(entry['blob']), elapsed, True)
+
+    def fetch(self, session, method, url, data=None, timeout=30, before_request=None, controller=None):
+        """
+        Fetch through the cache with session, according to the cache mode.
+
+        before_request, if given, is called only when the request actually
+        goes to the network (e.g. to rate limit it), and only those requests
+        go through controller (a FetchController).
+        """
+        key = self.key(method, url, data)
+        entry = self._load_entry(key)
+        if self.mode == 'replay':
+            if entry is None:
+                self.metrics.count('cache_misses')
+                raise CacheMiss(f"{method.upper()} {url} is not in the cache at {self.directory}")
+            self.metrics.count('cache_hits')
+            return self._hit(key, entry)
+        if entry is not None and self.mode == 'use' and time.time() - entry['stored_at'] < self.max_age:
+            self.metrics.count('cache_hits')
+            return self._hit(key, entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        if before_request is not None:
+            before_request()
+        with _request_slot(controller):
+            response = session.request(method, url, data=data, timeout=timeout, headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+        elapsed = response.elapsed.total_seconds()
+        if response.status_code == 304 and entry is not None:
+            self.metrics.count('cache_revalidated')
+            entry['stored_at'] = time.time()
+            return self._hit(key, entry, elapsed)
+        self.metrics.count('cache_misses')
+        self._store(key, method, url, response)
+        return Fetched(response.url, response.text, elapsed, False)
+
+    def prune(self):
+        """
+        Evict entries unused for evict_after, then least recently used ones
+        until the blobs fit in max_bytes, then blobs nothing points at.
+
+        Returns:
+            (entries_removed, bytes_freed)
+        """
+        entries = []
+        for root, _, files in os.walk(self._entries_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        entries.append((path, json.load(f)))
+                except (OSError, ValueError):
+                    entries.append((path, None))
+        blob_sizes = {}
+        for root, _, files in os.walk(self._blobs_dir):
+            for name in files:
+                if name.endswith('.gz'):
+                    blob_sizes[name[:-3]] = os.path.getsize(os.path.join(root, name))
+
+        cutoff = time.time() - self.evict_after
+        entries.sort(key=lambda item: item[1]['used_at'] if item[1] else 0, reverse=True)
+        kept_blobs = set()
+        total = 0
+        removed = 0
+        for path, entry in entries:
+            blob = entry['blob'] if entry else None
+            if blob in blob_sizes and entry['used_at'] >= cutoff:
+                size = 0 if blob in kept_blobs else blob_sizes[blob]
+                if total + size <= self.max_bytes:
+                    kept_blobs.add(blob)
+                    total += size
+                    continue
+            os.remove(path)
+            removed += 1
+
+        freed = 0
+        for digest, size in blob_sizes.items():
+            if digest not in kept_blobs:
+                os.remove(self._blob_path(digest))
+                freed += size
+        return removed, freed
+
+
+class PageArchive:
+    """
+    Keeps the raw HTML of every results page a scrape fetches, so extraction
+    can be re-run offline after a parser fix (see reextract_archive.py).
+
+    Pages are gzipped and grouped by term and search, as
+    <root>/<term>/<subject, or _all>/<page>.html.gz, next to a meta.json with
+    the quarter and page URL extraction needs. A search that starts again
+    from page 1 replaces what its last run archived. Safe to share between
+    sharded workers, which each archive their own subject.
+
+    Args:
+        root: Directory to archive into
+    """
+
+    ALL_SUBJECTS = '_all'
+
+    def __init__(self, root):
+        self.root = root
+
+    def _search_dir(self, quarter, subject):
+        return os.path.join(self.root, os.path.splitext(_term_filename(quarter))[0], subject or self.ALL_SUBJECTS)
+
+    def save(self, quarter, subject, page_num, html, url):
+        """Archive one results page of the search for subject (None: the whole term)."""
+        directory = self._search_dir(quarter, subject)
+        meta_path = os.path.join(directory, 'meta.json')
+        if page_num == 1 and os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(meta_path):
+            _write_json_atomic({'quarter': quarter, 'subject': subject, 'url': url,
+                                'archived_at': datetime.now().isoformat(timespec='seconds')}, meta_path)
+        path = os.path.join(directory, f"{page_num:04d}.html.gz")
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(path + '.tmp', path)
+
+    def quarters(self):
+        """Every archived quarter, oldest first."""
+        quarters = set()
+        for term_dir in os.listdir(self.root) if os.path.isdir(self.root) else ():
+            for _, quarter, _ in self._searches(term_dir):
+                quarters.add(quarter)
+        return sorted(quarters, key=_term_key)
+
+    def _searches(self, term_dir):
+        """(directory, quarter, url) for each archived search in a term, whole-term search first."""
+        term_path = os.path.join(self.root, term_dir)
+        if not os.path.isdir(term_path):
+            return []
+        searches = []
+        for name in sorted(os.listdir(term_path), key=lambda name: (name != self.ALL_SUBJECTS, name)):
+            try:
+                with open(os.path.join(term_path, name, 'meta.json'), encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            searches.append((os.path.join(term_path, name), meta['quarter'], meta['url']))
+        return searches
+
+    def pages(self, quarters=None):
+        """
+        (path, quarter, url) for every archived page, in the order a scrape
+        would have found them: by quarter, then search, then page number.
+        """
+        wanted = set(quarters if quarters is not None else self.quarters())
+        for quarter in sorted(wanted, key=_term_key):
+            for directory, _, url in self._searches(os.path.splitext(_term_filename(quarter))[0]):
+                for name in sorted(os.listdir(directory)):
+                    if name.endswith('.html.gz'):
+                        yield os.path.join(directory, name), quarter, url
+
+
+def _fetch(session, method, url, data=None, timeout=30, cache=None, before_request=None, controller=None):
+    """
+    Make one request, through cache when there is one; see ResponseCache.fetch.
+
+    Requests that reach the network wait for controller (a FetchController)
+    and feed it their outcome, and transient failures are retried as it
+    allows. Re-posting a results form is safe: it carries the whole search
+    state, so it asks for the same page again.
+    """
+    attempt = 0
+    while True:
+        try:
+            if cache is not None:
+                return cache.fetch(session, method, url, data=data, timeout=timeout,
+                                   before_request=before_request, controller=controller)
+            if before_request is not None:
+                before_request()
+            with _request_slot(controller):
+                response = session.request(method, url, data=data, timeout=timeout)
+                response.raise_for_status()
+            return Fetched(response.url, response.text, response.elapsed.total_seconds(), False)
+        except Exception as e:
+            if controller is None or not controller.should_retry(e, attempt):
+                raise
+            attempt += 1
+
+
+class PisaHttpClient:
+    """
+    Drives the class search form with plain HTTP requests.
+
+    One pooled requests.Session carries the cookies from the search form
+    through every results page, and each page's hidden resultsForm fields
+    are posted back to move to the next one. Requests go through controller,
+    a FetchController that sharded clients share.
+    """
+
+    def __init__(self, timeout=30, verbose=False, pacer=None, metrics=None, cache=None, controller=None):
+        if requests is None:
+            raise RuntimeError("The http engine needs the 'requests' package (pip install -r scripts/requirements.txt)")
+        self.timeout = timeout
+        self.verbose = verbose
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (X11; Linux x86_64) studia-course-scraper'
+        self.url = None
+        self.html = None
+        self.document = None
+        self.status_value = None
+        self.pacer = pacer or AdaptivePacer()
+        self.metrics = metrics or ScrapeMetrics()
+        self.cache = cache
+        self.controller = controller or FetchController(verbose=verbose, metrics=self.metrics)
+        self.last_fetch = 0.0
+        self.last_parse = 0.0
+        self.last_from_cache = False
+
+    def _request(self, method, url, data=None):
+        started = time.perf_counter()
+        response = _fetch(self.session, method, url, data=data, timeout=self.timeout, cache=self.cache,
+                          controller=self.controller)
+        self.last_from_cache = response.from_cache
+        if response.elapsed:
+            # Cache hits took no server time; revalidations did
+            self.pacer.observe(response.elapsed)
+        self.url = response.url
+        self.html = response.text
+        parsing = time.perf_counter()
+        self.document = parse_html(self.html)
+        finished = time.perf_counter()
+        self.last_fetch = parsing - started
+        self.last_parse = finished - parsing
+        self.metrics.add_time('fetch', self.last_fetch)
+        self.metrics.add_time('parse', self.last_parse)
+        if not response.from_cache:
+            self.metrics.count('http_requests')
+        return self.document
+
+    def open_search_form(self, url=None):
+        """Load the class search page; returns the search form node or None."""
+        self._request('GET', url or SEARCH_URL)
+        return self.search_form()
+
+    def search_form(self):
+        select = self.document.find('select', lambda s: s.get('name') == 'binds[:term]')
+        node = select
+        while node is not None and node.tag != 'form':
+            node = node.parent
+        if node is None:
+            node = self.document.find('form')
+        return node
+
+    def term_options(self):
+        """Return [(value, text, selected)] for the binds[:term] select."""
+        return _term_options(self.document)
+
+    def subject_codes(self):
+        """Return the subject codes offered by the search form's subject select."""
+        return _subject_codes(self.document)
+
+    def search(self, term=DEFAULT_TERM, subject=None):
+        """
+        Submit the search form for all classes in a term.
+
+        Args:
+            term: Term to select, e.g. "2026 Winter"
+            subject: Optional subject code (e.g. "CSE") to restrict the search to
+
+        Returns the quarter string (e.g. "2026 Winter") the results belong to.
+        """
+        form = self.search_form()
+        if form is None:
+            raise RuntimeError("Could not find the class search form")
+        fields = _form_fields(form)
+
+        status_select = form.find('select', lambda s: s.get('name') == 'binds[:reg_status]')
+        if status_select is None:
+            print("⚠️  Could not find status select element")
+        else:
+            options = status_select.find_all('option')
+            values = [o.get('value', o.text) for o in options]
+            status_value = next((v for v in STATUS_VALUES if v in values), None)
+            if status_value is None:
+                status_value = next((o.get('value', o.text) for o in options if o.text == "All Classes"), None)
+            if status_value is not None:
+                self.status_value = status_value
+                _set_field(fields, 'binds[:reg_status]', status_value)
+                print(f"✅ Changed status to 'All Classes' (value: {status_value})")
+            else:
+                print("⚠️  Could not set status to 'All Classes', continuing anyway...")
+
+        selected_quarter = term
+        options = self.term_options()
+        if not options:
+            print("⚠️  Could not find term select element")
+        else:
+            term_idx = _find_term_index([text for _, text, _ in options], term)
+            if term_idx is not None:
+                value, text, _ = options[term_idx]
+                _set_field(fields, 'binds[:term]', value)
+                print(f"✅ Set term to '{text}'")
+                selected_quarter = _extract_quarter(text) or selected_quarter
+            else:
+                current = next((text for _, text, selected in options if selected), options[0][1])
+                print(f"📅 Current term: {current}")
+                selected_quarter = _extract_quarter(current) or selected_quarter
+                print(f"⚠️  Using current selection, quarter: {selected_quarter}")
+
+        if subject:
+            _set_field(fields, 'binds[:subject]', subject)
+            print(f"✅ Set subject to '{subject}'")
+
+        button = form.find('input', lambda i: i.get('type') == 'submit' and i.get('name'))
+        if button is not None:
+            fields.append((button.get('name'), button.get('value', '')))
+
+        print("🔍 Submitting search form...")
+        self._request((form.get('method') or 'get').upper(), urljoin(self.url, form.get('action') or ''), fields)
+        if self.verbose:
+            print(f"   Current URL: {self.url}")
+        return selected_quarter
+
+    def has_next_page(self):
+        link = self.document.find('a', lambda a: 'next' in a.own_text() or 'Next' in a.own_text())
+        return link is not None
+
+    def next_page(self, form_state=None):
+        """
+        Post the resultsForm with action=next; returns False if there is no next page.
+
+        form_state replaces the current page's resultsForm fields, which jumps
+        straight to the page after the one those fields were saved from.
+        """
+        if form_state is None and not self.has_next_page():
+            return False
+        form = self.document.find('form', lambda f: f.get('name') == 'resultsForm')
+        if form is None:
+            return False
+        fields = [tuple(field) for field in form_state] if form_state is not None else _form_fields(form)
+        _set_field(fields, 'action', 'next')
+        self._request((form.get('method') or 'post').upper(), urljoin(self.url, form.get('action') or ''), fields)
+        return True
+
+
+class HostRateLimiter:
+    """
+    Spaces out request starts to at most `rate` per second for each host.
+
+    Callers reserve the next free slot for their host under a lock, then
+    sleep outside it until that slot comes up, so threads queue fairly
+    without holding each other up.
+    """
+
+    def __init__(self, rate=5.0):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until a request to url's host may start; returns the seconds waited."""
+        if not self.interval:
+            return 0.0
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class DetailEnricher:
+    """
+    Follows course_link to each course's detail page and merges in its offering-level fields.
+
+    course_link points at the first section's page, so only the fields in
+    OFFERING_DETAIL_FIELDS, which every section shares, are merged in.
+
+    Detail pages are fetched concurrently by a bounded thread pool over one
+    pooled requests.Session, so connections are reused across courses and
+    pages. A FetchController decides how many of those threads may have a
+    request in flight, and a HostRateLimiter can cap the request rate per
+    host on top of that.
+
+    Args:
+        concurrency: Maximum detail pages in flight at once
+        rate: Maximum requests per second to any one host (0 for no fixed
+            limit, leaving the pace to the controller)
+        timeout: Seconds before a detail request is abandoned
+        verbose: Print every failed fetch
+        metrics: ScrapeMetrics to record detail fetch and parse times in
+        cache: ResponseCache to fetch detail pages through
+        controller: FetchController to share with the results page fetches
+    """
+
+    def __init__(self, concurrency=8, rate=5.0, timeout=30, verbose=False, metrics=None, cache=None,
+                 controller=None):
+        if requests is None:
+            raise RuntimeError("Detail enrichment needs the 'requests' package (pip install -r scripts/requirements.txt)")
+        self.timeout = timeout
+        self.verbose = verbose
+        self.metrics = metrics or ScrapeMetrics()
+        self.limiter = HostRateLimiter(rate)
+        self.controller = controller or FetchController(verbose=verbose, metrics=self.metrics)
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(1, concurrency))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (X11; Linux x86_64) studia-course-scraper'
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='detail')
+
+    def fetch(self, url):
+        """Fetch and parse one detail page."""
+        with self.metrics.phase('detail_fetch'):
+            response = _fetch(self.session, 'GET', url, timeout=self.timeout, cache=self.cache,
+                              before_request=lambda: self.limiter.wait(url), controller=self.controller)
+        if not response.from_cache:
+            self.metrics.count('detail_requests')
+        with self.metrics.phase('detail_parse'):
+            return parse_detail_page(response.text)
+
+    def enrich(self, courses):
+        """
+        Merge offering-level detail fields into every course that has a course_link, in place.
+
+        Fields the course already has are left alone. Returns the number of
+        courses enriched; failed fetches are counted and skipped.
+        """
+        linked = [course for course in courses if course.course_link]
+        enriched = 0
+        failed = 0
+        for course, result in zip(linked, self._executor.map(self._fetch_or_error,
+                                                             [course.course_link for course in linked])):
+            if isinstance(result, Exception):
+                failed += 1
+                if self.verbose:
+                    print(f"     ⚠️  Could not fetch details for {course.name}: {result}")
+                continue
+            if course.details is None:
+                course.details = {}
+            for field in OFFERING_DETAIL_FIELDS:
+                if field in result:
+                    course.details.setdefault(field, result[field])
+            enriched += 1
+        if failed:
+            self.metrics.count('detail_failures', failed)
+            print(f"   ⚠️  {failed} detail page(s) could not be fetched")
+        return enriched
+
+    def _fetch_or_error(self, url):
+        try:
+            return self.fetch(url)
+        except Exception as e:
+            return e
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+# A watchlist entry naming a section, e.g. "CSE 101-01" or "CSE 101 - 01"
+_SECTION_SPEC_RE = re.compile(r'^([A-Za-z]+)\s*(\w+)\s*-\s*(\w+)$')
+
+
+class EnrollmentWatcher:
+    """
+    Polls the detail pages of a watchlist of classes and reports enrollment changes.
+
+    Each entry is a class number ("30700") or a section ("CSE 101-01").
+    Class numbers map straight to their detail page URL; sections are looked
+    up once, with a search restricted to their subject. After that a poll
+    fetches only the watched pages, concurrently through a FetchController,
+    and reads only their status and seat fields, so its cost grows with the
+    watchlist rather than the catalog.
+
+    Args:
+        entries: Class numbers and/or sections to watch
+        term: Term the classes are in, e.g. "2026 Winter"
+        concurrency: Detail pages fetched at once per poll
+        seat_changes: Also report seat and wait list count changes that
+            leave the status as it was
+        timeout: Seconds before a detail request is abandoned
+        verbose: Print every poll
+        metrics: ScrapeMetrics to record poll times and counts in
+        controller: FetchController the requests go through
+    """
+
+    def __init__(self, entries, term=DEFAULT_TERM, concurrency=8, seat_changes=False, timeout=30, verbose=False,
+                 metrics=None, controller=None):
+        self.entries = list(dict.fromkeys(entry.strip() for entry in entries if entry.strip()))
+        self.term = term
+        self.seat_changes = seat_changes
+        self.verbose = verbose
+        self.metrics = metrics or ScrapeMetrics()
+        self.controller = controller or FetchController(verbose=verbose, metrics=self.metrics)
+        self.client = PisaHttpClient(timeout=timeout, verbose=verbose, metrics=self.metrics,
+                                     controller=self.controller)
+        self.urls = {}
+        self.state = {}
+        self.polls = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='watch')
+
+    def resolve(self):
+        """Find every entry's detail page URL; raises ValueError for entries that can't be found."""
+        print("📄 Loading UCSC class search page over HTTP...")
+        self.client.open_search_form()
+        options = self.client.term_options()
+        term_idx = _find_term_index([text for _, text, _ in options], self.term)
+        if term_idx is None:
+            raise ValueError(f"Term {self.term!r} is not offered by the search form")
+        term_value = options[term_idx][0]
+
+        sections = {}
+        for entry in self.entries:
+            if entry.isdigit():
+                self.urls[entry] = detail_url(term_value, entry, self.client.url)
+                continue
+            match = _SECTION_SPEC_RE.match(entry)
+            if match is None:
+                raise ValueError(f"Invalid watch entry {entry!r} (expected a class number or e.g. 'CSE 101-01')")
+            subject, number, section = match.groups()
+            sections.setdefault(subject.upper(), {})[(f"{subject.upper()} {number.upper()}", section)] = entry
+        for subject, wanted in sections.items():
+            print(f"🔍 Looking up {len(wanted)} {subject} section(s)...")
+            for page in _iter_http_pages(term=self.term, subject=subject, client=self.client):
+                for course in page.courses:
+                    entry = wanted.get((course.name.partition(' - ')[0], course.section))
+                    if entry is not None and course.course_link:
+                        self.urls.setdefault(entry, course.course_link)
+                if all(entry in self.urls for entry in wanted.values()):
+                    break
+
+        missing = [entry for entry in self.entries if entry not in self.urls]
+        if missing:
+            raise ValueError(f"Could not find {', '.join(missing)} in {self.term}")
+        return self.urls
+
+    def fetch(self, url):
+        """Fetch one detail page and read its enrollment fields."""
+        response = _fetch(self.client.session, 'GET', url, timeout=self.client.timeout, controller=self.controller)
+        self.metrics.count('watch_requests')
+        enrollment = parse_enrollment(response.text)
+        if 'enrollment_status' not in enrollment:
+            raise ValueError("no enrollment status on the detail page")
+        return enrollment
+
+    def poll(self):
+        """Fetch every watched class once; returns the change events since the last poll."""
+        started = time.perf_counter()
+        polled_at = datetime.now().isoformat(timespec='seconds')
+        entries = list(self.urls)
+        events = []
+        failed = 0
+        for entry, result in zip(entries, self._executor.map(self._fetch_or_error,
+                                                             [self.urls[entry] for entry in entries])):
+            if isinstance(result, Exception):
+                failed += 1
+                if self.verbose:
+                    print(f"   ⚠️  Could not fetch {entry}: {result}")
+                continue
+            event = self._change(entry, self.state.get(entry), result)
+            self.state[entry] = result
+            if event is not None:
+                event['at'] = polled_at
+                events.append(event)
+        seconds = time.perf_counter() - started
+        self.polls += 1
+        self.metrics.add_time('watch_poll', seconds)
+        self.metrics.count('watch_events', len(events))
+        if failed:
+            self.metrics.count('watch_failures', failed)
+            print(f"   ⚠️  {failed} of {len(entries)} watched class(es) could not be fetched")
+        if self.verbose:
+            print(f"👀 Poll {self.polls}: {len(entries)} class(es) in {seconds:.2f}s, {len(events)} change(s)")
+        return events
+
+    def _change(self, entry, before, after):
+        """The event for one class's new state, or None if nothing worth reporting changed."""
+        status = after.get('enrollment_status')
+        if before is None:
+            kind = 'watching'
+        elif status != before.get('enrollment_status'):
+            kind = STATUS_EVENTS.get(status, 'status_changed')
+        elif self.seat_changes and any(after.get(field) != before.get(field) for field in _DETAIL_COUNTS):
+            kind = 'seats_changed'
+        else:
+            return None
+        event = {'event': kind, 'watch': entry, 'name': after.get('name'), 'quarter': self.term}
+        event.update((field, after.get(field)) for field in ENROLLMENT_FIELDS)
+        if before is not None:
+            event['previous_status'] = before.get('enrollment_status')
+            event['previous_available_seats'] = before.get('available_seats')
+        return event
+
+    def watch(self, interval=10.0, max_polls=None):
+        """
+        Poll every interval seconds, start to start, yielding change events as they're found.
+
+        The first poll yields a 'watching' event with each class's current
+        state. A poll that overruns the interval is followed straight away by
+        the next one, without a burst to catch up.
+        """
+        if not self.urls:
+            self.resolve()
+        next_poll = time.monotonic()
+        while True:
+            yield from self.poll()
+            if max_polls is not None and self.polls >= max_polls:
+                return
+            next_poll += interval
+            delay = next_poll - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_poll = time.monotonic()
+
+    def _fetch_or_error(self, url):
+        try:
+            return self.fetch(url)
+        except Exception as e:
+            return e
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.client.session.close()
+
+
+def _iter_http_pages(verbose=False, term=DEFAULT_TERM, max_pages=MAX_PAGES, search_url=None, subject=None,
+                     client=None, resume=None, metrics=None, cache=None, controller=None, navigate=True,
+                     archive=None):
+    """
+    Scrape results pages over HTTP, yielding a ResultsPage as each one is parsed.
+
+    resume is a checkpoint dict; the scrape skips ahead to the page after
+    the one it records. Timings go to metrics, or to the metrics of the
+    client passed in; pages are fetched through cache when it's given, and
+    through controller (a FetchController). navigate=False searches from
+    the form the client already has open instead of loading it again.
+    Every results page is also saved to archive (a PageArchive) when given.
+    """
+    if client is None:
+        client = PisaHttpClient(verbose=verbose, metrics=metrics, cache=cache, controller=controller)
+    metrics = client.metrics
+    if navigate or client.document is None:
+        print("📄 Loading UCSC class search page over HTTP...")
+        client.open_search_form(search_url)
+    print("⚙️  Configuring search parameters...")
+    selected_quarter = client.search(term, subject=subject)
+
+    page_num = 1
+    if resume:
+        print(f"⏩ Skipping ahead to page {resume['page'] + 1}...")
+        if not client.next_page(form_state=resume['form_state']):
+            raise RuntimeError("Could not restore the results pagination from the checkpoint")
+        page_num = resume['page'] + 1
+
+    while page_num <= max_pages:
+        print(f"   Parsing page {page_num}...")
+        if archive is not None:
+            with metrics.phase('archive'):
+                archive.save(selected_quarter, subject, page_num, client.html, client.url)
+        started = time.perf_counter()
+        try:
+            page_courses = _courses_from_document(client.document, selected_quarter, client.url, verbose=verbose)
+        except Exception as e:
+            print(f"⚠️  Error parsing page {page_num}: {e}")
+            raise IncompleteScrape(f"Results page {page_num} could not be parsed: {e}", [page_num]) from e
+        extracted = time.perf_counter() - started
+        metrics.add_time('parse', extracted)
+        metrics.record_page(page_num, client.last_fetch, client.last_parse + extracted, len(page_courses), subject)
+        print(f"   Found {len(page_courses)} courses on page {page_num}")
+        if len(page_courses) == 0:
+            if page_num > 1:
+                # A 'next' link led here, so the page should have had results
+                raise IncompleteScrape(f"Results page {page_num} had no course panels", [page_num])
+            break
+        yield ResultsPage(page_num, page_courses, selected_quarter, client.status_value,
+                          _results_form_state(client.document))
+        # Pages served from the cache cost the server nothing
+        delay = 0.0 if client.last_from_cache else client.pacer.idle()
+        metrics.add_time('pacing', delay)
+        if verbose:
+            print(f"     Server response ~{client.pacer.latency:.2f}s, paced {delay:.2f}s")
+        if not client.next_page():
+            if verbose:
+                print("     No 'next' link found, reached last page")
+            break
+        page_num += 1
+        if verbose:
+            print(f"     Navigated to page {page_num}")
+    if page_num > max_pages:
+        print(f"⚠️  Stopped at the {max_pages}-page safety limit; later pages were not scraped")
+
+
+def _iter_sharded_pages(engine, workers, term=DEFAULT_TERM, subjects=None, verbose=False,
+                        screenshot_on_error=False, metrics=None, cache=None, controller=None, archive=None):
+    """
+    Scrape a term one subject at a time across a bounded pool of workers.
+
+    Every worker owns one HTTP session or browser for its whole lifetime and
+    pulls subjects off a shared queue, so a slow subject only holds up its
+    own worker. Finished shards are yielded in subject order as soon as every
+    earlier shard is done; duplicates across shards are left to OfferingIndex.
+    All workers share one FetchController, which decides how many of them
+    may have a request in flight at once. If any shard fails, the others are
+    still yielded and IncompleteScrape is raised at the end.
+    """
+    metrics = metrics or ScrapeMetrics()
+    controller = controller or FetchController(verbose=verbose, metrics=metrics)
+    selector_cache = SelectorCache() if engine == 'selenium' else None
+
+    def new_fetcher():
+        if engine == 'http':
+            return PisaHttpClient(verbose=verbose, metrics=metrics, cache=cache, controller=controller)
+        return _start_driver(metrics)
+
+    fetchers = []
+    threads = []
+    pending = queue.Queue()
+    try:
+        fetchers.append(new_fetcher())
+        if not subjects:
+            print("📚 Listing subjects...")
+            if engine == 'http':
+                fetchers[0].open_search_form()
+                subjects = fetchers[0].subject_codes()
+            else:
+                fetchers[0].get(SEARCH_URL)
+                WebDriverWait(fetchers[0], 20).until(
+                    EC.presence_of_element_located((By.NAME, "binds[:subject]")))
+                subjects = _subject_codes(parse_html(fetchers[0].page_source))
+            if not subjects:
+                raise RuntimeError("Could not find any subjects in the binds[:subject] select")
+        while len(fetchers) < min(workers, len(subjects)):
+            fetchers.append(new_fetcher())
+        print(f"🧵 Scraping {len(subjects)} subjects with {len(fetchers)} workers\n")
+
+        for idx, subject in enumerate(subjects):
+            pending.put((idx, subject))
+        results = {}
+        failed = []
+        done = threading.Condition()
+
+        def work(fetcher):
+            while True:
+                try:
+                    idx, subject = pending.get_nowait()
+                except queue.Empty:
+                    return
+                courses = []
+                try:
+                    if engine == 'http':
+                        pages = _iter_http_pages(verbose=verbose, term=term, subject=subject, client=fetcher,
+                                                 archive=archive)
+                    else:
+                        pages = _iter_selenium_pages(verbose=verbose, screenshot_on_error=screenshot_on_error,
+                                                     term=term, subject=subject, driver=fetcher,
+                                                     metrics=metrics, controller=controller,
+                                                     selector_cache=selector_cache, archive=archive)
+                    for page in pages:
+                        courses.extend(page.courses)
+                    print(f"✅ {subject}: {len(courses)} courses")
+                except Exception as e:
+                    failed.append(subject)
+                    courses = []
+                    print(f"⚠️  {subject}: shard failed: {e}")
+                with done:
+                    results[idx] = courses
+                    done.notify()
+
+        threads = [threading.Thread(target=work, args=(fetcher,), daemon=True) for fetcher in fetchers]
+        for thread in threads:
+            thread.start()
+
+        def completed_in_order():
+            for idx in range(len(subjects)):
+                with done:
+                    while idx not in results:
+                        done.wait()
+                    yield results.pop(idx)
+
+        for number, shard_courses in enumerate(completed_in_order(), 1):
+            if shard_courses:
+                yield ResultsPage(number, shard_courses, shard_courses[0].quarter, None, None)
+
+        if failed:
+            raise IncompleteScrape(f"{len(failed)} of {len(subjects)} subject(s) failed: "
+                                   f"{', '.join(sorted(failed))}", sorted(failed))
+    finally:
+        # Let workers finish the shard they're on before tearing down browsers
+        while True:
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                break
+        for thread in threads:
+            thread.join()
+        if engine != 'http':
+            for driver in fetchers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+
+def _iter_pages(engine='selenium', term=DEFAULT_TERM, workers=1, subjects=None, verbose=False,
+                screenshot_on_error=False, resume=None, metrics=None, cache=None, controller=None, archive=None):
+    """Yield a ResultsPage for each results page (or shard) from the chosen engine."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r} (expected one of {', '.join(ENGINES)})")
+    if cache is not None and cache.mode == 'replay' and engine != 'http':
+        raise ValueError("Replaying from the cache needs the http engine")
+    if workers > 1 or subjects:
+        if resume:
+            raise ValueError("Sharded scrapes can't be resumed from a checkpoint")
+        return _iter_sharded_pages(engine, workers, term=term, subjects=subjects, verbose=verbose,
+                                   screenshot_on_error=screenshot_on_error, metrics=metrics, cache=cache,
+                                   controller=controller, archive=archive)
+    if engine == 'http':
+        return _iter_http_pages(verbose=verbose, term=term, resume=resume, metrics=metrics, cache=cache,
+                                controller=controller, archive=archive)
+    return _iter_selenium_pages(verbose=verbose, screenshot_on_error=screenshot_on_error, term=term,
+                                resume=resume, metrics=metrics, controller=controller, archive=archive)
+
+
+def _offering_batches(pages, index, metrics):
+    """
+    Fold each page's sections into index, yielding (page, offerings) with the
+    offerings that are complete, then (None, offerings) for the ones still
+    held back once the pages run out.
+    """
+    for page in pages:
+        with metrics.phase('consolidate'):
+            offerings = index.consolidate(page.courses)
+        yield page, offerings
+    yield None, index.flush()
+
+
+def iter_courses(term=DEFAULT_TERM, engine='selenium', workers=1, subjects=None, verbose=False,
+                 screenshot_on_error=False, enrich=False, enrich_concurrency=8, enrich_rate=5.0, cache=None,
+                 max_concurrency=None, retries=3, archive=None):
+    """
+    Scrape UCSC courses, yielding each offering (a dict) once all its sections are parsed.
+
+    Sections are folded into offerings by an OfferingIndex. Offerings of
+    the last course on a page are held back until the next page (or the end
+    of the scrape), since their sections can continue there; everything
+    else is yielded as soon as its page is parsed. Courses are kept as
+    Course records internally and converted with to_dict() as they're
+    yielded, so callers get the same dicts the JSON output holds. Closing
+    the generator early shuts down the browser or session.
+
+    Args:
+        term: Term to scrape, e.g. "2026 Winter"
+        engine: 'selenium' or 'http'
+        workers: Number of parallel workers; more than 1 (or a subject list)
+            shards the search by subject
+        subjects: Optional list of subject codes to scrape, one shard each
+        verbose: Print detailed debugging information
+        screenshot_on_error: Take screenshots when errors occur (selenium engine only)
+        enrich: Merge each offering's shared detail page fields
+            (description, requirements, credits, ...) in before yielding it
+        enrich_concurrency: Detail pages fetched at once when enriching
+        enrich_rate: Detail requests per second per host when enriching
+        cache: ResponseCache to fetch pages through (http engine and
+            enrichment only)
+        max_concurrency: Most requests the FetchController lets into flight
+            at once, across workers and enrichment (None: no fixed cap)
+        retries: Times a request is retried after a timeout, dropped
+            connection, 429 or 5xx
+        archive: PageArchive to save every raw results page in
+    """
+    index = OfferingIndex()
+    controller = FetchController(max_concurrency=max_concurrency, retries=retries, verbose=verbose)
+    enricher = None
+    if enrich:
+        enricher = DetailEnricher(enrich_concurrency, enrich_rate, verbose=verbose, metrics=controller.metrics,
+                                  cache=cache, controller=controller)
+    try:
+        pages = _iter_pages(engine, term=term, workers=workers, subjects=subjects, verbose=verbose,
+                            screenshot_on_error=screenshot_on_error, metrics=controller.metrics, cache=cache,
+                            controller=controller, archive=archive)
+        for _, offerings in _offering_batches(pages, index, controller.metrics):
+            if enricher is not None:
+                enricher.enrich(offerings)
+            for offering in offerings:
+                yield offering.to_dict()
+    finally:
+        if enricher is not None:
+            enricher.close()
+
+
+OUTPUT_FORMATS = ('json', 'ndjson', 'sqlite')
+
+# Catalog schema for sqlite output. subject, professor and quarter compare
+# case-insensitively, so both = and prefix LIKE lookups can use their indexes.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    subject TEXT COLLATE NOCASE,
+    course_number TEXT,
+    title TEXT,
+    professor TEXT COLLATE NOCASE,
+    quarter TEXT COLLATE NOCASE,
+    course_link TEXT,
+    sections TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_courses_subject ON courses(subject);
+CREATE INDEX IF NOT EXISTS idx_courses_professor ON courses(professor);
+CREATE INDEX IF NOT EXISTS idx_courses_quarter ON courses(quarter);
+CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+    name, title, content='courses', content_rowid='id', tokenize='unicode61'
+);
+"""
+SQLITE_COLUMNS = ('name', 'subject', 'course_number', 'title', 'professor', 'quarter', 'course_link',
+                  'sections', 'details')
+
+
+def course_row(course):
+    """Flatten a Course into SQLITE_COLUMNS; enrichment fields go into details as JSON."""
+    # "AM 10 - Lin Algebra for Engrs" -> number "10", title "Lin Algebra for Engrs"
+    code, _, title = course.name.partition(' - ')
+    return (
+        course.name,
+        course.subject,
+        code.split()[-1] if code.split() else None,
+        title or None,
+        course.professor,
+        course.quarter,
+        course.course_link,
+        json.dumps(course.sections or [], ensure_ascii=False),
+        json.dumps(course.details, ensure_ascii=False) if course.details else None,
+    )
+
+
+def course_from_row(row):
+    """Rebuild a course record from a row of SQLITE_COLUMNS."""
+    name, subject, _, _, professor, quarter, course_link, sections, details = row
+    course = {
+        'name': name,
+        'subject': subject,
+        'professor': professor,
+        'quarter': quarter,
+        'course_link': course_link,
+        'sections': json.loads(sections) if sections else [],
+    }
+    if details:
+        course.update(json.loads(details))
+    return course
+
+
+def _resume_ndjson(path, count):
+    """
+    Keep the first count records of an NDJSON file, dropping anything written
+    after the last checkpoint, and return those records as Courses.
+    """
+    records = []
+    with open(path, 'r+', encoding='utf-8') as f:
+        while len(records) < count:
+            line = f.readline()
+            if not line.endswith('\n'):
+                raise RuntimeError(f"{path} has fewer records than the checkpoint expects ({count})")
+            records.append(Course.from_dict(json.loads(line)))
+        f.truncate(f.tell())
+    return records
+
+
+class _JsonSink:
+    """
+    Collects every course and writes one pretty-printed JSON array on close.
+
+    With spool set, pages are also appended to <output_file>.partial as
+    NDJSON so a checkpointed scrape can pick up where it stopped.
+    """
+
+    def __init__(self, output_file, spool=False, resume_count=None):
+        self.output_file = output_file
+        self.courses = []
+        self.spool_file = f"{output_file}.partial" if spool else None
+        self._spool = None
+        if self.spool_file:
+            if resume_count is not None:
+                self.courses = _resume_ndjson(self.spool_file, resume_count)
+            self._spool = open(self.spool_file, 'a' if resume_count is not None else 'w', encoding='utf-8')
+        self.previous = list(self.courses)
+
+    def write_page(self, page_courses):
+        self.courses.extend(page_courses)
+        if self._spool:
+            for course in page_courses:
+                self._spool.write(json.dumps(course.to_dict(), ensure_ascii=False))
+                self._spool.write('\n')
+            self._spool.flush()
+
+    def close(self):
+        # The same layout as json.dump(..., indent=2), converting one record
+        # at a time rather than building every dict at once
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            if not self.courses:
+                f.write('[]')
+            else:
+                f.write('[\n')
+                for i, course in enumerate(self.courses):
+                    if i:
+                        f.write(',\n')
+                    text = json.dumps(course.to_dict(), indent=2, ensure_ascii=False)
+                    f.write('  ' + text.replace('\n', '\n  '))
+                f.write('\n]')
+        if self._spool:
+            self._spool.close()
+            os.remove(self.spool_file)
+
+    def abort(self):
+        if self._spool:
+            self._spool.close()
+
+
+class _NdjsonSink:
+    """
+    Writes one JSON object per line, flushed after every page.
+
+    Lines go to <output_file>.partial, which replaces output_file on close,
+    so a failed scrape keeps its pages for --resume without clobbering the
+    last complete output. A stream (stdout) is written to directly.
+    """
+
+    def __init__(self, output_file, stream=None, resume_count=None):
+        self.output_file = output_file
+        self.partial_file = None
+        self.previous = []
+        self._owns_stream = stream is None
+        if stream is None:
+            self.partial_file = f"{output_file}.partial"
+            if resume_count is not None:
+                self.previous = _resume_ndjson(self.partial_file, resume_count)
+            stream = open(self.partial_file, 'a' if resume_count is not None else 'w', encoding='utf-8')
+        self.stream = stream
+
+    def write_page(self, page_courses):
+        for course in page_courses:
+            self.stream.write(json.dumps(course.to_dict(), ensure_ascii=False))
+            self.stream.write('\n')
+        self.stream.flush()
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+            os.replace(self.partial_file, self.output_file)
+        else:
+            self.stream.flush()
+
+    def abort(self):
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class _SqliteSink:
+    """
+    Writes courses into an indexed SQLite catalog, committing after every page.
+
+    Rows go into <output_file>.partial, which replaces output_file on close
+    once the full-text index is built, so an interrupted scrape can resume
+    from it and readers never see a half-built catalog.
+    """
+
+    def __init__(self, output_file, resume_count=None):
+        self.output_file = output_file
+        self.partial_file = f"{output_file}.partial"
+        if resume_count is None and os.path.exists(self.partial_file):
+            os.remove(self.partial_file)
+        self.db = sqlite3.connect(self.partial_file)
+        self.db.executescript(SQLITE_SCHEMA)
+        self._written = []
+        if resume_count is not None:
+            # Drop anything written after the last checkpoint
+            with self.db:
+                self.db.execute("DELETE FROM courses WHERE id > ?", (resume_count,))
+            rows = self.db.execute(f"SELECT id, {', '.join(SQLITE_COLUMNS)} FROM courses ORDER BY id").fetchall()
+            if len(rows) != resume_count:
+                raise RuntimeError(f"{self.partial_file} has fewer records than the checkpoint expects ({resume_count})")
+            self._written = [(row[0], Course.from_dict(course_from_row(row[1:]))) for row in rows]
+        self.previous = [course for _, course in self._written]
+
+    def write_page(self, page_courses):
+        insert = (f"INSERT INTO courses ({', '.join(SQLITE_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' for _ in SQLITE_COLUMNS)})")
+        with self.db:
+            for course in page_courses:
+                cursor = self.db.execute(insert, course_row(course))
+                self._written.append((cursor.lastrowid, course))
+
+    def close(self):
+        with self.db:
+            # Sections folded into an offering after its page was written
+            self.db.executemany("UPDATE courses SET sections = ? WHERE id = ?",
+                                ((json.dumps(course.sections or [], ensure_ascii=False), rowid)
+                                 for rowid, course in self._written))
+            self.db.execute("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+        self.db.execute("ANALYZE")
+        self.db.close()
+        os.replace(self.partial_file, self.output_file)
+
+    def abort(self):
+        self.db.close()
+
+
+def _write_json_atomic(data, path):
+    """Write JSON via a temp file and rename, so readers never see a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _checkpoint_path(output_file):
+    return f"{output_file}.checkpoint.json"
+
+
+def _metrics_path(output_file):
+    if output_file == '-':
+        return 'ucsc_courses.metrics.json'
+    return f"{output_file}.metrics.json"
+
+
+@contextlib.contextmanager
+def _instrumented(metrics, metrics_file=None, profile_file=None, **info):
+    """
+    Write the metrics report and cProfile stats once the body finishes.
+
+    Both are written even when the scrape fails, with the report's status
+    set to 'failed'. The profiler only sees the calling thread, so sharded
+    workers show up as time spent waiting on them.
+    """
+    profiler = None
+    if profile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    status = 'failed'
+    try:
+        yield
+        status = 'ok'
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+            print(f"📈 Saved profile to {profile_file} (inspect with: python3 -m pstats {profile_file})")
+        if metrics_file:
+            report = metrics.report(status=status, finished_at=datetime.now().isoformat(timespec='seconds'), **info)
+            _write_json_atomic(report, metrics_file)
+            counts = [f"{report['counters'][name]} {name.replace('_', ' ')}"
+                      for name in ('http_requests', 'driver_commands', 'selector_fallbacks', 'detail_requests',
+                                   'cache_hits', 'retries', 'rate_backoffs')
+                      if name in report['counters']]
+            summary = ', '.join([f"{report['wall_seconds']:.1f}s wall"] + counts)
+            print(f"⏱️  Saved metrics to {metrics_file} ({summary})")
+
+
+def _load_checkpoint(path, term, output_format):
+    """Load a checkpoint, refusing one written for a different term or output format."""
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('term') != term:
+        raise ValueError(f"Checkpoint {path} is for term {state.get('term')!r}, not {term!r}")
+    if state.get('output_format') != output_format:
+        raise ValueError(f"Checkpoint {path} was written for {state.get('output_format')} output, not {output_format}")
+    if not state.get('form_state'):
+        raise ValueError(f"Checkpoint {path} has no pagination state to resume from")
+    return state
+
+
+def _output_format(output_file, output_format=None):
+    """Pick the output format: explicit, then by extension (.ndjson/.jsonl, .sqlite/.sqlite3/.db), else json."""
+    if output_format:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
+        return output_format
+    if output_file == '-' or output_file.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if output_file.endswith(('.sqlite', '.sqlite3', '.db')):
+        return 'sqlite'
+    return 'json'
+
+
+def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screenshot_on_error=False,
+                        engine='selenium', workers=1, subjects=None, term=DEFAULT_TERM, output_format=None,
+                        checkpoint=True, resume=False, metrics_file=None, profile_file=None, enrich=False,
+                        enrich_concurrency=8, enrich_rate=5.0, cache=None, max_concurrency=None, retries=3,
+                        archive=None):
     """
     Scrape UCSC courses and save to JSON file.
-    
+
     Args:
-        output_file: Path to output JSON file
+        output_file: Path to output JSON file, or '-' to stream NDJSON to stdout
+            (progress messages then go to stderr)
         verbose: Print detailed debugging information
-        screenshot_on_error: Take screenshot when errors occur
+        screenshot_on_error: Take screenshot when errors occur (selenium engine only)
+        engine: 'selenium' to drive headless Chrome, or 'http' to post the
+            search form directly without a browser
+        workers: Number of parallel workers; more than 1 (or a subject list)
+            shards the search by subject
+        subjects: Optional list of subject codes to scrape, one shard each
+        term: Term to scrape, e.g. "2026 Winter"
+        output_format: 'json' (one array written at the end), 'ndjson' (one
+            object per line, flushed after every page) or 'sqlite' (an
+            indexed catalog with full-text search, see query_courses.py);
+            inferred from the file extension when omitted
+        checkpoint: Record progress in <output_file>.checkpoint.json after
+            every page (unsharded file output only); removed on success
+        resume: Continue from the checkpoint a failed run left behind
+        metrics_file: Write a JSON report here with wall time per phase,
+            fetch and parse time per page, WebDriver command counts and
+            selector fallbacks taken
+        profile_file: Run the scrape under cProfile and dump the stats here
+        enrich: Follow each offering's course_link and merge in the detail
+            page fields its sections share (description, requirements, credits, ...)
+        enrich_concurrency: Detail pages fetched at once when enriching
+        enrich_rate: Detail requests per second per host when enriching
+        cache: ResponseCache to fetch pages through (http engine and
+            enrichment only); in replay mode nothing touches the network
+        max_concurrency: Most requests let into flight at once, across
+            workers and enrichment; below that the concurrency adapts to how
+            pisa is coping (None: no fixed cap)
+        retries: Times a request is retried after a timeout, dropped
+            connection, 429 or 5xx
+        archive: PageArchive to save every raw results page in, for
+            re-extracting later with reextract_archive.py
     """
+    output_format = _output_format(output_file, output_format)
+    metrics = ScrapeMetrics()
+    if cache is not None:
+        cache.metrics = metrics
+    controller = FetchController(max_concurrency=max_concurrency, retries=retries, verbose=verbose,
+                                 metrics=metrics)
+    instrumented = _instrumented(metrics, metrics_file, profile_file, term=term, engine=engine,
+                                 workers=workers, subjects=subjects, output_file=output_file)
+    enricher = None
+    if enrich:
+        enricher = DetailEnricher(enrich_concurrency, enrich_rate, verbose=verbose, metrics=metrics, cache=cache,
+                                  controller=controller)
+    if output_file == '-':
+        if output_format != 'ndjson':
+            raise ValueError("Only ndjson output can be streamed to stdout")
+        if resume:
+            raise ValueError("Can't resume a scrape streamed to stdout")
+        sink = _NdjsonSink(output_file, stream=sys.stdout)
+        with contextlib.redirect_stdout(sys.stderr), instrumented:
+            return _run_scrape(sink, verbose, screenshot_on_error, engine, workers, subjects, term,
+                               metrics=metrics, enricher=enricher, cache=cache, controller=controller,
+                               archive=archive)
+
+    checkpoint_path = None
+    state = None
+    if checkpoint or resume:
+        if workers > 1 or subjects:
+            if resume:
+                raise ValueError("Sharded scrapes can't be resumed from a checkpoint")
+        else:
+            checkpoint_path = _checkpoint_path(output_file)
+    if resume:
+        if os.path.exists(checkpoint_path):
+            state = _load_checkpoint(checkpoint_path, term, output_format)
+            print(f"♻️  Resuming {term} after page {state['page']} ({state['records']} courses already saved)")
+        else:
+            print(f"⚠️  No checkpoint at {checkpoint_path}, starting from page 1")
+
+    resume_count = state['records'] if state else None
+    if output_format == 'ndjson':
+        sink = _NdjsonSink(output_file, resume_count=resume_count)
+    elif output_format == 'sqlite':
+        sink = _SqliteSink(output_file, resume_count=resume_count)
+    else:
+        sink = _JsonSink(output_file, spool=checkpoint_path is not None, resume_count=resume_count)
+    with instrumented:
+        return _run_scrape(sink, verbose, screenshot_on_error, engine, workers, subjects, term,
+                           checkpoint_path=checkpoint_path, resume_state=state, output_format=output_format,
+                           metrics=metrics, enricher=enricher, cache=cache, controller=controller,
+                           archive=archive)
+
+
+def _run_scrape(sink, verbose, screenshot_on_error, engine, workers, subjects, term,
+                checkpoint_path=None, resume_state=None, output_format=None, metrics=None, enricher=None,
+                cache=None, controller=None, archive=None):
     print("🚀 Starting UCSC course scraper...\n")
-    
+    metrics = metrics or ScrapeMetrics()
+    enriched = 0
+
+    all_courses = list(sink.previous)
+    # Offerings held back at the last checkpoint weren't written yet
+    pending = [Course.from_dict(data) for data in (resume_state or {}).get('pending', [])]
+    index = OfferingIndex(all_courses, pending=pending)
+    sections = sum(len(course.sections) for course in pending)
+    try:
+        pages = _iter_pages(engine, term=term, workers=workers, subjects=subjects, verbose=verbose,
+                            screenshot_on_error=screenshot_on_error, resume=resume_state, metrics=metrics,
+                            cache=cache, controller=controller, archive=archive)
+        for page, offerings in _offering_batches(pages, index, metrics):
+            if enricher is not None:
+                with metrics.phase('enrich'):
+                    enriched += enricher.enrich(offerings)
+            with metrics.phase('write'):
+                sink.write_page(offerings)
+            all_courses.extend(offerings)
+            if page is None:
+                continue
+            sections += len(page.courses)
+            if checkpoint_path and page.form_state:
+                with metrics.phase('checkpoint'):
+                    _write_json_atomic({
+                        'term': term,
+                        'quarter': page.quarter,
+                        'status': page.status,
+                        'engine': engine,
+                        'output_format': output_format,
+                        'page': page.number,
+                        'records': len(all_courses),
+                        'pending': [course.to_dict() for course in index.pending],
+                        'form_state': page.form_state,
+                        'updated_at': datetime.now().isoformat(timespec='seconds'),
+                    }, checkpoint_path)
+    except Exception as e:
+        # The previous output is left as it was; pages already scraped stay
+        # in the .partial file for --resume
+        sink.abort()
+        if enricher is not None:
+            enricher.close()
+        if isinstance(e, IncompleteScrape):
+            print(f"\n❌ Incomplete scrape, output not replaced: {e}")
+        elif engine == 'http' and workers <= 1 and not subjects:
+            # The selenium engine and sharded workers report their own errors
+            print(f"\n❌ Fatal error: {e}")
+            if verbose:
+                import traceback
+                traceback.print_exc()
+        raise
+
+    if index.late:
+        print(f"\n⚠️  {index.late} section(s) were listed after their offering was written; "
+              f"they're missing from streamed output")
+    metrics.count('sections', sections)
+    metrics.count('offerings', len(all_courses) - len(sink.previous))
+    print(f"\n✅ Found {len(all_courses)} total courses\n")
+    if sections > len(all_courses) - len(sink.previous):
+        print(f"   ({sections} sections folded into {len(all_courses) - len(sink.previous)} offerings)\n")
+    if enricher is not None:
+        enricher.close()
+        print(f"🔎 Enriched {enriched} offerings from their detail pages\n")
+
+    # Save to JSON
+    print(f"💾 Saving to {sink.output_file}...")
+    with metrics.phase('write'):
+        sink.close()
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    print(f"✅ Saved {len(all_courses)} courses to {sink.output_file}")
+
+    # Show sample
+    if all_courses:
+        print("\n📋 Sample courses:")
+        for i, course in enumerate(all_courses[:5], 1):
+            print(f"   {i}. {course.name} ({course.subject}) - {course.professor} - {course.quarter}")
+        if len(all_courses) > 5:
+            print(f"   ... and {len(all_courses) - 5} more")
+    else:
+        print("\n⚠️  No courses were scraped. The page structure may have changed.")
+        print("💡 Try running with --verbose flag to see debugging information")
+        if screenshot_on_error:
+            print("💡 Screenshots may have been saved for debugging")
+
+    return all_courses
+
+
+# URL patterns a driver started with block_assets never loads
+BLOCKED_ASSETS = ['*.css', '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp',
+                  '*.woff', '*.woff2', '*.ttf']
+
+
+def _start_driver(metrics=None, block_assets=False):
+    """
+    Start a headless Chrome WebDriver.
+
+    With metrics, the startup time is recorded and every WebDriver command
+    the driver (or any element it returns) sends is counted. block_assets
+    stops it loading images, stylesheets and fonts, which the scraper never
+    looks at.
+    """
+    if webdriver is None:
+        raise RuntimeError("The selenium engine needs the 'selenium' package (pip install -r scripts/requirements.txt)")
+
     # Setup Chrome options
     options = webdriver.ChromeOptions()
     options.add_argument('--headless')
@@ -33,25 +2586,274 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
     options.add_argument('--disable-dev-shm-usage')
     options.add_argument('--disable-gpu')
     options.add_argument('--window-size=1920,1080')
-    
-    driver = webdriver.Chrome(options=options)
-    wait = WebDriverWait(driver, 20)
-    
+    if block_assets:
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    with metrics.phase('driver_startup') if metrics is not None else contextlib.nullcontext():
+        driver = webdriver.Chrome(options=options)
+        if block_assets:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_ASSETS})
+    if metrics is None:
+        return driver
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        metrics.count_command(driver_command)
+        return execute(driver_command, params)
+
+    # WebElements send their commands through their parent driver's execute
+    driver.execute = counted_execute
+    return driver
+
+
+# Where the selenium engine remembers which selector found each form element
+# (PISA_SELECTOR_CACHE overrides it)
+SELECTOR_CACHE_FILE = os.environ.get('PISA_SELECTOR_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')), 'studia', 'pisa_selectors.json')
+
+
+class SelectorCache:
+    """
+    Remembers, across runs, which selector found each search form element.
+
+    Stored as a small JSON file mapping an element's name (e.g.
+    "status_select") to its [by, value] selector. Safe to share between
+    sharded browsers; save() only writes when something changed.
+
+    Args:
+        path: JSON file to load from and save to (None: this run only)
+    """
+
+    def __init__(self, path=SELECTOR_CACHE_FILE):
+        self.path = path
+        self.selectors = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.selectors = {name: tuple(selector) for name, selector in json.load(f).items()}
+            except (OSError, ValueError, TypeError) as e:
+                print(f"⚠️  Ignoring unreadable selector cache {path}: {e}")
+
+    def get(self, name):
+        with self._lock:
+            return self.selectors.get(name)
+
+    def remember(self, name, selector):
+        """Record the selector that found name; returns the one it replaces, if it changed."""
+        with self._lock:
+            previous = self.selectors.get(name)
+            if previous != tuple(selector):
+                self.selectors[name] = tuple(selector)
+                self._dirty = True
+            return previous
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            _write_json_atomic({name: list(selector) for name, selector in sorted(self.selectors.items())}, self.path)
+            self._dirty = False
+
+
+# Returns [index, element] for the first selector that matches (and, when
+# arguments[1] is set, is visible and enabled), or null
+_FIRST_MATCH_JS = """
+var selectors = arguments[0], clickable = arguments[1];
+for (var i = 0; i < selectors.length; i++) {
+    var by = selectors[i][0], value = selectors[i][1], el = null;
+    try {
+        if (by === 'id') el = document.getElementById(value);
+        else if (by === 'name') el = document.getElementsByName(value)[0] || null;
+        else if (by === 'css selector') el = document.querySelector(value);
+        else if (by === 'xpath') el = document.evaluate(value, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {
+        el = null;
+    }
+    if (el && (!clickable || (el.getClientRects().length && !el.disabled))) return [i, el];
+}
+return null;
+"""
+
+
+def _resolve_element(driver, name, selectors, probe, selector_cache, metrics, verbose=False, clickable=False):
+    """
+    Find a search form element by the first of selectors that matches.
+
+    The selector that worked last time (from selector_cache) is tried first,
+    with the probe wait in case the page is still rendering. If it misses,
+    every other selector is checked at once in one batched DOM query, so
+    markup drift costs one round trip instead of a timeout per selector.
+    A different winner than last time is logged and remembered.
+
+    Returns:
+        The element, or None when no selector matches
+    """
+    remembered = selector_cache.get(name)
+    ordered = list(selectors)
+    if remembered in ordered:
+        ordered.remove(remembered)
+        ordered.insert(0, remembered)
+    condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
     try:
-        print("📄 Navigating to UCSC class search page...")
-        driver.get('https://pisa.ucsc.edu/class_search/index.php')
-        
-        # Wait for page to load - check for key elements
-        print("⏳ Waiting for page to load...")
+        element = probe.until(condition(ordered[0]))
+        found = ordered[0]
+    except (TimeoutException, NoSuchElementException):
+        match = driver.execute_script(_FIRST_MATCH_JS, [list(selector) for selector in ordered[1:]], clickable)
+        if not match:
+            metrics.count('selector_fallbacks', len(ordered))
+            return None
+        index, element = match
+        found = ordered[1 + index]
+        metrics.count('selector_fallbacks', 1 + index)
+    if found != (remembered or selectors[0]):
+        print(f"🔁 Re-resolved {name.replace('_', ' ')}: {found[0]} {found[1]!r} "
+              f"(was {(remembered or selectors[0])[1]!r})")
+    elif verbose:
+        print(f"   Found {name.replace('_', ' ')} using {found[0]}: {found[1]}")
+    selector_cache.remember(name, found)
+    return element
+
+
+_PANEL_CSS = "div.panel.panel-default.row[id^='rowpanel_']"
+
+
+class _ResultsSettled:
+    """
+    WebDriverWait condition: the document has finished loading and its
+    course panel count held steady across two polls. The final count is
+    left in .count, so an empty last page still counts as ready.
+    """
+
+    def __init__(self):
+        self.count = None
+
+    def __call__(self, driver):
+        count = driver.execute_script(
+            "return document.readyState === 'complete' ? document.querySelectorAll(arguments[0]).length : -1;",
+            _PANEL_CSS)
+        settled = count >= 0 and count == self.count
+        self.count = count
+        return settled
+
+
+def _wait_for_results(driver, pacer, metrics, controller, page_num):
+    """
+    Wait for a results page to settle and return its course panel count.
+
+    A page still loading when the pacer's timeout runs out is waited on
+    again, as controller allows, after the time it took is folded into the
+    pacer so the next wait is longer. A page that never settles raises
+    IncompleteScrape rather than passing for one with no results.
+    """
+    settled = _ResultsSettled()
+    attempt = 0
+    while True:
+        started = time.perf_counter()
         try:
-            # Wait for any form element to appear
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "form")))
-            print("✅ Page loaded")
-        except TimeoutException:
-            print("⚠️  Form not found, but continuing...")
-            if screenshot_on_error:
-                driver.save_screenshot('error_no_form.png')
-                print("   Screenshot saved to error_no_form.png")
+            with metrics.phase('wait'):
+                pacer.waiter(driver).until(settled)
+            return settled.count
+        except TimeoutException as e:
+            pacer.observe(time.perf_counter() - started)
+            if not controller.should_retry(e, attempt):
+                raise IncompleteScrape(f"Results page {page_num} didn't finish loading after "
+                                       f"{attempt + 1} wait(s)", [page_num]) from e
+            attempt += 1
+
+
+def _submit_and_wait(driver, pacer, submit, metrics, controller=None):
+    """
+    Run submit() and wait for the current document to be replaced.
+
+    The old <html> element going stale marks the moment the server's
+    response arrives, so that wait doubles as a response-time sample for
+    the pacer. The round trip runs as one controller request, so a timeout
+    backs the whole scrape off, and it's retried as controller allows, the
+    same as an HTTP request in _fetch. A retry first checks whether the
+    page was replaced during the backoff (the response was just slow);
+    otherwise submit() runs again on the unchanged page. Once retries run
+    out the error is raised.
+    """
+    attempt = 0
+    with metrics.phase('navigation'):
+        old_root = driver.find_element(By.TAG_NAME, "html")
+        while True:
+            try:
+                with _request_slot(controller):
+                    if attempt and EC.staleness_of(old_root)(driver):
+                        return
+                    submit()
+                    pacer.wait_for(driver, EC.staleness_of(old_root))
+                return
+            except Exception as e:
+                if controller is None or not controller.should_retry(e, attempt):
+                    raise
+                attempt += 1
+
+
+def _iter_selenium_pages(verbose=False, screenshot_on_error=False, term=DEFAULT_TERM, subject=None, driver=None,
+                         resume=None, pacer=None, metrics=None, controller=None, selector_cache=None,
+                         navigate=True, archive=None):
+    """
+    Scrape results pages in headless Chrome, yielding a ResultsPage as each one is parsed.
+
+    A driver passed in is reused and left running; otherwise one is started
+    and quit when the scrape finishes. resume is a checkpoint dict; the
+    scrape skips ahead to the page after the one it records. Waits fire on
+    readiness signals rather than fixed sleeps, and the idle time between
+    pages comes from pacer (an AdaptivePacer). Timings and selector
+    fallbacks are recorded in metrics; WebDriver commands are only counted
+    for drivers started with it. Page loads go through controller, a
+    FetchController that sharded browsers share. Form elements are found
+    with the selectors that worked last time, from selector_cache (a
+    SelectorCache; by default the one saved in SELECTOR_CACHE_FILE).
+    navigate=False configures the search on the page the driver is already
+    on, for a driver left waiting on the search form. Every results page is
+    also saved to archive (a PageArchive) when given.
+    """
+    metrics = metrics or ScrapeMetrics()
+    controller = controller or FetchController(verbose=verbose, metrics=metrics)
+    selector_cache = selector_cache or SelectorCache()
+    owns_driver = driver is None
+    if owns_driver:
+        driver = _start_driver(metrics)
+    pacer = pacer or AdaptivePacer()
+    wait = pacer.waiter(driver)
+    
+    try:
+        phase_started = time.perf_counter()
+        if navigate:
+            print("📄 Navigating to UCSC class search page...")
+            attempt = 0
+            while True:
+                try:
+                    with controller.request():
+                        driver.get(SEARCH_URL)
+                    break
+                except Exception as e:
+                    if not controller.should_retry(e, attempt):
+                        raise
+                    attempt += 1
+            pacer.observe(time.perf_counter() - phase_started)
+
+            # Wait for page to load - check for key elements
+            print("⏳ Waiting for page to load...")
+            try:
+                # Wait for any form element to appear
+                wait.until(EC.presence_of_element_located((By.TAG_NAME, "form")))
+                print("✅ Page loaded")
+            except TimeoutException:
+                print("⚠️  Form not found, but continuing...")
+                if screenshot_on_error:
+                    driver.save_screenshot('error_no_form.png')
+                    print("   Screenshot saved to error_no_form.png")
+            metrics.add_time('form_load', time.perf_counter() - phase_started)
+        phase_started = time.perf_counter()
         
         if verbose:
             print(f"   Page title: {driver.title}")
@@ -59,8 +2861,13 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
         
         print("⚙️  Configuring search parameters...")
         
+        # The form has loaded by now, so each fallback selector only needs a
+        # short look rather than a full page-load timeout
+        probe = pacer.waiter(driver, pacer.probe_timeout)
+        
         # Find status select element with multiple strategies
         status_select = None
+        selected_status = None
         status_selectors = [
             (By.NAME, "binds[:reg_status]"),
             (By.ID, "reg_status"),
@@ -70,15 +2877,10 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
             (By.ID, "status"),  # Fallback
         ]
         
-        for selector_type, selector_value in status_selectors:
-            try:
-                element = wait.until(EC.presence_of_element_located((selector_type, selector_value)))
-                status_select = Select(element)
-                if verbose:
-                    print(f"   Found status select using {selector_type}: {selector_value}")
-                break
-            except (TimeoutException, NoSuchElementException):
-                continue
+        element = _resolve_element(driver, 'status_select', status_selectors, probe, selector_cache, metrics,
+                                   verbose)
+        if element is not None:
+            status_select = Select(element)
         
         if status_select is None:
             print("⚠️  Could not find status select element")
@@ -94,13 +2896,13 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                 driver.save_screenshot('error_no_status_select.png')
         else:
             # Change status from "Open Classes" to "All Classes"
-            status_values = ['all', 'All Classes', 'ALL', '1', '0']
             status_set = False
-            for value in status_values:
+            for value in STATUS_VALUES:
                 try:
                     status_select.select_by_value(value)
                     if status_select.first_selected_option.get_attribute('value') == value:
                         print(f"✅ Changed status to 'All Classes' (value: {value})")
+                        selected_status = value
                         status_set = True
                         break
                 except:
@@ -111,6 +2913,7 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                 try:
                     status_select.select_by_visible_text("All Classes")
                     print("✅ Changed status to 'All Classes' (by text)")
+                    selected_status = status_select.first_selected_option.get_attribute('value')
                     status_set = True
                 except:
                     pass
@@ -119,7 +2922,7 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                 print("⚠️  Could not set status to 'All Classes', continuing anyway...")
         
         # Find term select element with multiple strategies
-        selected_quarter = "2026 Winter"
+        selected_quarter = term
         term_select = None
         term_selectors = [
             (By.NAME, "binds[:term]"),
@@ -130,15 +2933,9 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
             (By.ID, "term"),  # Fallback
         ]
         
-        for selector_type, selector_value in term_selectors:
-            try:
-                element = wait.until(EC.presence_of_element_located((selector_type, selector_value)))
-                term_select = Select(element)
-                if verbose:
-                    print(f"   Found term select using {selector_type}: {selector_value}")
-                break
-            except (TimeoutException, NoSuchElementException):
-                continue
+        element = _resolve_element(driver, 'term_select', term_selectors, probe, selector_cache, metrics, verbose)
+        if element is not None:
+            term_select = Select(element)
         
         if term_select is None:
             print("⚠️  Could not find term select element")
@@ -163,37 +2960,32 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                 for i, (val, text) in enumerate(zip(term_options[:5], term_texts[:5])):
                     print(f"     Option {i+1}: value='{val}', text='{text}'")
             
-            # Find "2026 Winter Quarter" option
-            winter_2026_idx = None
-            for idx, text in enumerate(term_texts):
-                if '2026' in text and 'Winter' in text:
-                    winter_2026_idx = idx
-                    break
-            
-            if winter_2026_idx is not None:
-                term_select.select_by_index(winter_2026_idx)
-                print(f"✅ Set term to '2026 Winter Quarter'")
+            # Find the requested term option (e.g. "2026 Winter Quarter")
+            term_idx = _find_term_index(term_texts, term)
+
+            if term_idx is not None:
+                term_select.select_by_index(term_idx)
+                print(f"✅ Set term to '{term_texts[term_idx]}'")
                 # Extract quarter format
-                selected_text = term_texts[winter_2026_idx]
-                match = re.search(r'(\d{4})\s+(Winter|Spring|Summer|Fall)', selected_text)
-                if match:
-                    selected_quarter = f"{match.group(1)} {match.group(2)}"
+                selected_quarter = _extract_quarter(term_texts[term_idx]) or selected_quarter
             else:
                 # Use current selection
                 try:
                     current_text = term_select.first_selected_option.text
                     print(f"📅 Current term: {current_text}")
-                    match = re.search(r'(\d{4})\s+(Winter|Spring|Summer|Fall)', current_text)
-                    if match:
-                        selected_quarter = f"{match.group(1)} {match.group(2)}"
+                    selected_quarter = _extract_quarter(current_text) or selected_quarter
                     print(f"⚠️  Using current selection, quarter: {selected_quarter}")
                 except:
                     print("⚠️  Could not determine current term")
         
+        if subject:
+            # Restrict the search to one subject (sharded scrapes)
+            Select(driver.find_element(By.NAME, "binds[:subject]")).select_by_value(subject)
+            print(f"✅ Set subject to '{subject}'")
+        
         print("🔍 Submitting search form...")
         
         # Find and click search button with multiple strategies
-        search_clicked = False
         search_button_selectors = [
             (By.CSS_SELECTOR, 'input[type="submit"][value="Search"]'),
             (By.CSS_SELECTOR, 'input.btn.btn-lg.btn-primary[value="Search"]'),
@@ -204,216 +2996,94 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
             (By.XPATH, '//button[@type="submit"]'),
         ]
         
-        for selector_type, selector_value in search_button_selectors:
-            try:
-                search_button = wait.until(EC.element_to_be_clickable((selector_type, selector_value)))
-                search_button.click()
-                search_clicked = True
-                if verbose:
-                    print(f"   Clicked search button using {selector_type}: {selector_value}")
-                break
-            except (TimeoutException, NoSuchElementException):
-                continue
+        metrics.add_time('form_config', time.perf_counter() - phase_started)
+        fetch_started = time.perf_counter()
+        
+        search_button = _resolve_element(driver, 'search_button', search_button_selectors, probe, selector_cache,
+                                         metrics, verbose, clickable=True)
+        submit_search = None
+        if search_button is not None:
+            submit_search = search_button.click
+        selector_cache.save()
         
-        if not search_clicked:
+        if submit_search is None:
             # Try submitting form directly
             try:
                 form = driver.find_element(By.TAG_NAME, "form")
-                driver.execute_script("arguments[0].submit();", form)
-                print("✅ Submitted form via JavaScript")
-                search_clicked = True
+                submit_search = lambda: driver.execute_script("arguments[0].submit();", form)
+                metrics.count('selector_fallbacks')
+                print("✅ Submitting form via JavaScript")
             except Exception as e:
                 print(f"⚠️  Could not submit form: {e}")
                 if screenshot_on_error:
                     driver.save_screenshot('error_form_submit.png')
         
-        if search_clicked:
-            # Wait for navigation/URL change or results to load
+        if submit_search is not None:
+            # Wait for the search form to be replaced by the results page
             print("📊 Waiting for results to load...")
-            try:
-                # Wait for URL to change or for course panels to appear
-                wait.until(lambda d: d.current_url != 'https://pisa.ucsc.edu/class_search/index.php' or 
-                          len(d.find_elements(By.CSS_SELECTOR, "div.panel.panel-default.row[id^='rowpanel_']")) > 0)
-                time.sleep(2)  # Additional wait for dynamic content
-                print("✅ Results page loaded")
-            except TimeoutException:
-                print("⚠️  Timeout waiting for results, but continuing...")
-                time.sleep(3)
+            _submit_and_wait(driver, pacer, submit_search, metrics, controller)
+            print("✅ Results page loaded")
         
         if verbose:
             print(f"   Current URL: {driver.current_url}")
             print(f"   Page title: {driver.title}")
         
-        all_courses = []
         page_num = 1
-        max_pages = 100  # Safety limit
+        max_pages = MAX_PAGES
+        
+        if resume:
+            # Restore the saved resultsForm fields and ask for the page after them
+            print(f"⏩ Skipping ahead to page {resume['page'] + 1}...")
+            fetch_started = time.perf_counter()
+            _submit_and_wait(driver, pacer, lambda: driver.execute_script("""
+                var form = document.resultsForm;
+                arguments[0].forEach(function (field) {
+                    var input = form.elements[field[0]];
+                    if (!input) {
+                        input = document.createElement('input');
+                        input.type = 'hidden';
+                        input.name = field[0];
+                        form.appendChild(input);
+                    }
+                    input.value = field[1];
+                });
+                form.action.value = 'next';
+                form.submit();
+            """, resume['form_state']), metrics, controller)
+            page_num = resume['page'] + 1
         
         while page_num <= max_pages:
             print(f"   Parsing page {page_num}...")
             
-            # Wait for course panels to load
-            try:
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.panel.panel-default.row")))
-                time.sleep(1)  # Additional wait for dynamic content
-            except TimeoutException:
+            # Wait for the page to finish loading and its panel count to settle
+            panels = _wait_for_results(driver, pacer, metrics, controller, page_num)
+            if panels < 1:
                 print("⚠️  No course panels found on this page")
                 if screenshot_on_error:
                     driver.save_screenshot(f'error_no_panels_page_{page_num}.png')
+                if page_num > 1:
+                    # A 'next' link led here, so the page should have had results
+                    raise IncompleteScrape(f"Results page {page_num} had no course panels", [page_num])
                 break
             
-            # Extract courses from current page
+            # Extract courses from current page: one page_source fetch, parsed
+            # offline, instead of a WebDriver round trip per panel field
             try:
-                # Find all course panels
-                panels = driver.find_elements(By.CSS_SELECTOR, "div.panel.panel-default.row[id^='rowpanel_']")
-                page_courses = []
-                
-                if verbose:
-                    print(f"     Found {len(panels)} course panels on page {page_num}")
-                
-                for panel in panels:
-                    try:
-                        # Extract course name from h2 link
-                        course_name_full = ""
-                        course_link = None
-                        try:
-                            h2_link = panel.find_element(By.CSS_SELECTOR, "div.panel-heading h2 a")
-                            course_name_full = h2_link.text.strip()
-                            href = h2_link.get_attribute('href')
-                            if href:
-                                if href.startswith('http'):
-                                    course_link = href
-                                else:
-                                    course_link = f"https://pisa.ucsc.edu{href}"
-                        except NoSuchElementException:
-                            # Try alternative selector
-                            try:
-                                h2 = panel.find_element(By.CSS_SELECTOR, "div.panel-heading h2")
-                                course_name_full = h2.text.strip()
-                                # Remove status icon text if present
-                                course_name_full = re.sub(r'^(Open|Closed|Closed with Wait List)\s+', '', course_name_full)
-                            except:
-                                pass
-                        
-                        if not course_name_full:
-                            continue
-                        
-                        # Parse course name: format is "AM 10 - 01    Lin Algebra for Engrs"
-                        # Or "AM 10 - 01&nbsp;&nbsp;&nbsp;Lin Algebra for Engrs"
-                        # Pattern: SUBJECT NUMBER - SECTION    TITLE
-                        course_name_clean = re.sub(r'\s+', ' ', course_name_full)  # Normalize whitespace
-                        course_match = re.match(r'^([A-Z]{2,4})\s+(\d+[A-Z]?)\s*-\s*(\d+)\s+(.+)$', course_name_clean)
-                        if not course_match:
-                            # Try without section: "AM 10 Lin Algebra for Engrs"
-                            course_match = re.match(r'^([A-Z]{2,4})\s+(\d+[A-Z]?)\s+(.+)$', course_name_clean)
-                        
-                        if course_match:
-                            subject = course_match.group(1)
-                            course_num = course_match.group(2)
-                            if len(course_match.groups()) == 4:
-                                section = course_match.group(3)
-                                title = course_match.group(4)
-                            else:
-                                section = "01"
-                                title = course_match.group(3)
-                        else:
-                            # Fallback: try to extract at least subject and number
-                            fallback_match = re.match(r'^([A-Z]{2,4})\s+(\d+[A-Z]?)', course_name_clean)
-                            if fallback_match:
-                                subject = fallback_match.group(1)
-                                course_num = fallback_match.group(2)
-                                title = course_name_clean.replace(f"{subject} {course_num}", "").strip()
-                                if title.startswith('-'):
-                                    title = title[1:].strip()
-                                section = "01"
-                            else:
-                                if verbose:
-                                    print(f"     Could not parse course name: {course_name_full}")
-                                continue
-                        
-                        # Extract professor
-                        professor = "TBA"
-                        try:
-                            # Look for the specific div structure: div with class "col-xs-6 col-sm-3" that contains fa-user icon
-                            # This should be the instructor div, not a parent div
-                            instructor_divs = panel.find_elements(By.XPATH, ".//div[@class='col-xs-6 col-sm-3' and .//i[contains(@class, 'fa-user')]]")
-                            
-                            # If that doesn't work, try a more general approach
-                            if not instructor_divs:
-                                instructor_divs = panel.find_elements(By.XPATH, ".//div[.//i[contains(@class, 'fa-user')]]")
-                            
-                            for div in instructor_divs:
-                                # Get the full text of the div
-                                full_text = div.text.strip()
-                                
-                                # Skip if this div contains "Class Number:" - we want the instructor div, not the class number div
-                                if 'Class Number:' in full_text:
-                                    continue
-                                
-                                # The div structure is: <i class="fa fa-user"></i><i class="sr-only">Instructor:</i> Name
-                                # Remove "Instructor:" label if present (from sr-only element)
-                                instructor_text = re.sub(r'^Instructor:?\s*', '', full_text, flags=re.IGNORECASE)
-                                instructor_text = instructor_text.strip()
-                                
-                                # If there are still newlines or unwanted text, extract just the name part
-                                if '\n' in instructor_text:
-                                    # Split by newline and find the line that looks like a name
-                                    lines = instructor_text.split('\n')
-                                    for line in lines:
-                                        line = line.strip()
-                                        # Skip empty lines and lines with labels
-                                        if not line or 'Instructor:' in line.lower() or 'Class Number' in line:
-                                            continue
-                                        # Check if this looks like a name (starts with capital letter, reasonable length)
-                                        if re.match(r'^[A-Z][a-z]+', line) and len(line) > 2 and len(line) < 100:
-                                            instructor_text = line
-                                            break
-                                
-                                # Clean up: remove extra whitespace
-                                instructor_text = re.sub(r'\s+', ' ', instructor_text).strip()
-                                
-                                # Validate it looks like a name
-                                if instructor_text and instructor_text.lower() != 'tba':
-                                    # Should start with capital letter and be reasonable length
-                                    if re.match(r'^[A-Z]', instructor_text) and len(instructor_text) > 2 and len(instructor_text) < 100:
-                                        professor = instructor_text
-                                        break
-                        except NoSuchElementException:
-                            # Try alternative: look for any text that looks like a name in panel body
-                            try:
-                                panel_body = panel.find_element(By.CSS_SELECTOR, "div.panel-body")
-                                # Look for pattern like "Ioannidis,N." or "Last,First" or "Last First"
-                                # Find text that looks like a name after "Instructor:" or standalone
-                                name_pattern = re.search(r'(?:Instructor:?\s*)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,[A-Z]\.?)?)', panel_body.text)
-                                if name_pattern:
-                                    potential_name = name_pattern.group(1).strip()
-                                    # Make sure it's not part of "Class Number:" or other labels
-                                    if 'Class Number' not in potential_name and len(potential_name) > 2:
-                                        professor = potential_name
-                            except:
-                                pass
-                        
-                        # Build full course name
-                        course_name = f"{subject} {course_num} - {title}"
-                        
-                        # Check for duplicates
-                        if not any(c['name'] == course_name and 
-                                  c['professor'] == professor and 
-                                  c['quarter'] == selected_quarter 
-                                  for c in page_courses):
-                            page_courses.append({
-                                'name': course_name,
-                                'subject': subject,
-                                'professor': professor,
-                                'quarter': selected_quarter,
-                                'course_link': course_link
-                            })
-                    
-                    except Exception as e:
-                        if verbose:
-                            print(f"     Error parsing panel: {e}")
-                        continue
+                with metrics.phase('page_source'):
+                    html = driver.page_source
+                    page_url = driver.current_url
+                if archive is not None:
+                    with metrics.phase('archive'):
+                        archive.save(selected_quarter, subject, page_num, html, page_url)
+                parse_started = time.perf_counter()
+                document = parse_html(html)
+                page_courses = _courses_from_document(document, selected_quarter,
+                                                      page_url=page_url, verbose=verbose)
+                parse_seconds = time.perf_counter() - parse_started
+                metrics.add_time('parse', parse_seconds)
+                metrics.record_page(page_num, parse_started - fetch_started, parse_seconds,
+                                    len(page_courses), subject)
                 
-                all_courses.extend(page_courses)
                 print(f"   Found {len(page_courses)} courses on page {page_num}")
                 
                 if len(page_courses) == 0:
@@ -427,39 +3097,17 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                     traceback.print_exc()
                 if screenshot_on_error:
                     driver.save_screenshot(f'error_parse_page_{page_num}.png')
-                break
+                raise IncompleteScrape(f"Results page {page_num} could not be parsed: {e}", [page_num]) from e
+            
+            yield ResultsPage(page_num, page_courses, selected_quarter, selected_status,
+                              _results_form_state(document))
             
             # Check for next page and navigate
-            next_found = False
             try:
                 # Look for "next" link in the pagination area
                 next_link = driver.find_element(By.XPATH, "//a[contains(text(), 'next') or contains(text(), 'Next')]")
-                if next_link.is_displayed():
-                    # The link uses onclick to submit a form, so we need to execute the JavaScript
-                    # Or we can find the form and submit it with action='next'
-                    try:
-                        # Find the resultsForm
-                        results_form = driver.find_element(By.NAME, "resultsForm")
-                        # Set the action to 'next'
-                        driver.execute_script("document.resultsForm.action.value = 'next'; document.resultsForm.submit();")
-                        next_found = True
-                        page_num += 1
-                        # Wait for next page to load
-                        time.sleep(2)
-                        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.panel.panel-default.row")))
-                        if verbose:
-                            print(f"     Navigated to page {page_num}")
-                    except Exception as e:
-                        if verbose:
-                            print(f"     Could not submit form for next page: {e}")
-                        # Try clicking the link directly as fallback
-                        try:
-                            next_link.click()
-                            time.sleep(2)
-                            next_found = True
-                            page_num += 1
-                        except:
-                            pass
+                if not next_link.is_displayed():
+                    break
             except NoSuchElementException:
                 # No next link found, we're on the last page
                 if verbose:
@@ -470,33 +3118,31 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                     print(f"     Error checking for next page: {e}")
                 break
             
-            if not next_found:
-                # No next page found
-                break
-        
-        print(f"\n✅ Found {len(all_courses)} total courses\n")
-        
-        # Save to JSON
-        print(f"💾 Saving to {output_file}...")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_courses, f, indent=2, ensure_ascii=False)
-        
-        print(f"✅ Saved {len(all_courses)} courses to {output_file}")
-        
-        # Show sample
-        if all_courses:
-            print("\n📋 Sample courses:")
-            for i, course in enumerate(all_courses[:5], 1):
-                print(f"   {i}. {course['name']} ({course['subject']}) - {course['professor']} - {course['quarter']}")
-            if len(all_courses) > 5:
-                print(f"   ... and {len(all_courses) - 5} more")
-        else:
-            print("\n⚠️  No courses were scraped. The page structure may have changed.")
-            print("💡 Try running with --verbose flag to see debugging information")
-            if screenshot_on_error:
-                print("💡 Screenshots may have been saved for debugging")
-        
-        return all_courses
+            # The link uses onclick to submit a form, so we need to execute the JavaScript
+            # Or we can find the form and submit it with action='next'
+            # Give the server idle time in proportion to how slow it has been
+            delay = pacer.idle()
+            metrics.add_time('pacing', delay)
+            fetch_started = time.perf_counter()
+            if verbose:
+                print(f"     Server response ~{pacer.latency:.2f}s, paced {delay:.2f}s")
+            try:
+                driver.find_element(By.NAME, "resultsForm")
+                # Set the action to 'next' and wait for this page to be replaced
+                submit_next = lambda: driver.execute_script(
+                    "document.resultsForm.action.value = 'next'; document.resultsForm.submit();")
+            except NoSuchElementException:
+                if verbose:
+                    print("     No resultsForm on the page, clicking the 'next' link instead")
+                submit_next = next_link.click
+            # A timeout is retried as controller allows; once retries run out it
+            # ends the scrape with an error rather than quietly stopping here
+            _submit_and_wait(driver, pacer, submit_next, metrics, controller)
+            page_num += 1
+            if verbose:
+                print(f"     Navigated to page {page_num}")
+        if page_num > max_pages:
+            print(f"⚠️  Stopped at the {max_pages}-page safety limit; later pages were not scraped")
         
     except Exception as e:
         print(f"\n❌ Fatal error: {e}")
@@ -511,7 +3157,214 @@ def scrape_ucsc_courses(output_file='ucsc_courses.json', verbose=False, screensh
                 pass
         raise
     finally:
-        driver.quit()
+        if owns_driver:
+            driver.quit()
+
+SEASONS = ('Winter', 'Spring', 'Summer', 'Fall')
+
+# Approximate last day of each quarter (month, day); a term is closed after it
+_TERM_END = {'Winter': (3, 31), 'Spring': (6, 30), 'Summer': (9, 15), 'Fall': (12, 31)}
+
+BACKFILL_MANIFEST = 'backfill_manifest.json'
+
+
+def _term_key(quarter):
+    """Chronological sort key for a quarter string like "2025 Fall"."""
+    year, season = quarter.split()
+    return int(year), SEASONS.index(season)
+
+
+def _term_is_closed(quarter, today=None):
+    """A term is closed (its listings can no longer change) once it has ended."""
+    year, season = quarter.split()
+    month, day = _TERM_END[season]
+    return (today or date.today()) > date(int(year), month, day)
+
+
+def _term_filename(quarter):
+    year, season = quarter.split()
+    return f"{year}_{season.lower()}.json"
+
+
+def list_terms(engine='http', verbose=False, cache=None, controller=None):
+    """
+    Return every term offered by the search form as [(value, text, quarter)].
+
+    quarter is the normalized "YYYY Season" string, or None for options that
+    don't name a quarter. cache is a ResponseCache (http engine only);
+    controller is a FetchController to send the request through.
+    """
+    if engine == 'http':
+        client = PisaHttpClient(verbose=verbose, cache=cache, controller=controller)
+        client.open_search_form()
+        options = client.term_options()
+    else:
+        driver = _start_driver()
+        try:
+            driver.get(SEARCH_URL)
+            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, "binds[:term]")))
+            options = _term_options(parse_html(driver.page_source))
+        finally:
+            driver.quit()
+    return [(value, text, _extract_quarter(text)) for value, text, _ in options]
+
+
+def _select_terms(quarters, spec, source='offered by the search form'):
+    """
+    Pick quarters from spec: "all", a comma-separated list ("2025 Fall,2025 Spring")
+    or an inclusive range ("2024 Fall..2026 Winter"). source says where
+    quarters came from, for the error about a term that isn't among them.
+    """
+    if not spec or spec.strip().lower() == 'all':
+        return list(quarters)
+    if '..' in spec:
+        start, end = (_extract_quarter(part) for part in spec.split('..', 1))
+        if not start or not end:
+            raise ValueError(f"Invalid term range {spec!r} (expected e.g. '2024 Fall..2026 Winter')")
+        low, high = sorted([_term_key(start), _term_key(end)])
+        return [q for q in quarters if low <= _term_key(q) <= high]
+    wanted = []
+    for part in spec.split(','):
+        quarter = _extract_quarter(part)
+        if not quarter:
+            raise ValueError(f"Invalid term {part.strip()!r} (expected e.g. '2025 Fall')")
+        if quarter not in quarters:
+            raise ValueError(f"Term {quarter!r} is not {source}")
+        wanted.append(quarter)
+    return wanted
+
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {'terms': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def backfill_terms(output_dir, terms='all', engine='http', workers=1, verbose=False, screenshot_on_error=False,
+                   force=False, cache=None, max_concurrency=None, retries=3, archive=None):
+    """
+    Scrape a range of terms, writing each one to its own JSON file in output_dir.
+
+    Closed terms never change, so once one is scraped completely it is
+    recorded in backfill_manifest.json and skipped on later runs (unless
+    force is set). Terms that are still open are scraped again every time.
+    A term that loses subjects or pages is left out of the manifest, the
+    remaining terms are still scraped, and IncompleteScrape is raised at
+    the end.
+
+    Args:
+        output_dir: Directory for the per-term files (e.g. 2025_fall.json)
+        terms: "all", a comma-separated list of terms, or a "2024 Fall..2026 Winter" range
+        engine: Fetch engine, 'selenium' or 'http'
+        workers: Parallel workers per term (shards by subject when > 1)
+        verbose: Print detailed debugging information
+        screenshot_on_error: Take screenshots when errors occur (selenium engine only)
+        force: Re-scrape closed terms even if they're already in the manifest
+        cache: ResponseCache to fetch pages through (http engine only)
+        max_concurrency: Most requests in flight at once per term (None: no
+            fixed cap)
+        retries: Times a request is retried after a transient failure
+        archive: PageArchive to save every raw results page in
+
+    Returns:
+        Dict mapping each scraped quarter to its course count
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, BACKFILL_MANIFEST)
+    manifest = _load_manifest(manifest_path)
+
+    print("📅 Listing available terms...")
+    quarters = []
+    for _, _, quarter in list_terms(engine=engine, verbose=verbose, cache=cache,
+                                    controller=FetchController(retries=retries, verbose=verbose)):
+        if quarter and quarter not in quarters:
+            quarters.append(quarter)
+    selected = sorted(_select_terms(quarters, terms), key=_term_key)
+    print(f"   {len(selected)} term(s) selected: {', '.join(selected)}\n")
+
+    scraped = {}
+    incomplete = []
+    for quarter in selected:
+        output_file = os.path.join(output_dir, _term_filename(quarter))
+        entry = manifest['terms'].get(quarter)
+        if entry and not force and os.path.exists(output_file):
+            print(f"⏭️  {quarter}: closed term already scraped ({entry['count']} courses), skipping")
+            continue
+
+        print(f"📆 Backfilling {quarter} -> {output_file}")
+        try:
+            courses = scrape_ucsc_courses(output_file, verbose=verbose, screenshot_on_error=screenshot_on_error,
+                                          engine=engine, workers=workers, term=quarter, cache=cache,
+                                          max_concurrency=max_concurrency, retries=retries, archive=archive)
+        except IncompleteScrape as e:
+            print(f"⚠️  {quarter}: not caching ({e})\n")
+            incomplete.append(quarter)
+            continue
+        scraped[quarter] = len(courses)
+
+        if any(course.quarter != quarter for course in courses):
+            print(f"⚠️  {quarter}: results came back for a different term, not caching")
+        elif not courses:
+            print(f"⚠️  {quarter}: no courses scraped, not caching")
+        elif _term_is_closed(quarter):
+            manifest['terms'][quarter] = {
+                'file': os.path.basename(output_file),
+                'count': len(courses),
+                'scraped_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            _write_json_atomic(manifest, manifest_path)
+            print(f"🔒 {quarter} is closed; cached permanently\n")
+
+    if incomplete:
+        raise IncompleteScrape(f"{len(incomplete)} of {len(selected)} term(s) incomplete: "
+                               f"{', '.join(incomplete)}", incomplete)
+    return scraped
+
+
+def watch_enrollment(entries, term=DEFAULT_TERM, interval=10.0, seat_changes=False, concurrency=8, verbose=False,
+                     retries=3, max_polls=None, stream=None):
+    """
+    Watch classes for enrollment changes, writing each event to stream as a JSON line.
+
+    Events are flushed as soon as a poll finds them; progress messages go
+    to stderr, so stream can be stdout. Runs until interrupted, or for
+    max_polls polls.
+
+    Args:
+        entries: Class numbers and/or sections ("CSE 101-01") to watch
+        term: Term the classes are in, e.g. "2026 Winter"
+        interval: Seconds from the start of one poll to the next
+        seat_changes: Also report seat and wait list count changes
+        concurrency: Detail pages fetched at once per poll
+        verbose: Print every poll
+        retries: Times a request is retried after a transient failure
+        max_polls: Stop after this many polls (None: run until interrupted)
+        stream: Where events are written (default: stdout)
+
+    Returns:
+        Number of events written
+    """
+    stream = stream or sys.stdout
+    written = 0
+    with contextlib.redirect_stdout(sys.stderr):
+        controller = FetchController(retries=retries, verbose=verbose)
+        watcher = EnrollmentWatcher(entries, term=term, concurrency=concurrency, seat_changes=seat_changes,
+                                    verbose=verbose, metrics=controller.metrics, controller=controller)
+        try:
+            watcher.resolve()
+            print(f"👀 Watching {len(watcher.urls)} class(es) in {term} every {interval:g}s")
+            for event in watcher.watch(interval, max_polls):
+                stream.write(json.dumps(event, ensure_ascii=False) + '\n')
+                stream.flush()
+                written += 1
+                if event['event'] != 'watching':
+                    print(f"🔔 {event['name']}: {event['previous_status']} -> {event['enrollment_status']} "
+                          f"({event['available_seats']} seat(s) available)")
+        finally:
+            watcher.close()
+    return written
+
 
 if __name__ == "__main__":
     import argparse
@@ -523,7 +3376,119 @@ if __name__ == "__main__":
                        help='Print detailed debugging information')
     parser.add_argument('--screenshot', '-s', action='store_true',
                        help='Take screenshots on errors')
+    parser.add_argument('--engine', choices=ENGINES, default='selenium',
+                       help='Fetch pages with headless Chrome (selenium) or plain HTTP form posts (http) (default: selenium)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='Scrape subjects in parallel with this many workers (default: 1, no sharding)')
+    parser.add_argument('--subjects',
+                       help='Comma-separated subject codes to scrape, e.g. AM,CSE (default: all subjects)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, dest='output_format',
+                       help='Output format: json array, ndjson lines flushed after every page, or an indexed '
+                            'sqlite catalog (default: from the file extension; "-" streams ndjson to stdout)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted scrape from its checkpoint (<output_file>.checkpoint.json)')
+    parser.add_argument('--no-checkpoint', action='store_true',
+                       help="Don't record a checkpoint after each page")
+    parser.add_argument('--enrich', action='store_true',
+                       help='Fetch each course\'s detail page and add its description, requirements, credits and GE')
+    parser.add_argument('--enrich-concurrency', type=int, default=8,
+                       help='Detail pages fetched at once with --enrich (default: 8)')
+    parser.add_argument('--enrich-rate', type=float, default=5.0,
+                       help='Detail requests per second per host with --enrich, 0 to leave the pace to the adaptive '
+                            'concurrency limit alone (default: 5)')
+    parser.add_argument('--cache', metavar='DIR',
+                       help='Cache fetched pages in DIR (http engine and --enrich)')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES, default='use',
+                       help='use: serve fresh pages from the cache; refresh: always refetch; '
+                            'replay: never touch the network (default: use)')
+    parser.add_argument('--cache-max-age', type=float, default=6,
+                       help='Hours a cached page is served without asking the server (default: 6)')
+    parser.add_argument('--cache-max-size', type=int, default=500,
+                       help='MB the cache is trimmed back to after each run (default: 500)')
+    parser.add_argument('--archive', metavar='DIR',
+                       help='Also keep every raw results page, gzipped by term, in DIR for re-extracting offline '
+                            'with reextract_archive.py')
+    parser.add_argument('--max-concurrency', type=int, metavar='N',
+                       help='Never have more than N requests in flight across workers and --enrich; below that '
+                            'the concurrency adapts to how pisa is coping (default: no fixed cap)')
+    parser.add_argument('--retries', type=int, default=3,
+                       help='Times a request is retried after a timeout, dropped connection, 429 or 5xx (default: 3)')
+    parser.add_argument('--metrics', nargs='?', const='', metavar='FILE',
+                       help='Write a JSON timing report (default FILE: <output_file>.metrics.json)')
+    parser.add_argument('--profile', metavar='FILE',
+                       help='Run the scrape under cProfile and save the stats to FILE')
+    parser.add_argument('--term', default=DEFAULT_TERM,
+                       help=f'Term to scrape (default: {DEFAULT_TERM})')
+    parser.add_argument('--list-terms', action='store_true',
+                       help='List the terms offered by the search form and exit')
+    parser.add_argument('--backfill', metavar='DIR',
+                       help='Scrape several terms into DIR, one JSON file per term (see --terms)')
+    parser.add_argument('--terms', default='all',
+                       help='Terms to backfill: "all", "2025 Fall,2025 Spring" or "2024 Fall..2026 Winter" (default: all)')
+    parser.add_argument('--force', action='store_true',
+                       help='Re-scrape closed terms that a previous backfill already cached')
+    parser.add_argument('--watch', metavar='CLASSES',
+                       help='Instead of scraping, poll these class numbers or sections (e.g. "30700,CSE 101-01") '
+                            'and print enrollment changes to stdout as NDJSON events')
+    parser.add_argument('--interval', type=float, default=10,
+                       help='Seconds between --watch polls (default: 10)')
+    parser.add_argument('--seat-changes', action='store_true',
+                       help='With --watch, also report seat count changes that leave the status as it was')
+    parser.add_argument('--polls', type=int,
+                       help='With --watch, stop after this many polls (default: run until interrupted)')
     
     args = parser.parse_args()
+    subjects = [s.strip().upper() for s in args.subjects.split(',') if s.strip()] if args.subjects else None
+    cache = None
+    if args.cache:
+        cache = ResponseCache(args.cache, mode=args.cache_mode, max_age=args.cache_max_age * 3600,
+                              max_bytes=args.cache_max_size * 1024 * 1024)
+    archive = PageArchive(args.archive) if args.archive else None
+    
+    if args.watch:
+        try:
+            watch_enrollment(args.watch.split(','), term=args.term, interval=max(0.0, args.interval),
+                             seat_changes=args.seat_changes, verbose=args.verbose, retries=max(0, args.retries),
+                             max_polls=args.polls)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching", file=sys.stderr)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+    elif args.list_terms:
+        controller = FetchController(retries=max(0, args.retries), verbose=args.verbose)
+        for value, text, quarter in list_terms(engine=args.engine, verbose=args.verbose, cache=cache,
+                                               controller=controller):
+            status = ''
+            if quarter:
+                status = 'closed' if _term_is_closed(quarter) else 'open'
+            print(f"{value:>6}  {text:<28} {status}")
+    elif args.backfill:
+        try:
+            backfill_terms(args.backfill, terms=args.terms, engine=args.engine, workers=max(1, args.workers),
+                           verbose=args.verbose, screenshot_on_error=args.screenshot, force=args.force,
+                           cache=cache, max_concurrency=args.max_concurrency, retries=max(0, args.retries),
+                           archive=archive)
+        except IncompleteScrape as e:
+            print(f"❌ Backfill incomplete, {e}")
+            sys.exit(1)
+    else:
+        try:
+            scrape_ucsc_courses(args.output_file, verbose=args.verbose, screenshot_on_error=args.screenshot,
+                                engine=args.engine, workers=max(1, args.workers), subjects=subjects,
+                                term=args.term, output_format=args.output_format,
+                                checkpoint=not args.no_checkpoint, resume=args.resume,
+                                metrics_file=(args.metrics or _metrics_path(args.output_file))
+                                if args.metrics is not None else None,
+                                profile_file=args.profile, enrich=args.enrich,
+                                enrich_concurrency=max(1, args.enrich_concurrency), enrich_rate=args.enrich_rate,
+                                cache=cache, max_concurrency=args.max_concurrency, retries=max(0, args.retries),
+                                archive=archive)
+        except IncompleteScrape:
+            # Already reported by _run_scrape
+            sys.exit(1)
     
-    scrape_ucsc_courses(args.output_file, verbose=args.verbose, screenshot_on_error=args.screenshot)
+    if cache is not None and cache.mode != 'replay':
+        removed, freed = cache.prune()
+        if removed:
+            print(f"🗄️  Pruned {removed} cache entries ({freed / 1024 / 1024:.1f} MB) from {args.cache}")
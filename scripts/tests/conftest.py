@@ -0,0 +1,73 @@
+"""
+Shared fixtures: a mock pisa server (mock_pisa.MockPisaServer) that the
+scraper is pointed at, with searches and pages that can be made to fail.
+"""
+
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(SCRIPTS_DIR, 'fixtures')
+sys.path.insert(0, SCRIPTS_DIR)
+
+import mock_pisa  # noqa: E402
+import scrape_ucsc  # noqa: E402
+
+
+class FlakyPisa(mock_pisa.MockPisaServer):
+    """
+    MockPisaServer whose results can be broken on purpose.
+
+    Searches for a subject in fail_subjects, and results pages (numbered
+    from 1) in fail_pages, are answered with a 500. Pages in empty_pages
+    come back 200 with no course panels.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_subjects = set()
+        self.fail_pages = set()
+        self.empty_pages = set()
+
+    def _respond(self, request, form):
+        def field(name, default=''):
+            return form.get(name, [default])[0]
+
+        action = field('action')
+        if action in ('results', 'next') and request.command == 'POST':
+            start = int(field('rec_start', '0') or 0) + self.page_size if action == 'next' else 0
+            page = start // self.page_size + 1
+            subject = field('binds[:subject]')
+            if subject in self.fail_subjects or page in self.fail_pages:
+                request._send(500, 'Internal Server Error', 'text/plain')
+                return
+            if page in self.empty_pages:
+                request._send(200, mock_pisa.render_results(
+                    [], field('binds[:term]', mock_pisa.DEFAULT_TERM), field('binds[:reg_status]', 'O'),
+                    subject, start, self.page_size))
+                return
+        super()._respond(request, form)
+
+
+@pytest.fixture
+def pisa(monkeypatch):
+    """
+    Start a FlakyPisa and point the scraper at it.
+
+    Call with the catalog size and page size; the same seed always serves
+    the same catalog.
+    """
+    servers = []
+
+    def start(sections=300, page_size=20, seed=0):
+        server = FlakyPisa(mock_pisa.synthetic_catalog(sections, seed), page_size=page_size).start()
+        servers.append(server)
+        monkeypatch.setattr(scrape_ucsc, 'SEARCH_URL', server.url)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
@@ -0,0 +1,35 @@
+"""Backfill only records a closed term in the manifest once it was scraped completely."""
+
+import json
+import os
+
+import pytest
+
+import bench_scrape
+import scrape_ucsc
+from scrape_ucsc import IncompleteScrape
+
+
+def _manifest(output_dir):
+    with open(os.path.join(output_dir, scrape_ucsc.BACKFILL_MANIFEST), encoding='utf-8') as f:
+        return json.load(f)['terms']
+
+
+def test_closed_term_is_cached(pisa, tmp_path):
+    pisa(sections=60, page_size=20)
+    _, offerings = bench_scrape.expected_counts(60)
+
+    assert scrape_ucsc.backfill_terms(str(tmp_path), terms='2025 Fall', retries=0) == {'2025 Fall': offerings}
+    assert _manifest(tmp_path)['2025 Fall']['count'] == offerings
+
+
+def test_incomplete_term_is_not_cached(pisa, tmp_path):
+    server = pisa(sections=60, page_size=20)
+    server.empty_pages = {2}
+
+    with pytest.raises(IncompleteScrape) as raised:
+        scrape_ucsc.backfill_terms(str(tmp_path), terms='2025 Fall', retries=0)
+    assert raised.value.failed == ['2025 Fall']
+    assert not os.path.exists(tmp_path / scrape_ucsc._term_filename('2025 Fall'))
+    manifest = tmp_path / scrape_ucsc.BACKFILL_MANIFEST
+    assert not manifest.exists() or '2025 Fall' not in _manifest(tmp_path)
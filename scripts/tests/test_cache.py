@@ -0,0 +1,38 @@
+"""Replay mode answers only from the response cache and never reaches the server."""
+
+import pytest
+
+import scrape_ucsc
+from scrape_ucsc import CacheMiss, ResponseCache
+
+
+def _requests(server):
+    return server.stats().get('requests', 0)
+
+
+def test_replay_serves_a_recorded_scrape_offline(pisa, tmp_path):
+    server = pisa(sections=100, page_size=20)
+    cache_dir = str(tmp_path / 'cache')
+    recorded = scrape_ucsc.scrape_ucsc_courses(str(tmp_path / 'recorded.json'), engine='http', checkpoint=False,
+                                               cache=ResponseCache(cache_dir, mode='use'))
+    sent = _requests(server)
+
+    replayed = scrape_ucsc.scrape_ucsc_courses(str(tmp_path / 'replayed.json'), engine='http', checkpoint=False,
+                                               cache=ResponseCache(cache_dir, mode='replay'))
+    assert _requests(server) == sent
+    assert [course.to_dict() for course in replayed] == [course.to_dict() for course in recorded]
+
+
+def test_replay_of_an_unrecorded_search_is_a_cache_miss(pisa, tmp_path):
+    server = pisa(sections=100, page_size=20)
+    cache_dir = str(tmp_path / 'cache')
+    scrape_ucsc.scrape_ucsc_courses(str(tmp_path / 'recorded.json'), engine='http', checkpoint=False,
+                                    cache=ResponseCache(cache_dir, mode='use'))
+    sent = _requests(server)
+
+    cache = ResponseCache(cache_dir, mode='replay')
+    with pytest.raises(CacheMiss):
+        scrape_ucsc.scrape_ucsc_courses(str(tmp_path / 'replayed.json'), engine='http', term='2026 Spring',
+                                        checkpoint=False, cache=cache)
+    assert _requests(server) == sent
+    assert cache.metrics.counters['cache_misses'] == 1
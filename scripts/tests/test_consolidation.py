@@ -0,0 +1,127 @@
+"""Sections that run across a page boundary, in every output format and through --resume."""
+
+import contextlib
+import json
+import os
+import sqlite3
+
+import pytest
+import requests
+
+import bench_scrape
+import scrape_ucsc
+from conftest import FIXTURES_DIR
+from scrape_ucsc import Course, OfferingIndex
+
+
+def _fixture_courses(name='pisa_results_page.html'):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return scrape_ucsc.parse_results_page(f.read(), '2026 Winter')
+
+
+def _continuation(course, section):
+    """Another section of course's offering, as it would appear at the top of the next page."""
+    return Course(course.name, course.subject, course.professor, course.quarter, course.course_link, section)
+
+
+def test_last_course_on_a_page_waits_for_the_next_page():
+    page = _fixture_courses()
+    last = page[-1]
+    index = OfferingIndex()
+
+    released = index.consolidate(page)
+    assert last not in released
+    assert len(released) == len(page) - 1
+    assert index.pending == [last]
+
+    first = _fixture_courses()[0]
+    released = index.consolidate([_continuation(last, '02'), first])
+    assert released == [last]
+    assert last.sections == ['01', '02']
+    assert index.flush() == []
+    assert index.late == 0
+
+
+def test_section_after_its_offering_was_released_is_counted_late():
+    page = _fixture_courses()
+    index = OfferingIndex()
+    index.consolidate(page)
+    index.flush()
+
+    index.consolidate([_continuation(page[0], '09')])
+    assert index.late == 1
+    assert page[0].sections[-1] == '09'
+
+
+def test_pending_offerings_survive_a_checkpoint():
+    page = _fixture_courses()
+    index = OfferingIndex()
+    released = index.consolidate(page)
+    saved = [course.to_dict() for course in index.pending]
+
+    restored = OfferingIndex(released, pending=[Course.from_dict(data) for data in saved])
+    restored.consolidate([_continuation(page[-1], '02')])
+    (offering,) = restored.flush()
+    assert offering.name == page[-1].name
+    assert offering.sections == ['01', '02']
+
+
+@pytest.mark.parametrize('output_format', scrape_ucsc.OUTPUT_FORMATS)
+def test_every_format_keeps_sections_split_across_pages(pisa, tmp_path, output_format):
+    server = pisa(sections=150, page_size=7)
+    assert _split_offerings(server.catalog, 7)
+    output_file = str(tmp_path / f"catalog.{output_format}")
+    scrape_ucsc.scrape_ucsc_courses(output_file, engine='http', output_format=output_format, checkpoint=False)
+
+    assert bench_scrape.output_counts(output_file, output_format) == bench_scrape.expected_counts(150)
+    assert server.stats()['results'] == -(-150 // 7)
+
+
+def test_iter_courses_yields_complete_offerings(pisa):
+    pisa(sections=150, page_size=7)
+    courses = list(scrape_ucsc.iter_courses(engine='http'))
+
+    assert all(isinstance(course, dict) for course in courses)
+    assert (sum(len(course['sections']) for course in courses), len(courses)) == bench_scrape.expected_counts(150)
+
+
+@pytest.mark.parametrize('output_format', scrape_ucsc.OUTPUT_FORMATS)
+def test_resume_round_trip(pisa, tmp_path, output_format):
+    server = pisa(sections=150, page_size=7)
+    expected_file = str(tmp_path / f"expected.{output_format}")
+    scrape_ucsc.scrape_ucsc_courses(expected_file, engine='http', output_format=output_format, checkpoint=False)
+
+    output_file = str(tmp_path / f"catalog.{output_format}")
+    server.fail_pages = {8}
+    with pytest.raises(requests.HTTPError):
+        scrape_ucsc.scrape_ucsc_courses(output_file, engine='http', output_format=output_format, retries=0)
+    checkpoint = scrape_ucsc._load_checkpoint(scrape_ucsc._checkpoint_path(output_file), scrape_ucsc.DEFAULT_TERM,
+                                              output_format)
+    assert checkpoint['page'] == 7
+    assert checkpoint['pending'], 'page 7 should end partway through an offering'
+    assert not os.path.exists(output_file)
+
+    server.fail_pages = set()
+    scrape_ucsc.scrape_ucsc_courses(output_file, engine='http', output_format=output_format, resume=True)
+
+    assert not os.path.exists(scrape_ucsc._checkpoint_path(output_file))
+    assert bench_scrape.output_counts(output_file, output_format) == bench_scrape.expected_counts(150)
+    assert _names(output_file, output_format) == _names(expected_file, output_format)
+
+
+def _split_offerings(catalog, page_size):
+    """Offerings whose sections are listed on more than one results page."""
+    pages = {}
+    for position, section in enumerate(catalog):
+        pages.setdefault((section.subject, section.number, section.instructor), set()).add(position // page_size)
+    return [offering for offering, seen in pages.items() if len(seen) > 1]
+
+
+def _names(output_file, output_format):
+    """Each offering's name and sections, in file order."""
+    if output_format == 'sqlite':
+        with contextlib.closing(sqlite3.connect(output_file)) as db:
+            return [tuple(row) for row in db.execute('SELECT name, sections FROM courses ORDER BY id')]
+    with open(output_file, encoding='utf-8') as f:
+        courses = [json.loads(line) for line in f] if output_format == 'ndjson' else json.load(f)
+    return [(course['name'], json.dumps(course['sections'])) for course in courses]
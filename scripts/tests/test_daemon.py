@@ -0,0 +1,52 @@
+"""The scrape daemon turns jobs away with a 503 while every warm session is busy."""
+
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+import bench_scrape
+import scrape_daemon
+from scrape_daemon import ScrapeDaemon, SessionPool
+
+
+@pytest.fixture
+def daemon(pisa):
+    pisa(sections=60, page_size=20)
+    pool = SessionPool('http', size=1, wait_timeout=0.1).start()
+    scraper = ScrapeDaemon(pool)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), scrape_daemon._Handler)
+    server.daemon_threads = True
+    server.daemon = scraper
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield scraper, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    scraper.close()
+
+
+def _post(url, job):
+    request = Request(url, data=json.dumps(job).encode('utf-8'), headers={'Content-Type': 'application/json'})
+    with urlopen(request, timeout=30) as response:
+        return response.status, json.load(response)
+
+
+def test_busy_pool_answers_503(daemon):
+    scraper, url = daemon
+
+    with scraper.pool.session():
+        with pytest.raises(HTTPError) as raised:
+            _post(url + '/scrape', {})
+        assert raised.value.code == 503
+        assert raised.value.headers['Retry-After'] == '5'
+        assert 'No warm session' in json.load(raised.value)['error']
+
+    # The session is parked on the search form again in the background
+    scraper.pool.wait_timeout = 10
+    status, result = _post(url + '/scrape', {})
+    assert status == 200
+    assert len(result['courses']) == bench_scrape.expected_counts(60)[1]
@@ -0,0 +1,16 @@
+"""Enrichment only merges fields that hold for the whole offering, not one section's enrollment."""
+
+import scrape_ucsc
+
+
+def test_enriched_offerings_carry_no_section_fields(pisa):
+    pisa(sections=60, page_size=20)
+    courses = list(scrape_ucsc.iter_courses(engine='http', enrich=True, enrich_rate=0))
+
+    multi_section = [course for course in courses if len(course['sections']) > 1]
+    assert multi_section
+    for course in courses:
+        assert course['description']
+        assert not set(scrape_ucsc.ENROLLMENT_FIELDS) & set(course)
+        assert set(course) - {'name', 'subject', 'professor', 'quarter', 'course_link', 'sections'} <= set(
+            scrape_ucsc.OFFERING_DETAIL_FIELDS)
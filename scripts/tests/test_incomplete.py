@@ -0,0 +1,73 @@
+"""Lost results pages end the scrape with IncompleteScrape instead of a short catalog."""
+
+import os
+
+import pytest
+
+import scrape_ucsc
+from scrape_ucsc import FetchController, IncompleteScrape
+
+
+def test_empty_later_page_is_incomplete(pisa, tmp_path):
+    server = pisa(sections=100, page_size=20)
+    server.empty_pages = {3}
+    output_file = str(tmp_path / 'catalog.json')
+
+    with pytest.raises(IncompleteScrape) as raised:
+        scrape_ucsc.scrape_ucsc_courses(output_file, engine='http', checkpoint=False)
+    assert raised.value.failed == [3]
+    assert not os.path.exists(output_file)
+
+
+def test_empty_first_page_is_an_empty_search(pisa, tmp_path):
+    server = pisa(sections=100, page_size=20)
+    server.empty_pages = {1}
+    output_file = str(tmp_path / 'catalog.json')
+
+    assert scrape_ucsc.scrape_ucsc_courses(output_file, engine='http', checkpoint=False) == []
+
+
+def test_parse_error_is_incomplete(pisa, tmp_path, monkeypatch):
+    pisa(sections=100, page_size=20)
+    parse = scrape_ucsc._courses_from_document
+    calls = []
+
+    def broken_second_page(document, *args, **kwargs):
+        calls.append(document)
+        if len(calls) == 2:
+            raise ValueError('unexpected panel markup')
+        return parse(document, *args, **kwargs)
+
+    monkeypatch.setattr(scrape_ucsc, '_courses_from_document', broken_second_page)
+    output_file = str(tmp_path / 'catalog.json')
+
+    with pytest.raises(IncompleteScrape) as raised:
+        scrape_ucsc.scrape_ucsc_courses(output_file, engine='http', checkpoint=False)
+    assert raised.value.failed == [2]
+    assert isinstance(raised.value.__cause__, ValueError)
+    assert not os.path.exists(output_file)
+
+
+def test_request_slot_is_released_when_a_generator_is_closed():
+    controller = FetchController(max_concurrency=2)
+
+    def pages():
+        with controller.request():
+            yield 'page'
+
+    running = pages()
+    next(running)
+    assert controller.in_flight == 1
+    running.close()
+    assert controller.in_flight == 0
+
+
+def test_request_slot_is_released_on_keyboard_interrupt():
+    controller = FetchController(max_concurrency=2)
+
+    with pytest.raises(KeyboardInterrupt):
+        with controller.request():
+            raise KeyboardInterrupt
+    assert controller.in_flight == 0
+    # An interrupt isn't the server struggling, so the limit stays put
+    assert controller.limit == 2
@@ -0,0 +1,35 @@
+"""A sharded scrape that loses a subject reports it and leaves the last complete output alone."""
+
+import pytest
+
+import scrape_ucsc
+from scrape_ucsc import IncompleteScrape
+
+
+@pytest.mark.parametrize('output_format', scrape_ucsc.OUTPUT_FORMATS)
+def test_failed_subject_keeps_previous_output(pisa, tmp_path, output_format):
+    server = pisa(sections=300, page_size=20)
+    output_file = tmp_path / f"catalog.{output_format}"
+    scrape_ucsc.scrape_ucsc_courses(str(output_file), engine='http', workers=2, subjects=['AM', 'CSE'],
+                                    output_format=output_format, checkpoint=False)
+    before = output_file.read_bytes()
+
+    server.fail_subjects = {'CSE'}
+    with pytest.raises(IncompleteScrape) as raised:
+        scrape_ucsc.scrape_ucsc_courses(str(output_file), engine='http', workers=2, subjects=['AM', 'CSE'],
+                                        output_format=output_format, retries=0, checkpoint=False)
+    assert raised.value.failed == ['CSE']
+    assert output_file.read_bytes() == before
+
+
+def test_sharded_scrape_matches_a_single_search(pisa, tmp_path):
+    pisa(sections=300, page_size=20)
+    subjects = ['AM', 'CSE']
+    sharded = scrape_ucsc.scrape_ucsc_courses(str(tmp_path / 'sharded.json'), engine='http', workers=2,
+                                              subjects=subjects, checkpoint=False)
+    single = []
+    for subject in subjects:
+        single += scrape_ucsc.scrape_ucsc_courses(str(tmp_path / f"{subject}.json"), engine='http',
+                                                  subjects=[subject], checkpoint=False)
+
+    assert sorted(map(scrape_ucsc.OfferingIndex.key, sharded)) == sorted(map(scrape_ucsc.OfferingIndex.key, single))